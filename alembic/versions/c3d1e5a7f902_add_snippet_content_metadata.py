@@ -0,0 +1,66 @@
+"""add_snippet_content_metadata
+
+Revision ID: c3d1e5a7f902
+Revises: 96f680fd26b6
+Create Date: 2026-10-19 09:12:41.518230
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d1e5a7f902"
+down_revision: Union[str, None] = "96f680fd26b6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "snippets",
+        sa.Column("content_bytes", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "snippets",
+        sa.Column("content_lines", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "snippets", sa.Column("content_hash", sa.String(length=64), nullable=True)
+    )
+    op.add_column(
+        "snippets", sa.Column("content_preview", sa.String(length=203), nullable=True)
+    )
+
+    # Normalize the line endings of the existing snippets, new ones are normalized on save
+    op.execute(
+        r"""
+        UPDATE snippets
+        SET content = replace(replace(content, E'\r\n', E'\n'), E'\r', E'\n')
+        WHERE content LIKE E'%\r%'
+        """
+    )
+    # Backfill the content metadata, must match `Snippet.set_content_metadata`
+    op.execute(
+        r"""
+        UPDATE snippets
+        SET content_bytes = octet_length(content),
+            content_lines = length(content) - length(replace(content, E'\n', '')) + 1,
+            content_hash = encode(sha256(convert_to(content, 'UTF8')), 'hex'),
+            content_preview = CASE
+                WHEN char_length(content) > 200 THEN left(content, 200) || '...'
+                ELSE content
+            END
+        WHERE content IS NOT NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("snippets", "content_preview")
+    op.drop_column("snippets", "content_hash")
+    op.drop_column("snippets", "content_lines")
+    op.drop_column("snippets", "content_bytes")
@@ -1,30 +1,86 @@
+import asyncio
+import secrets
+from contextlib import asynccontextmanager
+
 from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, PlainTextResponse, RedirectResponse
 from loguru import logger
+from sqlalchemy.exc import DBAPIError
 from starlette.middleware.sessions import SessionMiddleware
 
 from app.auth import router as auth_router
 from app.auth.models import User
 from app.auth.utils import optional_current_user
+from app.common.compression import CompressionMiddleware
 from app.common.exceptions import AuthBannedError, UserNotVerifiedError
-from app.common.templates import templates
+from app.common.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from app.common.metrics import MetricsMiddleware, registry
+from app.common.profiling import ProfilerMiddleware
+from app.common.response_cache import ResponseCacheMiddleware
+from app.common.static import CachedStaticFiles, static_manifest
+from app.common.templates import precompile_templates, templates
+from app.common.timeouts import StatementTimeoutMiddleware, is_statement_timeout
+from app.common.timing import ServerTimingMiddleware
+from app.common.urls import RouteTable
 from app.common.utils import flash
 from app.logger import init_logging
 from app.settings import settings
 from app.snippets import router as snippets_router
+from app.snippets.tasks import rerender_stale_descriptions
+
+
+async def _run_background_task(name: str, coro):
+    try:
+        await coro
+    except Exception:
+        logger.exception(f"Background task failed: {name}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Hash the static files once, instead of on the first page load
+    static_manifest.build()
+    # Compile the templates before the first request instead of during it
+    await asyncio.to_thread(precompile_templates)
+    # Paths of the named routes, used to build the urls in the templates
+    app.state.route_table = RouteTable(app.routes)
+
+    background_tasks = [
+        asyncio.create_task(
+            _run_background_task(
+                "rerender_stale_descriptions", rerender_stale_descriptions()
+            )
+        ),
+    ]
+    yield
+    for task in background_tasks:
+        task.cancel()
+    # Write the logs still in the queue of the background sink
+    await logger.complete()
+
 
 app = FastAPI(
     title="devscript",
     summary="A code snippet manager",
     docs_url=None,
     redoc_url=None,
+    lifespan=lifespan,
 )
 
 init_logging()  # Must be called directly after app creation and before everything else
 
+# Inside the CORS middleware, the CORS headers depend on the request
+if settings.RESPONSE_CACHE_ENABLED:
+    app.add_middleware(ResponseCacheMiddleware)
+
+# Outside the response cache, its revalidations read a disconnect once they have the request
+app.add_middleware(
+    StatementTimeoutMiddleware, cancel_on_disconnect=settings.CANCEL_ON_DISCONNECT
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -33,8 +89,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_level=settings.COMPRESSION_BROTLI_LEVEL,
+        zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+    )
+
+# Profiles the compression and the response cache too
+if settings.PROFILER_ENABLED:
+    app.add_middleware(ProfilerMiddleware)
+
+# Inside the metrics middleware, they share the SQL statements count of the request
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+
+# Outside the other middlewares, so their time is part of the request duration
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Mount static files
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
 
 # Include routers
 app.include_router(auth_router)
@@ -49,8 +126,39 @@ async def index(request: Request, user: User | None = Depends(optional_current_u
     return templates.TemplateResponse(request, "common/templates/index.html")
 
 
+@app.get("/metrics", name="metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if settings.METRICS_TOKEN and not secrets.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        return PlainTextResponse(
+            "Unauthorized", status_code=status.HTTP_401_UNAUTHORIZED
+        )
+
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
+def _is_api_request(request: Request) -> bool:
+    return request.url.path.startswith("/api/")
+
+
+def _api_error_response(exc: Exception, status_code: int) -> ORJSONResponse:
+    detail = getattr(exc, "detail", None) or "An error occurred"
+    return ORJSONResponse(
+        {"detail": detail},
+        status_code=status_code,
+        headers=getattr(exc, "headers", None),
+    )
+
+
 @app.exception_handler(status.HTTP_404_NOT_FOUND)
 async def custom_404_handler(request, exc):
+    if _is_api_request(request):
+        return _api_error_response(exc, status.HTTP_404_NOT_FOUND)
+
     return templates.TemplateResponse(
         request, "common/templates/404.html", status_code=status.HTTP_404_NOT_FOUND
     )
@@ -58,6 +166,9 @@ async def custom_404_handler(request, exc):
 
 @app.exception_handler(status.HTTP_401_UNAUTHORIZED)
 async def catch_unauthorized(request, exc):
+    if _is_api_request(request):
+        return _api_error_response(exc, status.HTTP_401_UNAUTHORIZED)
+
     return RedirectResponse(
         request.url_for("auth.login"), status_code=status.HTTP_303_SEE_OTHER
     )
@@ -82,8 +193,34 @@ async def custom_exception_handler(request, exc):
     )
 
 
+@app.exception_handler(DBAPIError)
+async def catch_statement_timeout(request, exc):
+    if not is_statement_timeout(exc):
+        raise exc
+
+    logger.bind(path=request.url.path).warning("A SQL statement timed out")
+    if _is_api_request(request):
+        return ORJSONResponse(
+            {"detail": "The request took too long"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    flash(request, "The request took too long, try a narrower search", "error")
+    return templates.TemplateResponse(
+        request,
+        "common/templates/404.html",
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+    )
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request, exc):
+    if _is_api_request(request):
+        return ORJSONResponse(
+            {"detail": jsonable_encoder(exc.errors())},
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
     raise HTTPException(
         status_code=status.HTTP_404_NOT_FOUND,
         detail="Request validation error",
@@ -20,6 +20,7 @@ from app.common.exceptions import (
     UserNotVerifiedError,
     ValidationError,
 )
+from app.common.timing import timed
 from app.email.config import is_smtp_configured
 from app.settings import settings
 
@@ -218,7 +219,8 @@ async def current_user(session_token: str = Depends(AUTH_COOKIE)):
     """
     Get the current authenticated user. User is required for the page.
     """
-    user = await _get_user_from_session_token(session_token, optional=False)
+    with timed("auth"):
+        user = await _get_user_from_session_token(session_token, optional=False)
     if user.is_banned:
         # This will invalidate the users current session
         raise AuthBannedError
@@ -229,7 +231,8 @@ async def optional_current_user(session_token: str = Depends(AUTH_COOKIE)):
     """
     Used when the user object is optional for a page
     """
-    user = await _get_user_from_session_token(session_token, optional=True)
+    with timed("auth"):
+        user = await _get_user_from_session_token(session_token, optional=True)
     if user and user.is_banned:
         # Since the user is optional, we can just return None
         return None
@@ -1,12 +1,15 @@
 import uuid
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, Form, Request, status
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Depends, Form, HTTPException, Request, status
+from fastapi.responses import RedirectResponse, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.common.cache import get_cache_stats
 from app.common.db import get_async_session
+from app.common.profiling import profiles
+from app.common.slow_queries import slow_query_log
 from app.common.templates import templates
 from app.common.utils import flash
 from app.email.send import send_invitation_email
@@ -47,7 +50,87 @@ async def admin_view(
     return templates.TemplateResponse(
         request,
         "auth/templates/admin.html",
-        {"users": users, "invitations": invitations},
+        {
+            "users": users,
+            "invitations": invitations,
+            "cache_stats": get_cache_stats(),
+            "profiles": profiles.all(),
+            "slow_queries": slow_query_log.all(),
+        },
+    )
+
+
+@router.get("/admin/slow-queries/{fingerprint}", name="auth.admin_slow_query")
+@admin_required
+async def admin_slow_query(
+    request: Request,
+    fingerprint: str,
+    user: User = Depends(current_user),
+):
+    """Durations, routes and plan of a slow query."""
+    query = slow_query_log.get(fingerprint)
+    if not query:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    return templates.TemplateResponse(
+        request,
+        "auth/templates/admin_slow_query.html",
+        {"query": query},
+    )
+
+
+@router.post("/admin/slow-queries/clear", name="auth.admin_clear_slow_queries")
+@admin_required
+async def admin_clear_slow_queries(
+    request: Request,
+    user: User = Depends(current_user),
+):
+    """Start a new slow query log, after a fix was deployed."""
+    slow_query_log.clear()
+    flash(request, "Slow query log cleared", "success")
+    return RedirectResponse(
+        url=request.url_for("auth.admin"),
+        status_code=status.HTTP_303_SEE_OTHER,
+    )
+
+
+@router.get("/admin/profiles/{profile_id}", name="auth.admin_profile")
+@admin_required
+async def admin_profile(
+    request: Request,
+    profile_id: str,
+    user: User = Depends(current_user),
+):
+    """Call tree of a profiled request."""
+    profile = profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    return templates.TemplateResponse(
+        request,
+        "auth/templates/admin_profile.html",
+        {"profile": profile},
+    )
+
+
+@router.get("/admin/profiles/{profile_id}/download", name="auth.admin_profile_download")
+@admin_required
+async def admin_profile_download(
+    request: Request,
+    profile_id: str,
+    user: User = Depends(current_user),
+):
+    """Download a profile in the pstats format."""
+    profile = profiles.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    return Response(
+        profile.data,
+        media_type="application/octet-stream",
+        headers={
+            "Content-Disposition": f'attachment; filename="profile-{profile.id}.prof"'
+        },
     )
 
 
@@ -0,0 +1,172 @@
+"""
+Download the third party js/css used by the site into `app/static/vendor`.
+
+The files are combined into a few bundles named by the hash of their content, and a
+`manifest.json` maps each bundle name to its file, see `app.common.vendor`.
+Once built, the site does not load anything from a CDN, so it also works without internet access.
+
+Usage:
+    python -m app.commands.build_vendor [--force]
+
+Nothing is downloaded when the bundles are already built, unless `--force` is passed.
+"""
+
+import hashlib
+import json
+import re
+import shutil
+import sys
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from app.common.constants import SUPPORTED_CODE_THEMES, SUPPORTED_LANG_FILENAMES
+
+VENDOR_DIR = Path(__file__).parent.parent / "static" / "vendor"
+CDN_URL = "https://cdn.jsdelivr.net/npm"
+
+HLJS = "@highlightjs/cdn-assets@11.11.1"
+TOASTUI_EDITOR = "@toast-ui/editor@3.2.2"
+
+# Bundle name -> files (package@version/path) combined into it, in load order
+#   Only minified files, jsDelivr minifies the `.min.js`/`.min.css` files a package
+#   doesn't ship itself
+BUNDLES = {
+    # Loaded on every page
+    "vendor.js": [
+        f"{HLJS}/highlight.min.js",
+        "highlightjs-copy@1.0.6/dist/highlightjs-copy.min.js",
+        "@yaireo/tagify@4.33.2/dist/tagify.min.js",
+        "@yaireo/tagify@4.33.2/dist/tagify.polyfills.min.js",
+        "@yaireo/dragsort@1.3.2/dist/dragsort.min.js",
+        "slim-select@2.10.0/dist/slimselect.min.js",
+        "dayjs@1.11.13/dayjs.min.js",
+        "dayjs@1.11.13/plugin/relativeTime.min.js",
+    ],
+    "vendor.css": [
+        "highlightjs-copy@1.0.6/dist/highlightjs-copy.min.css",
+        "@yaireo/tagify@4.33.2/dist/tagify.min.css",
+        "slim-select@2.10.0/dist/slimselect.min.css",
+    ],
+    # Only loaded on pages with a markdown editor
+    "markdown-editor.js": [
+        f"{TOASTUI_EDITOR}/dist/toastui-editor-all.min.js",
+    ],
+    "markdown-editor.css": [
+        f"{TOASTUI_EDITOR}/dist/toastui-editor.min.css",
+        f"{TOASTUI_EDITOR}/dist/theme/toastui-editor-dark.min.css",
+    ],
+    # Only loaded on pages with a code editor
+    "custom-elements.js": [
+        "@ungap/custom-elements@1.3.0/min.js",
+    ],
+    # ES module, uses the global `hljs` and the registered languages, must not import
+    # anything (see `check_module`)
+    "highlighted-code.js": [
+        "highlighted-code@0.6.2/esm/index.min.js",
+    ],
+    # Every language, used by the code editor to detect the language
+    "hljs/languages.js": [
+        f"{HLJS}/languages/{lang}.min.js" for lang in sorted(SUPPORTED_LANG_FILENAMES)
+    ],
+    # Each language on its own, only the ones used on a page are loaded
+    **{
+        f"hljs/languages/{lang}.js": [f"{HLJS}/languages/{lang}.min.js"]
+        for lang in SUPPORTED_LANG_FILENAMES
+    },
+    # Code themes, only the themes selected by the user are loaded
+    **{
+        f"hljs/styles/{theme}.css": [f"{HLJS}/styles/{theme}.min.css"]
+        for theme in SUPPORTED_CODE_THEMES
+        if not theme.endswith(".png")
+    },
+}
+
+
+# Bundles loaded with `import()`, the others are classic scripts
+ES_MODULES = ("highlighted-code.js",)
+
+# Static and dynamic imports, and re-exports, of an ES module
+_import_re = re.compile(rb"""(?:\bimport|\bfrom)\s*\(?\s*["']([^"']+)["']""")
+
+
+def download(path: str) -> bytes:
+    with urllib.request.urlopen(f"{CDN_URL}/{path}", timeout=30) as response:
+        return response.read()
+
+
+def check_module(name: str, content: bytes):
+    """
+    Check that an ES module bundle is self-contained.
+
+    The browser can't resolve the bare imports of a package, and the relative ones point
+    to files that are not in the bundle.
+
+    Raises:
+        ValueError: The module imports other modules
+    """
+    imports = sorted({match.decode() for match in _import_re.findall(content)})
+    if imports:
+        raise ValueError(
+            f"{name} is not self-contained, it imports {', '.join(imports)}"
+        )
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    """Add the hash of the content to a file name, `a/b.js` -> `a/b.<hash>.js`"""
+    content_hash = hashlib.sha256(content).hexdigest()[:12]
+    stem, _, ext = name.rpartition(".")
+    return f"{stem}.{content_hash}.{ext}"
+
+
+def build(output_dir: Path = VENDOR_DIR) -> dict[str, str]:
+    """
+    Download all the vendor files and write the bundles and their manifest.
+
+    Args:
+        output_dir: Directory to write the bundles to, its current content is removed
+
+    Returns:
+        The manifest, bundle name -> path of the file relative to the static directory
+    """
+    paths = sorted({path for files in BUNDLES.values() for path in files})
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        files = dict(zip(paths, executor.map(download, paths)))
+
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+
+    manifest = {}
+    for name, bundle_files in BUNDLES.items():
+        separator = b";\n" if name.endswith(".js") else b"\n"
+        content = separator.join(files[path].strip() for path in bundle_files)
+        if name in ES_MODULES:
+            check_module(name, content)
+
+        filename = fingerprint(name, content)
+        (output_dir / filename).parent.mkdir(parents=True, exist_ok=True)
+        (output_dir / filename).write_bytes(content)
+        manifest[name] = f"{output_dir.name}/{filename}"
+
+    (output_dir / "manifest.json").write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def is_built(output_dir: Path = VENDOR_DIR) -> bool:
+    try:
+        manifest = json.loads((output_dir / "manifest.json").read_text())
+    except FileNotFoundError:
+        return False
+
+    return set(manifest) == set(BUNDLES) and all(
+        (output_dir.parent / path).exists() for path in manifest.values()
+    )
+
+
+if __name__ == "__main__":
+    if "--force" not in sys.argv[1:] and is_built():
+        print("Vendor bundles are already built", file=sys.stderr)
+        sys.exit(0)
+
+    manifest = build()
+    print(f"Built {len(manifest)} vendor bundles into {VENDOR_DIR}", file=sys.stderr)
@@ -0,0 +1,90 @@
+"""
+Write gzip and brotli compressed copies (`<file>.gz`, `<file>.br`) of the static files.
+
+The copies are served by `app.common.static.CachedStaticFiles` to the clients that accept them,
+so the files are compressed once at build time with the highest compression level.
+Brotli copies are only written when the `brotli` package is installed.
+
+Usage:
+    python -m app.commands.compress_static
+"""
+
+import gzip
+import os
+import sys
+from pathlib import Path
+
+from app.common.static import STATIC_DIR
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    ".css",
+    ".html",
+    ".ico",
+    ".js",
+    ".json",
+    ".map",
+    ".svg",
+    ".txt",
+    ".webmanifest",
+    ".xml",
+)
+# Files smaller than this do not get smaller enough to be worth it
+MIN_SIZE = 1024
+
+
+def compress_file(path: Path) -> int:
+    """
+    Write the compressed copies of a file if they are missing or older than the file.
+
+    Returns:
+        The number of copies written
+    """
+    data = None
+    written = 0
+    compressors = [(".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        compressors.append((".br", lambda d: brotli.compress(d, quality=11)))
+
+    for extension, compress in compressors:
+        compressed_path = path.with_name(path.name + extension)
+        if (
+            compressed_path.exists()
+            and compressed_path.stat().st_mtime >= path.stat().st_mtime
+        ):
+            continue
+
+        if data is None:
+            data = path.read_bytes()
+
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            continue
+
+        compressed_path.write_bytes(compressed)
+        written += 1
+
+    return written
+
+
+def compress_static(directory: Path = STATIC_DIR) -> int:
+    written = 0
+    for root, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = Path(root) / filename
+            if (
+                path.suffix in COMPRESSIBLE_EXTENSIONS
+                and path.stat().st_size >= MIN_SIZE
+            ):
+                written += compress_file(path)
+
+    return written
+
+
+if __name__ == "__main__":
+    written = compress_static()
+    print(f"Wrote {written} compressed static files", file=sys.stderr)
@@ -0,0 +1,59 @@
+"""
+Vocabulary of the synthetic snippets, shared by the seed command and the load test dataset
+so both describe the same corpus.
+
+Languages and tags follow a Zipf distribution, the first values are picked the most.
+"""
+
+import itertools
+import random
+from typing import Sequence, TypeVar
+
+from app.common.constants import SUPPORTED_LANGUAGES
+
+T = TypeVar("T")
+
+# Most snippets use a handful of languages, the others follow
+POPULAR_LANGUAGES = ["BASH", "PYTHON", "JAVASCRIPT", "SQL", "YAML", "TYPESCRIPT", "GO"]
+POPULAR_TAGS = [
+    "docker", "linux", "git", "k8s", "aws", "postgres", "python", "shell", "ci",
+    "network", "backup", "ssh", "nginx", "cron", "json", "regex", "monitoring",
+    "security", "terraform", "ansible",
+]  # fmt: skip
+
+# Exponents of the Zipf distributions
+LANGUAGE_EXPONENT = 1.5
+TAG_EXPONENT = 1.0
+
+WORDS = (
+    "import os sys def return if else for in while class self print echo grep awk sed "
+    "docker run exec kubectl get pods curl json select from where join order by limit "
+    "const let await async function export git commit push fetch ssh tar find xargs"
+).split()
+
+
+def all_languages() -> list[str]:
+    """Every supported language, the popular ones first."""
+    return POPULAR_LANGUAGES + [
+        language
+        for language in SUPPORTED_LANGUAGES.__members__
+        if language not in POPULAR_LANGUAGES
+    ]
+
+
+def zipf_cum_weights(count: int, exponent: float = 1.0) -> list[float]:
+    return list(
+        itertools.accumulate(1 / rank**exponent for rank in range(1, count + 1))
+    )
+
+
+def zipf_choices(
+    rng: random.Random, values: Sequence[T], exponent: float = 1.0, k: int = 1
+) -> list[T]:
+    """
+    Pick values, the first ones the most.
+
+    Computes the weights on each call, keep the `zipf_cum_weights` of the values to pick
+    from a long list many times.
+    """
+    return rng.choices(values, cum_weights=zipf_cum_weights(len(values), exponent), k=k)
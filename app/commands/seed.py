@@ -0,0 +1,352 @@
+"""
+Fill the database with synthetic users and snippets, to benchmark on a realistic corpus.
+
+The rows are generated from a seed, so two runs with the same arguments create the same data,
+and are loaded with `COPY` which skips the model validators and signals. The content metadata
+and the description html are computed here instead.
+
+- Users have a verified local provider with the password `SEED_PASSWORD` and an API key,
+  and a few of them own most of the snippets
+- Snippet sizes follow a log-normal distribution, languages and tags a Zipf distribution
+- Some snippets are forks of older public snippets, popular public snippets get most favorites
+
+The seeded users have emails ending with `@{EMAIL_DOMAIN}`, they are deleted with their snippets
+before seeding again. Never run this against a production database.
+
+Usage:
+    python -m app.commands.seed --users 1000 --snippets 1000000 --seed 0
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import math
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+
+import sqlalchemy as sa
+
+from app.auth.constants import LOCAL_PROVIDER
+from app.auth.models import APIKey, Provider, User
+from app.auth.utils import pwd_context
+from app.commands.corpus import (
+    LANGUAGE_EXPONENT,
+    POPULAR_TAGS,
+    TAG_EXPONENT,
+    WORDS,
+    all_languages,
+    zipf_cum_weights,
+)
+from app.common.db import async_engine
+from app.snippets.models import CONTENT_PREVIEW_LENGTH, Snippet, SnippetTag, Tag
+from app.snippets.models import favorites as favorites_table
+from app.snippets.rendering import MARKDOWN_RENDERER_VERSION, render_markdown
+
+EMAIL_DOMAIN = "seed.example.com"
+SEED_PASSWORD = "Seed-Password-1"
+# Dates are relative to a fixed day so they are the same on every run
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+# Popular tags, then a long tail of generated ones
+TAG_COUNT = 2000
+
+# Log-normal content size, median around 600 bytes, capped to the model limit
+CONTENT_SIZE_MEDIAN = 600
+CONTENT_SIZE_SIGMA = 1.3
+CONTENT_SIZE_MAX = 50_000
+
+PUBLIC_RATIO = 0.6
+FORK_RATIO = 0.05
+COMMAND_RATIO = 0.1
+DESCRIPTION_RATIO = 0.3
+ARCHIVED_RATIO = 0.03
+FAVORITES_PER_USER = 20
+
+SNIPPET_COLUMNS = [
+    "id", "created_at", "updated_at", "title", "subtitle", "description",
+    "description_html", "description_html_version", "content", "content_bytes",
+    "content_lines", "content_hash", "content_preview", "language", "command_name",
+    "public", "archived", "user_id", "forked_from_id", "is_fork",
+]  # fmt: skip
+
+
+class Generator:
+    """Deterministic rows of the seeded tables."""
+
+    def __init__(self, users: int, seed: int = 0):
+        self.rng = random.Random(seed)
+        self.users = users
+
+        self.languages = all_languages()
+        self.language_weights = zipf_cum_weights(len(self.languages), LANGUAGE_EXPONENT)
+
+        self.tags = POPULAR_TAGS + [
+            f"{self.rng.choice(WORDS)}-{i}"
+            for i in range(TAG_COUNT - len(POPULAR_TAGS))
+        ]
+        self.tag_weights = zipf_cum_weights(len(self.tags), TAG_EXPONENT)
+
+        # A few users own most of the snippets
+        self.user_ids = [self.uuid() for _ in range(users)]
+        self.user_weights = zipf_cum_weights(users, 0.8)
+        self.command_counts = [0] * users
+
+        # Contents are slices of one large text, hashing and encoding dominate anyway
+        self.corpus = "\n".join(
+            " ".join(self.rng.choices(WORDS, k=self.rng.randint(2, 12)))
+            for _ in range(20_000)
+        )
+
+        # Rendering a million descriptions would take longer than loading them
+        self.descriptions = []
+        for _ in range(200):
+            description = (
+                f"Runs **{self.rng.choice(WORDS)}** with `{self.rng.choice(WORDS)}`\n\n"
+                + " ".join(self.rng.choices(WORDS, k=self.rng.randint(5, 60)))
+            )
+            self.descriptions.append((description, render_markdown(description)))
+
+        # Ids of the public snippets, the targets of forks and favorites
+        self.public_ids: list[uuid.UUID] = []
+
+    def uuid(self) -> uuid.UUID:
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def date(self, after: datetime = EPOCH - timedelta(days=730)) -> datetime:
+        return after + timedelta(
+            seconds=self.rng.randrange(int((EPOCH - after).total_seconds()) + 1)
+        )
+
+    def users_rows(self, password_hash: str):
+        users, providers, api_keys = [], [], []
+        for index, user_id in enumerate(self.user_ids):
+            email = f"user{index}@{EMAIL_DOMAIN}"
+            registered_at = self.date()
+            users.append(
+                (user_id, email, password_hash, f"Seed User {index}", registered_at)
+            )
+            providers.append(
+                (self.uuid(), LOCAL_PROVIDER, email, registered_at, None, True, user_id)
+            )
+            key = base64.urlsafe_b64encode(self.rng.randbytes(32)).rstrip(b"=").decode()
+            api_keys.append(
+                (self.uuid(), key, "seed", registered_at, None, True, user_id)
+            )
+        return users, providers, api_keys
+
+    def content(self) -> str:
+        size = min(
+            CONTENT_SIZE_MAX,
+            int(
+                self.rng.lognormvariate(
+                    math.log(CONTENT_SIZE_MEDIAN), CONTENT_SIZE_SIGMA
+                )
+            ),
+        )
+        start = self.rng.randrange(len(self.corpus) - CONTENT_SIZE_MAX)
+        return self.corpus[start : start + max(size, 10)].strip()
+
+    def snippet_rows(self, count: int) -> tuple[list[tuple], list[tuple]]:
+        """Rows of `count` snippets and of their tags."""
+        rng = self.rng
+        snippets, snippet_tags = [], []
+        for _ in range(count):
+            snippet_id = self.uuid()
+            [user_index] = rng.choices(range(self.users), cum_weights=self.user_weights)
+            created_at = self.date()
+            updated_at = self.date(after=created_at)
+
+            content = self.content()
+            encoded = content.encode()
+            preview = (
+                content[:CONTENT_PREVIEW_LENGTH] + "..."
+                if len(content) > CONTENT_PREVIEW_LENGTH
+                else content
+            )
+
+            description, description_html = (
+                rng.choice(self.descriptions)
+                if rng.random() < DESCRIPTION_RATIO
+                else (None, None)
+            )
+
+            command_name = None
+            if rng.random() < COMMAND_RATIO:
+                command_name = f"cmd-{self.command_counts[user_index]}"
+                self.command_counts[user_index] += 1
+
+            forked_from_id = None
+            if self.public_ids and rng.random() < FORK_RATIO:
+                forked_from_id = rng.choice(self.public_ids)
+
+            public = rng.random() < PUBLIC_RATIO
+            if public:
+                self.public_ids.append(snippet_id)
+
+            snippets.append(
+                (
+                    snippet_id,
+                    created_at,
+                    updated_at,
+                    " ".join(rng.choices(WORDS, k=rng.randint(2, 8))).capitalize(),
+                    " ".join(rng.choices(WORDS, k=6)) if rng.random() < 0.5 else None,
+                    description,
+                    description_html,
+                    MARKDOWN_RENDERER_VERSION if description else None,
+                    content,
+                    len(encoded),
+                    content.count("\n") + 1,
+                    hashlib.sha256(encoded).hexdigest(),
+                    preview,
+                    rng.choices(self.languages, cum_weights=self.language_weights)[0],
+                    command_name,
+                    public,
+                    rng.random() < ARCHIVED_RATIO,
+                    self.user_ids[user_index],
+                    forked_from_id,
+                    forked_from_id is not None,
+                )
+            )
+
+            tags = rng.choices(
+                self.tags, cum_weights=self.tag_weights, k=rng.randint(0, 5)
+            )
+            for order, tag in enumerate(dict.fromkeys(tags)):
+                snippet_tags.append((snippet_id, tag, created_at, order))
+
+        return snippets, snippet_tags
+
+    def favorites_rows(self) -> Iterator[tuple]:
+        """Favorites of each user, the oldest public snippets are the most popular."""
+        if not self.public_ids:
+            return
+        for user_id in self.user_ids:
+            count = min(
+                len(self.public_ids),
+                int(self.rng.expovariate(1 / FAVORITES_PER_USER)),
+            )
+            indexes = {
+                int(len(self.public_ids) * self.rng.random() ** 3) for _ in range(count)
+            }
+            for index in sorted(indexes):
+                yield (self.public_ids[index], user_id)
+
+
+async def delete_seeded_users(conn):
+    seeded_users = sa.select(User.id).where(User.email.endswith(f"@{EMAIL_DOMAIN}"))
+    # Deleting the snippets first is faster than the cascades of each user
+    await conn.execute(sa.delete(Snippet).where(Snippet.user_id.in_(seeded_users)))
+    await conn.execute(sa.delete(User).where(User.id.in_(seeded_users)))
+
+
+async def seed(users: int, snippets: int, seed: int = 0, batch_size: int = 50_000):
+    """
+    Delete the previously seeded users, then create new ones and their snippets.
+
+    Args:
+        users: Number of users
+        snippets: Number of snippets, spread over the users
+        seed: Same seed, same rows
+        batch_size: Number of snippets generated and copied at once
+    """
+    start = time.perf_counter()
+    generator = Generator(users, seed)
+    password_hash = pwd_context.hash(SEED_PASSWORD)
+
+    async with async_engine.begin() as conn:
+        await delete_seeded_users(conn)
+        raw_connection = await conn.get_raw_connection()
+        driver = raw_connection.driver_connection
+
+        user_rows, provider_rows, api_key_rows = generator.users_rows(password_hash)
+        await driver.copy_records_to_table(
+            User.__tablename__,
+            records=user_rows,
+            columns=["id", "email", "password", "display_name", "registered_at"],
+        )
+        await driver.copy_records_to_table(
+            Provider.__tablename__,
+            records=provider_rows,
+            columns=[
+                "id",
+                "name",
+                "email",
+                "added_at",
+                "last_login_at",
+                "is_verified",
+                "user_id",
+            ],
+        )
+        await driver.copy_records_to_table(
+            APIKey.__tablename__,
+            records=api_key_rows,
+            columns=[
+                "id",
+                "key",
+                "name",
+                "created_at",
+                "last_used",
+                "is_active",
+                "user_id",
+            ],
+        )
+
+        existing_tags = set(
+            await driver.fetchval(f"SELECT array_agg(name) FROM {Tag.__tablename__}")
+            or []
+        )
+        await driver.copy_records_to_table(
+            Tag.__tablename__,
+            records=[(tag,) for tag in generator.tags if tag not in existing_tags],
+            columns=["name"],
+        )
+
+        created = 0
+        while created < snippets:
+            count = min(batch_size, snippets - created)
+            snippet_rows, snippet_tag_rows = generator.snippet_rows(count)
+            await driver.copy_records_to_table(
+                Snippet.__tablename__, records=snippet_rows, columns=SNIPPET_COLUMNS
+            )
+            await driver.copy_records_to_table(
+                SnippetTag.__tablename__,
+                records=snippet_tag_rows,
+                columns=["snippet_id", "tag_name", "created_at", "order"],
+            )
+            created += count
+            print(
+                f"{created:,}/{snippets:,} snippets, {time.perf_counter() - start:.0f}s",
+                file=sys.stderr,
+            )
+
+        await driver.copy_records_to_table(
+            favorites_table.name,
+            records=list(generator.favorites_rows()),
+            columns=["snippet_id", "user_id"],
+        )
+
+        # Fresh statistics so the query plans match the new data
+        for table in (User, Provider, APIKey, Tag, Snippet, SnippetTag):
+            await driver.execute(f'ANALYZE "{table.__tablename__}"')
+        await driver.execute(f'ANALYZE "{favorites_table.name}"')
+
+    print(
+        f"Seeded {users:,} users and {snippets:,} snippets in {time.perf_counter() - start:.0f}s,"
+        f" log in as user<N>@{EMAIL_DOMAIN} with {SEED_PASSWORD}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python -m app.commands.seed")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--snippets", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    args = parser.parse_args()
+    asyncio.run(seed(args.users, args.snippets, args.seed, args.batch_size))
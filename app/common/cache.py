@@ -0,0 +1,116 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+# Named caches, name -> cache, so their stats can be reported
+registered_caches: dict[str, "LRUCache"] = {}
+
+
+class LRUCache:
+    """
+    Thread-safe in-memory least recently used cache.
+
+    Args:
+        max_size: Maximum number of items to keep, the least recently used item is removed
+            when a new item is added to a full cache
+        max_memory: Maximum total size (in bytes) of the cached values, no limit when None
+        sizeof: Function that returns the size of a value in bytes, used with `max_memory`
+        name: Register the cache under this name, to report its stats
+    """
+
+    def __init__(
+        self,
+        max_size: int = 128,
+        max_memory: Optional[int] = None,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+        name: Optional[str] = None,
+    ):
+        self.max_size = max_size
+        self.max_memory = max_memory
+        self.sizeof = sizeof
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.memory = 0
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+        if name:
+            registered_caches[name] = self
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_size <= 0:
+            return
+
+        size = self.sizeof(value) if self.max_memory is not None else 0
+        if self.max_memory is not None and size > self.max_memory:
+            # Would evict everything else and still not fit
+            self.delete(key)
+            return
+
+        with self._lock:
+            self._remove(key)
+            self._data[key] = value
+            self._sizes[key] = size
+            self.memory += size
+            while len(self._data) > self.max_size or (
+                self.max_memory is not None and self.memory > self.max_memory
+            ):
+                self._remove(next(iter(self._data)))
+
+    def _remove(self, key: Hashable):
+        if key in self._data:
+            del self._data[key]
+            self.memory -= self._sizes.pop(key)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.memory = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "memory": self.memory if self.max_memory is not None else None,
+            "max_memory": self.max_memory,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+def get_cache_stats() -> dict[str, dict[str, Any]]:
+    """Stats of the registered caches, by name."""
+    return {name: cache.stats for name, cache in sorted(registered_caches.items())}
@@ -0,0 +1,305 @@
+import zlib
+from abc import ABC, abstractmethod
+from typing import Callable
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+# Media types that are already compressed, or too small to be worth it
+EXCLUDED_MEDIA_TYPES = (
+    "image/",
+    "audio/",
+    "video/",
+    "font/woff",
+    "font/woff2",
+    "application/gzip",
+    "application/zip",
+    "application/zstd",
+    "application/x-7z-compressed",
+    "application/x-brotli",
+    "application/octet-stream",
+    "application/pdf",
+    "text/event-stream",  # Each event must reach the client as soon as it is sent
+)
+# Compressible types in the excluded prefixes
+INCLUDED_MEDIA_TYPES = ("image/svg+xml", "image/x-icon", "image/vnd.microsoft.icon")
+# The server sends the file of these responses itself, it would not be compressed
+PATHSEND_EXTENSION = "http.response.pathsend"
+
+
+class Compressor(ABC):
+    """Streaming compressor, every chunk is flushed so it can be sent right away."""
+
+    @abstractmethod
+    def compress(self, data: bytes) -> bytes: ...
+
+    @abstractmethod
+    def finish(self) -> bytes: ...
+
+
+class GzipCompressor(Compressor):
+    def __init__(self, level: int):
+        # wbits=31 writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zlib.Z_SYNC_FLUSH
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdCompressor(Compressor):
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+def get_compressors(
+    gzip_level: int = 6, brotli_level: int = 4, zstd_level: int = 3
+) -> dict[str, Callable[[], Compressor]]:
+    """
+    Get the supported encodings, in order of preference.
+
+    Brotli and zstd are only supported when their packages are installed.
+    """
+    compressors = {}
+    if zstandard is not None:
+        compressors["zstd"] = lambda: ZstdCompressor(zstd_level)
+    if brotli is not None:
+        compressors["br"] = lambda: BrotliCompressor(brotli_level)
+    compressors["gzip"] = lambda: GzipCompressor(gzip_level)
+    return compressors
+
+
+def select_encoding(accept_encoding: str, supported: list[str]) -> str | None:
+    """
+    Pick the encoding to use from an `Accept-Encoding` header.
+
+    Args:
+        accept_encoding: The value of the header
+        supported: Supported encodings, in order of preference
+
+    Returns:
+        The encoding with the highest q-value, the first supported one on a tie.
+        None if no supported encoding is accepted.
+    """
+    weights = {}
+    for value in accept_encoding.lower().split(","):
+        encoding, _, params = value.strip().partition(";")
+        weight = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[encoding.strip()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in supported:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def is_compressible(content_type: str) -> bool:
+    media_type = content_type.split(";")[0].strip().lower()
+    if not media_type:
+        return False
+
+    if media_type in INCLUDED_MEDIA_TYPES:
+        return True
+
+    return not media_type.startswith(EXCLUDED_MEDIA_TYPES)
+
+
+class CompressionMiddleware:
+    """
+    Compresses the responses with zstd, brotli or gzip, as accepted by the client.
+
+    Responses smaller than `minimum_size`, already encoded, or of a media type that is
+    already compressed are sent as they are.
+    Streaming responses are compressed chunk by chunk, each chunk is flushed so the client
+    gets it right away.
+
+    Args:
+        app: The ASGI app
+        minimum_size: Responses smaller than this (in bytes) are not compressed
+        gzip_level: 1 (fastest) to 9 (smallest)
+        brotli_level: 0 (fastest) to 11 (smallest)
+        zstd_level: 1 (fastest) to 22 (smallest)
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 500,
+        gzip_level: int = 6,
+        brotli_level: int = 4,
+        zstd_level: int = 3,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressors = get_compressors(gzip_level, brotli_level, zstd_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), list(self.compressors)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        extensions = scope.get("extensions") or {}
+        if PATHSEND_EXTENSION in extensions:
+            # The files are sent as body messages instead, as Starlette's GZipMiddleware
+            extensions = {
+                k: v for k, v in extensions.items() if k != PATHSEND_EXTENSION
+            }
+            scope = {**scope, "extensions": extensions}
+
+        responder = _CompressionResponder(
+            send, encoding, self.compressors[encoding], self.minimum_size
+        )
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    def __init__(
+        self,
+        send: Send,
+        encoding: str,
+        compressor_factory: Callable[[], Compressor],
+        minimum_size: int,
+    ):
+        self._send = send
+        self.encoding = encoding
+        self.compressor_factory = compressor_factory
+        self.minimum_size = minimum_size
+
+        self.start_message: Message | None = None
+        self.compressor: Compressor | None = None
+        # Body chunks held until it is known if the response is large enough to compress
+        self.buffer: list[bytes] = []
+        self.buffer_size = 0
+        self.passthrough = False
+
+    async def send(self, message: Message):
+        if self.passthrough:
+            await self._send(message)
+            return
+
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            if (
+                message["status"] in (204, 304)
+                or "content-encoding" in headers
+                or "no-transform" in headers.get("cache-control", "")
+                or not is_compressible(headers.get("content-type", ""))
+            ):
+                self.passthrough = True
+                await self._send(message)
+                return
+
+            self.start_message = message
+            return
+
+        if message["type"] != "http.response.body":
+            if self.compressor is None and self.start_message is not None:
+                # Not a body the middleware can compress, the held start message is sent
+                # first and the response is sent as is
+                self.passthrough = True
+                await self._send(self.start_message)
+                if self.buffer_size:
+                    body = b"".join(self.buffer)
+                    await self._send(
+                        {"type": "http.response.body", "body": body, "more_body": True}
+                    )
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.compressor is not None:
+            # Already streaming
+            data = self.compressor.compress(body) if body else b""
+            if not more_body:
+                data += self.compressor.finish()
+            await self._send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+            return
+
+        self.buffer.append(body)
+        self.buffer_size += len(body)
+        if more_body and self.buffer_size < self.minimum_size:
+            return
+
+        body = b"".join(self.buffer)
+        self.buffer = []
+        headers = MutableHeaders(raw=self.start_message["headers"])
+        headers.add_vary_header("Accept-Encoding")
+
+        if not more_body and len(body) < self.minimum_size:
+            # Too small to be worth it
+            await self._send(self.start_message)
+            await self._send({"type": "http.response.body", "body": body})
+            self.passthrough = True
+            return
+
+        self.compressor = self.compressor_factory()
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.finish()
+            headers["Content-Length"] = str(len(data))
+        elif "content-length" in headers:
+            del headers["Content-Length"]
+
+        headers["Content-Encoding"] = self.encoding
+        # The compressed body is not byte for byte the same, so the ETag can only be weak
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+        await self._send(self.start_message)
+        await self._send(
+            {"type": "http.response.body", "body": data, "more_body": more_body}
+        )
@@ -0,0 +1,442 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.cache import get_cache_stats
+from app.common.db import async_engine
+from app.common.slow_queries import slow_query_log
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# (seconds) Request and query durations
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Number of queries of a request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Label of the requests that don't match any route, keeps the number of series bounded
+UNMATCHED_ROUTE = "<unmatched>"
+# Label of the statements that don't run in a request
+BACKGROUND_ROUTE = "<background>"
+
+# The database events of `sync_await` run in other threads (e.g. the command name check
+#   of the snippets), so the metrics and the request stats are updated under a lock.
+#   `sync_await` runs its coroutines in a copy of the caller's context, their statements
+#   are counted in the request that awaits them
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    labels = ",".join(
+        f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)
+    )
+    return f"{{{labels}}}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        # Metrics without labels are reported from the start, not after their first update
+        self.values: dict[tuple, float] = {} if labels else {(): 0}
+        self._lock = threading.Lock()
+
+    def samples(self) -> Iterable[tuple[str, str, float]]:
+        """Name, formatted labels and value of each sample."""
+        with self._lock:
+            values = list(self.values.items())
+        for labels, value in values:
+            yield self.name, _format_labels(self.labels, labels), value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1):
+        values = self.values
+        with self._lock:
+            values[labels] = values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    Args:
+        collect: Called when the metrics are rendered, returns the values by labels.
+            Used for the values that are already tracked somewhere else
+    """
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        collect: Optional[Callable[[], dict[tuple, float]]] = None,
+    ):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def set(self, value: float, *labels: str):
+        with self._lock:
+            self.values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        values = self.values
+        with self._lock:
+            values[labels] = values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def samples(self):
+        if self.collect:
+            values = self.collect()
+        else:
+            with self._lock:
+                values = dict(self.values)
+        for labels, value in values.items():
+            yield self.name, _format_labels(self.labels, labels), value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count of each bucket..., count above the last bucket, sum]
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            data = self.values.get(labels)
+            if data is None:
+                data = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            data[bucket] += 1
+            data[-1] += value
+
+    def samples(self):
+        label_names = (*self.labels, "le")
+        with self._lock:
+            values = [(labels, list(data)) for labels, data in self.values.items()]
+        for labels, data in values:
+            count = 0
+            for le, bucket_count in zip((*self.buckets, float("inf")), data):
+                count += bucket_count
+                yield (
+                    f"{self.name}_bucket",
+                    _format_labels(label_names, (*labels, _format_value(le))),
+                    count,
+                )
+            formatted = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum", formatted, data[-1]
+            yield f"{self.name}_count", formatted, count
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        collect: Optional[Callable[[], dict[tuple, float]]] = None,
+    ) -> Gauge:
+        return self.register(Gauge(name, help, labels, collect))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _collect_cache_stats(key: str) -> Callable[[], dict[tuple, float]]:
+    def collect():
+        return {
+            (name,): stats[key]
+            for name, stats in get_cache_stats().items()
+            if stats[key] is not None
+        }
+
+    return collect
+
+
+def _collect_pool_size() -> dict[tuple, float]:
+    pool = async_engine.sync_engine.pool
+    # Not available on `NullPool`, connections are opened for each session
+    if not hasattr(pool, "size"):
+        return {}
+    return {(): pool.size()}
+
+
+def _collect_slow_query_counts() -> dict[tuple, float]:
+    return {(query.fingerprint,): query.count for query in slow_query_log.all()}
+
+
+def _collect_slow_query_durations() -> dict[tuple, float]:
+    values = {}
+    for query in slow_query_log.all():
+        for name, duration in query.percentiles().items():
+            values[(query.fingerprint, name)] = duration
+    return values
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Requests by route and status", ("method", "route", "status")
+)
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Request duration by route", ("method", "route")
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress", "Requests being processed"
+)
+http_request_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed by request",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+)
+http_request_query_duration = registry.histogram(
+    "http_request_db_duration_seconds",
+    "Time spent in SQL statements by request",
+    ("route",),
+)
+db_queries = registry.counter("db_queries_total", "SQL statements executed")
+db_query_duration = registry.counter(
+    "db_query_duration_seconds_total", "Time spent in SQL statements"
+)
+db_connections_opened = registry.counter(
+    "db_connections_opened_total", "Database connections opened"
+)
+db_connections_checked_out = registry.gauge(
+    "db_pool_checked_out", "Database connections in use"
+)
+db_pool_size = registry.gauge(
+    "db_pool_size", "Database connections kept in the pool", collect=_collect_pool_size
+)
+db_slow_queries = registry.gauge(
+    "db_slow_queries",
+    "Statements slower than SLOW_QUERY_THRESHOLD_MS, by fingerprint (see the admin page)",
+    ("fingerprint",),
+    collect=_collect_slow_query_counts,
+)
+db_slow_query_duration = registry.gauge(
+    "db_slow_query_duration_seconds",
+    "Percentiles of the slow statements duration, by fingerprint",
+    ("fingerprint", "percentile"),
+    collect=_collect_slow_query_durations,
+)
+emails_pending = registry.gauge("emails_pending", "Emails waiting to be sent")
+cache_hits = registry.gauge(
+    "cache_hits", "Cache hits", ("cache",), collect=_collect_cache_stats("hits")
+)
+cache_misses = registry.gauge(
+    "cache_misses", "Cache misses", ("cache",), collect=_collect_cache_stats("misses")
+)
+cache_hit_ratio = registry.gauge(
+    "cache_hit_ratio",
+    "Cache hits / lookups",
+    ("cache",),
+    collect=_collect_cache_stats("hit_ratio"),
+)
+cache_size = registry.gauge(
+    "cache_size", "Cached items", ("cache",), collect=_collect_cache_stats("size")
+)
+cache_memory = registry.gauge(
+    "cache_memory_bytes",
+    "Size of the cached values",
+    ("cache",),
+    collect=_collect_cache_stats("memory"),
+)
+
+
+class RequestStats:
+    __slots__ = ("scope", "queries", "query_duration", "_lock")
+
+    def __init__(self, scope: Optional[Scope] = None):
+        self.scope = scope
+        self.queries = 0
+        self.query_duration = 0.0
+        self._lock = threading.Lock()
+
+    def add_query(self, duration: float):
+        with self._lock:
+            self.queries += 1
+            self.query_duration += duration
+
+    @property
+    def route(self) -> str:
+        """Route of the request, once the router matched it."""
+        route = self.scope.get("route") if self.scope else None
+        return route.path if route is not None else UNMATCHED_ROUTE
+
+
+# Stats of the request being processed, the database events add to it
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries.inc()
+    db_query_duration.inc(amount=duration)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.add_query(duration)
+
+    threshold = slow_query_log.threshold
+    if threshold is not None and duration >= threshold:
+        slow_query_log.record(
+            statement,
+            parameters,
+            duration,
+            stats.route if stats is not None else BACKGROUND_ROUTE,
+            executemany,
+        )
+
+
+@event.listens_for(async_engine.sync_engine, "connect")
+def _connect(dbapi_connection, connection_record):
+    db_connections_opened.inc()
+
+
+@event.listens_for(async_engine.sync_engine, "checkout")
+def _checkout(dbapi_connection, connection_record, connection_proxy):
+    db_connections_checked_out.inc()
+
+
+@event.listens_for(async_engine.sync_engine, "checkin")
+def _checkin(dbapi_connection, connection_record):
+    db_connections_checked_out.dec()
+
+
+def route_label(app: ASGIApp, scope: Scope) -> str:
+    """
+    Path template of the route of a request, e.g. `/snippets/{id}`.
+
+    Args:
+        app: The application, its routes are matched when the request didn't reach
+            a FastAPI route (mounts, responses sent by a middleware)
+        scope: The scope of the request, before it was handled
+    """
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Records the duration, status and SQL statements of each request."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        # The router and the mounts change the scope, and set the matched route
+        method, path = scope["method"], scope["path"]
+        root_path = scope.get("root_path", "")
+
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        http_requests_in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_progress.dec()
+            request_stats.reset(token)
+
+            route = scope.get("route")
+            if route is not None:
+                route = route.path
+            else:
+                route = route_label(
+                    scope.get("app"),
+                    {
+                        "type": "http",
+                        "path": path,
+                        "root_path": root_path,
+                        "method": method,
+                    },
+                )
+            http_requests.inc(method, route, str(status_code))
+            http_request_duration.observe(duration, method, route)
+            http_request_queries.observe(stats.queries, route)
+            http_request_query_duration.observe(stats.query_duration, route)
@@ -0,0 +1,178 @@
+import cProfile
+import io
+import marshal
+import pstats
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from loguru import logger
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import settings
+
+# Add this header, or query param, to a request to profile it
+PROFILE_HEADER = b"x-profile"
+PROFILE_QUERY_PARAM = b"_profile"
+
+# Number of functions shown in the call tree of a profile
+CALL_TREE_LINES = 80
+
+
+class RequestProfile:
+    def __init__(
+        self,
+        id: str,
+        method: str,
+        path: str,
+        user_email: str,
+        status: int,
+        duration: float,
+        profiler: cProfile.Profile,
+    ):
+        self.id = id
+        self.created_at = datetime.now(timezone.utc)
+        self.method = method
+        self.path = path
+        self.user_email = user_email
+        self.status = status
+        self.duration = duration
+
+        stats = pstats.Stats(profiler)
+        # Same format as `cProfile.Profile.dump_stats`, can be opened with
+        #   `python -m pstats`, snakeviz or any other pstats viewer
+        self.data = marshal.dumps(stats.stats)
+        self.function_count = len(stats.stats)
+
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(CALL_TREE_LINES)
+        stats.print_callees(CALL_TREE_LINES)
+        self.call_tree = stream.getvalue()
+
+
+class ProfileStore:
+    """Last profiles of this worker, the oldest ones are dropped."""
+
+    def __init__(self, max_size: int):
+        self._profiles: deque[RequestProfile] = deque(maxlen=max_size)
+
+    def add(self, profile: RequestProfile):
+        self._profiles.appendleft(profile)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def all(self) -> list[RequestProfile]:
+        return list(self._profiles)
+
+
+profiles = ProfileStore(settings.PROFILER_MAX_PROFILES)
+
+
+def is_profile_requested(scope: Scope) -> bool:
+    query_string = scope["query_string"]
+    # Only parsed when the name is in it, most requests don't have it
+    if PROFILE_QUERY_PARAM in query_string and any(
+        name == PROFILE_QUERY_PARAM
+        for name, _ in parse_qsl(query_string, keep_blank_values=True)
+    ):
+        return True
+    for name, _ in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return True
+    return False
+
+
+class ProfilerMiddleware:
+    """
+    Profiles the requests of admins that have an `X-Profile` header or a `_profile`
+    query param, with cProfile.
+
+    The profiles are kept in `profiles` and shown on the admin page, the response has
+    the id of the profile in the `X-Profile-Id` header.
+    Requests without the header or param are not profiled and the user is not loaded.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore = profiles):
+        self.app = app
+        self.store = store
+        # Only one profiler can be active at a time
+        self._profiling = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or self._profiling
+            or not is_profile_requested(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        user = await self._get_user(scope)
+        if user is None or not user.is_admin:
+            await self.app(scope, receive, send)
+            return
+
+        await self._profile(scope, receive, send, user.email)
+
+    async def _get_user(self, scope: Scope):
+        # Imported here to avoid a circular import with the admin views
+        from app.auth.utils import _get_user_from_session_token
+
+        session_token = HTTPConnection(scope).cookies.get(settings.COOKIE_NAME)
+        try:
+            return await _get_user_from_session_token(session_token, optional=True)
+        except Exception:
+            return None
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send, email: str):
+        profile_id = uuid.uuid4().hex[:12]
+        status_code = 500
+        profiler = cProfile.Profile()
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = {
+                    **message,
+                    "headers": [
+                        *message["headers"],
+                        (b"x-profile-id", profile_id.encode()),
+                    ],
+                }
+            await send(message)
+
+        self._profiling = True
+        start = time.perf_counter()
+        # Every coroutine that runs while the request is waiting is part of the profile
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - start
+            self._profiling = False
+
+            try:
+                self.store.add(
+                    RequestProfile(
+                        profile_id,
+                        scope["method"],
+                        scope["path"],
+                        email,
+                        status_code,
+                        duration,
+                        profiler,
+                    )
+                )
+            except Exception:
+                logger.exception("Failed to store the request profile")
@@ -0,0 +1,410 @@
+import asyncio
+import base64
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+import orjson
+from loguru import logger
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.cache import LRUCache
+from app.settings import settings
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover
+    redis = None
+
+# Pages that are the same for every anonymous visitor
+#   (path regex, allowed values of the `tab` query param or None if the page has no tabs)
+CACHEABLE_PAGES = (
+    (re.compile(r"^/$"), None),
+    (re.compile(r"^/snippets/(partials/list)?$"), ("", "explore")),
+    (re.compile(r"^/snippets/(?!create$)[^/]+$"), None),
+    (re.compile(r"^/snippets/[^/]+/partials/detail$"), None),
+)
+
+# Response headers that are not stored, they are set again on each response
+EXCLUDED_HEADERS = (b"content-length", b"date", b"server")
+
+
+class CachedResponse:
+    def __init__(
+        self,
+        status: int,
+        headers: list[tuple[bytes, bytes]],
+        body: bytes,
+        stored_at: float,
+        generation: int,
+    ):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+        # Cache generation when the response was rendered, see `ResponseCacheBackend.get`
+        self.generation = generation
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def to_json(self) -> bytes:
+        return orjson.dumps(
+            {
+                "status": self.status,
+                "headers": [
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in self.headers
+                ],
+                "body": base64.b64encode(self.body).decode(),
+                "stored_at": self.stored_at,
+                "generation": self.generation,
+            }
+        )
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "CachedResponse":
+        data = orjson.loads(data)
+        return cls(
+            status=data["status"],
+            headers=[
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in data["headers"]
+            ],
+            body=base64.b64decode(data["body"]),
+            stored_at=data["stored_at"],
+            generation=data["generation"],
+        )
+
+
+class ResponseCacheBackend(ABC):
+    """
+    Storage of the cached responses.
+
+    Each invalidation starts a new generation, responses of an older generation are not used.
+    Since the generation is read before the page is rendered, a page rendered during an
+    invalidation is never used after it.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> tuple[CachedResponse | None, int]:
+        """
+        Returns:
+            The response stored for the key if it is of the current generation,
+            and the current generation
+        """
+
+    @abstractmethod
+    async def set(self, key: str, response: CachedResponse, expire: int): ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    def invalidate(self): ...
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """
+    Responses kept in the memory of the worker.
+    Invalidations only apply to the worker they are made in, other workers use the
+    `RESPONSE_CACHE_TTL`.
+    """
+
+    def __init__(self, max_memory: int):
+        self.generation = 0
+        self.cache = LRUCache(
+            max_size=10_000,
+            max_memory=max_memory,
+            sizeof=lambda response: len(response.body),
+            name="responses",
+        )
+
+    async def get(self, key: str) -> tuple[CachedResponse | None, int]:
+        response = self.cache.get(key)
+        if response is not None and response.generation != self.generation:
+            response = None
+        return response, self.generation
+
+    async def set(self, key: str, response: CachedResponse, expire: int):
+        self.cache.set(key, response)
+
+    async def delete(self, key: str):
+        self.cache.delete(key)
+
+    def invalidate(self):
+        self.generation += 1
+        self.cache.clear()
+
+
+class RedisBackend(ResponseCacheBackend):
+    """Responses shared by all the workers, stored in redis."""
+
+    def __init__(self, url: str, prefix: str = "devscript:responses"):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.generation_key = f"{prefix}:generation"
+        self._tasks: set[asyncio.Task] = set()
+
+    async def get(self, key: str) -> tuple[CachedResponse | None, int]:
+        generation, data = await self.client.mget(
+            self.generation_key, f"{self.prefix}:{key}"
+        )
+        generation = int(generation or 0)
+        if data is None:
+            return None, generation
+
+        response = CachedResponse.from_json(data)
+        if response.generation != generation:
+            return None, generation
+        return response, generation
+
+    async def set(self, key: str, response: CachedResponse, expire: int):
+        await self.client.set(f"{self.prefix}:{key}", response.to_json(), ex=expire)
+
+    async def delete(self, key: str):
+        await self.client.delete(f"{self.prefix}:{key}")
+
+    def invalidate(self):
+        # Called from the sync database events, the new generation is set in the background
+        task = asyncio.get_running_loop().create_task(
+            self.client.incr(self.generation_key)
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+
+class ResponseCache:
+    """
+    Cache of the pages rendered for anonymous visitors.
+
+    Args:
+        backend: Where the responses are stored
+        ttl: Seconds a response is used as is
+        stale_ttl: Seconds a response is still used after its ttl, while it is rendered
+            again in the background
+    """
+
+    def __init__(self, backend: ResponseCacheBackend, ttl: int, stale_ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+
+    def invalidate(self):
+        """Stop using the cached responses, called when a public snippet changes."""
+        try:
+            self.backend.invalidate()
+        except Exception:
+            logger.exception("Failed to invalidate the response cache")
+
+
+def get_backend() -> ResponseCacheBackend:
+    if settings.RESPONSE_CACHE_REDIS_URL:
+        if redis is not None:
+            return RedisBackend(settings.RESPONSE_CACHE_REDIS_URL)
+        logger.warning(
+            "RESPONSE_CACHE_REDIS_URL is set but the `redis` package is not installed, "
+            "the responses are cached in memory"
+        )
+    return MemoryBackend(settings.RESPONSE_CACHE_MAX_MEMORY)
+
+
+response_cache = ResponseCache(
+    get_backend(),
+    ttl=settings.RESPONSE_CACHE_TTL,
+    stale_ttl=settings.RESPONSE_CACHE_STALE_TTL,
+)
+
+
+def cache_key(scope: Scope) -> Optional[str]:
+    """
+    Key of a request when its response can be shared by all anonymous visitors.
+
+    Returns:
+        The normalized url of the request, or None if the response can't be cached
+    """
+    if scope["type"] != "http" or scope["method"] != "GET":
+        return None
+
+    headers = Headers(scope=scope)
+    if "authorization" in headers or "x-api-key" in headers:
+        return None
+    if f"{settings.COOKIE_NAME}=" in headers.get("cookie", ""):
+        return None
+    # Flash messages are shown once, to a single visitor
+    if scope.get("session", {}).get("_messages"):
+        return None
+
+    path = scope["path"]
+    for path_re, tabs in CACHEABLE_PAGES:
+        if path_re.match(path):
+            break
+    else:
+        return None
+
+    # Same params in another order, or empty params, render the same page
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(scope["query_string"].decode("latin-1"))
+        if value
+    )
+    if tabs is not None and dict(params).get("tab", "") not in tabs:
+        return None
+
+    host = headers.get("host", "")
+    return f"{scope['scheme']}://{host}{scope.get('root_path', '')}{path}?{urlencode(params)}"
+
+
+def is_cacheable(status: int, headers: list[tuple[bytes, bytes]]) -> bool:
+    if status != 200:
+        return False
+
+    for name, value in headers:
+        if name == b"set-cookie":
+            return False
+        if name == b"cache-control" and (b"no-store" in value or b"private" in value):
+            return False
+    return True
+
+
+class ResponseCacheMiddleware:
+    """
+    Serves the pages of anonymous visitors from `ResponseCache`.
+
+    Responses older than the ttl are still served until they are `stale_ttl` seconds
+    older, while the page is rendered again in the background.
+    The `X-Cache` response header is `HIT`, `STALE` or `MISS`.
+    """
+
+    def __init__(self, app: ASGIApp, cache: ResponseCache = response_cache):
+        self.app = app
+        self.cache = cache
+        self._revalidating: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        key = cache_key(scope)
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            cached, generation = await self.cache.backend.get(key)
+        except Exception:
+            logger.exception("Failed to read the response cache")
+            await self.app(scope, receive, send)
+            return
+
+        if cached is not None:
+            age = cached.age()
+            if age < self.cache.ttl:
+                await self._send_cached(cached, b"HIT", send)
+                return
+            if age < self.cache.ttl + self.cache.stale_ttl:
+                self._revalidate(key, scope, generation)
+                await self._send_cached(cached, b"STALE", send)
+                return
+
+        response = await self._render(scope, receive, send, generation)
+        if response is not None:
+            await self._store(key, response)
+
+    async def _send_cached(self, cached: CachedResponse, status: bytes, send: Send):
+        headers = [
+            *cached.headers,
+            (b"content-length", str(len(cached.body)).encode()),
+            (b"x-cache", status),
+        ]
+        await send(
+            {"type": "http.response.start", "status": cached.status, "headers": headers}
+        )
+        await send({"type": "http.response.body", "body": cached.body})
+
+    async def _render(
+        self, scope: Scope, receive: Receive, send: Send | None, generation: int
+    ) -> CachedResponse | None:
+        """
+        Render the page, sending it to the client when `send` is given.
+
+        Returns:
+            The response to store, or None if it can't be cached
+        """
+        start_message: Message | None = None
+        body = []
+
+        async def capture(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+                if send is not None:
+                    message = {
+                        **message,
+                        "headers": [*message["headers"], (b"x-cache", b"MISS")],
+                    }
+            elif message["type"] == "http.response.body":
+                body.append(message.get("body", b""))
+
+            if send is not None:
+                await send(message)
+
+        await self.app(scope, receive, capture)
+
+        if start_message is None or not is_cacheable(
+            start_message["status"], start_message["headers"]
+        ):
+            return None
+
+        return CachedResponse(
+            status=start_message["status"],
+            headers=[
+                (name, value)
+                for name, value in start_message["headers"]
+                if name.lower() not in EXCLUDED_HEADERS
+            ],
+            body=b"".join(body),
+            stored_at=time.time(),
+            generation=generation,
+        )
+
+    async def _store(self, key: str, response: CachedResponse):
+        try:
+            await self.cache.backend.set(
+                key, response, self.cache.ttl + self.cache.stale_ttl
+            )
+        except Exception:
+            logger.exception("Failed to store the response in the cache")
+
+    def _revalidate(self, key: str, scope: Scope, generation: int):
+        if key in self._revalidating:
+            return
+
+        self._revalidating.add(key)
+        task = asyncio.create_task(self._revalidate_task(key, dict(scope), generation))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _revalidate_task(self, key: str, scope: Scope, generation: int):
+        request_sent = False
+
+        async def receive() -> Message:
+            nonlocal request_sent
+            if request_sent:
+                return {"type": "http.disconnect"}
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        try:
+            response = await self._render(scope, receive, None, generation)
+            if response is not None:
+                await self._store(key, response)
+            else:
+                # The page changed for everybody (snippet deleted or made private) or
+                # failed, the old response is not served until the stale ttl
+                await self.cache.backend.delete(key)
+        except Exception:
+            logger.exception(f"Failed to revalidate the cached response of {key}")
+        finally:
+            self._revalidating.discard(key)
@@ -0,0 +1,230 @@
+import asyncio
+import hashlib
+import re
+import threading
+from collections import Counter, deque
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+import orjson
+from loguru import logger
+
+from app.common.db import async_engine
+from app.settings import settings
+
+# Statements that can be explained without running them
+EXPLAINABLE_RE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+# With their cast, `$1::UUID`
+_PARAM_RE = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?")
+# `IN ($1, $2, $3)` has one parameter for each value of the list
+_PARAM_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Durations kept by fingerprint to compute the percentiles
+DURATION_SAMPLES = 500
+# Routes and parameter shapes kept by fingerprint
+MAX_ROUTES = 10
+MAX_PARAMETER_SHAPES = 10
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Replace the values and parameters of a statement with `?`, so the statements that
+    only differ by their values have the same text.
+    """
+    sql = _STRING_RE.sub("?", statement)
+    sql = _PARAM_RE.sub("?", sql)
+    sql = _NUMBER_RE.sub("?", sql)
+    sql = _PARAM_LIST_RE.sub("IN (?, ...)", sql)
+    return _WHITESPACE_RE.sub(" ", sql).strip()
+
+
+def fingerprint(normalized_sql: str) -> str:
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def _value_shape(value: Any) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """Types of the bound parameters, without their values, e.g. `(UUID, str, list[3])`."""
+    if executemany and parameters:
+        return f"{parameter_shape(parameters[0])} x {len(parameters)}"
+    if isinstance(parameters, dict):
+        return (
+            "{"
+            + ", ".join(f"{key}: {_value_shape(v)}" for key, v in parameters.items())
+            + "}"
+        )
+    if isinstance(parameters, (list, tuple)):
+        return "(" + ", ".join(_value_shape(value) for value in parameters) + ")"
+    return _value_shape(parameters)
+
+
+def _percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+class SlowQuery:
+    """Slow executions of the statements with the same fingerprint."""
+
+    def __init__(self, fingerprint: str, sql: str):
+        self.fingerprint = fingerprint
+        self.sql = sql
+        self.count = 0
+        self.total_duration = 0.0
+        self.max_duration = 0.0
+        self.durations: deque[float] = deque(maxlen=DURATION_SAMPLES)
+        self.routes: Counter[str] = Counter()
+        self.parameter_shapes: Counter[str] = Counter()
+        self.first_seen = datetime.now(timezone.utc)
+        self.last_seen = self.first_seen
+        # EXPLAIN (FORMAT JSON) of the first slow execution
+        self.plan: Optional[Any] = None
+        self.plan_error: Optional[str] = None
+
+    def add(self, duration: float, route: str, shape: str):
+        self.count += 1
+        self.total_duration += duration
+        self.max_duration = max(self.max_duration, duration)
+        self.durations.append(duration)
+        self.last_seen = datetime.now(timezone.utc)
+        if route in self.routes or len(self.routes) < MAX_ROUTES:
+            self.routes[route] += 1
+        if (
+            shape in self.parameter_shapes
+            or len(self.parameter_shapes) < MAX_PARAMETER_SHAPES
+        ):
+            self.parameter_shapes[shape] += 1
+
+    def percentiles(self) -> dict[str, float]:
+        durations = sorted(self.durations)
+        return {
+            "p50": _percentile(durations, 50),
+            "p95": _percentile(durations, 95),
+            "p99": _percentile(durations, 99),
+        }
+
+    @property
+    def plan_json(self) -> str:
+        return orjson.dumps(self.plan, option=orjson.OPT_INDENT_2).decode()
+
+
+class SlowQueryLog:
+    """
+    Statements slower than `threshold`, aggregated by fingerprint.
+
+    The plan of each fingerprint is captured once, in the background, by running
+    `EXPLAIN (ANALYZE off, FORMAT JSON)` with the parameters of its first slow execution.
+
+    Args:
+        threshold: (seconds) Slower statements are recorded, nothing is recorded when None
+        max_queries: Number of fingerprints kept, the least frequent one is dropped
+        explain: Capture the plans
+    """
+
+    def __init__(
+        self, threshold: Optional[float], max_queries: int = 200, explain: bool = True
+    ):
+        self.threshold = threshold
+        self.max_queries = max_queries
+        self.explain = explain
+        self.queries: dict[str, SlowQuery] = {}
+        # The database events of `sync_await` run in other threads
+        self._lock = threading.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    def record(
+        self,
+        statement: str,
+        parameters: Any,
+        duration: float,
+        route: str,
+        executemany: bool = False,
+    ):
+        if (
+            self.threshold is None
+            or duration < self.threshold
+            or statement.lstrip()[:7].upper() == "EXPLAIN"
+        ):
+            return
+
+        sql = normalize_sql(statement)
+        key = fingerprint(sql)
+        with self._lock:
+            query = self.queries.get(key)
+            is_new = query is None
+            if is_new:
+                if len(self.queries) >= self.max_queries:
+                    least_frequent = min(self.queries.values(), key=lambda q: q.count)
+                    del self.queries[least_frequent.fingerprint]
+                query = self.queries[key] = SlowQuery(key, sql)
+            query.add(duration, route, parameter_shape(parameters, executemany))
+
+        # Without args, loguru does not format the message, which can contain braces
+        logger.bind(fingerprint=key).warning(
+            f"Slow query ({duration * 1000:.0f}ms) on {route}: {sql[:200]}"
+        )
+
+        if (
+            is_new
+            and self.explain
+            and not executemany
+            and EXPLAINABLE_RE.match(statement)
+        ):
+            self._explain_later(query, statement, parameters)
+
+    def _explain_later(self, query: SlowQuery, statement: str, parameters: Any):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        task = loop.create_task(self._explain(query, statement, parameters))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, query: SlowQuery, statement: str, parameters: Any):
+        try:
+            async with async_engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE off, FORMAT JSON) {statement}", parameters
+                )
+                plan = result.scalar()
+            query.plan = orjson.loads(plan) if isinstance(plan, (str, bytes)) else plan
+        except Exception as exc:
+            query.plan_error = str(exc)
+            logger.warning(
+                f"Failed to explain the slow query {query.fingerprint}: {exc}"
+            )
+
+    def get(self, key: str) -> Optional[SlowQuery]:
+        return self.queries.get(key)
+
+    def all(self) -> list[SlowQuery]:
+        """Slow queries, the ones that took the most time first."""
+        with self._lock:
+            queries = list(self.queries.values())
+        return sorted(queries, key=lambda q: q.total_duration, reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self.queries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    threshold=settings.SLOW_QUERY_THRESHOLD_MS / 1000
+    if settings.SLOW_QUERY_THRESHOLD_MS
+    else None,
+    max_queries=settings.SLOW_QUERY_MAX_QUERIES,
+    explain=settings.SLOW_QUERY_EXPLAIN,
+)
@@ -0,0 +1,237 @@
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from app.settings import settings
+
+STATIC_DIR = Path(__file__).parent.parent / "static"
+
+# Files in these directories may already have the hash of their content in the name
+FINGERPRINTED_DIRS = ("vendor/",)
+
+# Precompressed files (`<file>.br`, `<file>.gz`) in order of preference
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+_fingerprint_re = re.compile(
+    r"^(?P<stem>.+)\.(?P<hash>[0-9a-f]{12})(?P<ext>\.[^./]+)?$"
+)
+
+
+def is_fingerprinted(path: str) -> bool:
+    """If the hash of the content is in the file name, e.g. the vendor bundles."""
+    return (
+        path.startswith(FINGERPRINTED_DIRS) and _fingerprint_re.match(path) is not None
+    )
+
+
+def fingerprint_path(path: str, content_hash: str) -> str:
+    """Add the content hash to a file name, `scripts/app.js` -> `scripts/app.<hash>.js`"""
+    directory, _, name = path.rpartition("/")
+    stem, dot, ext = name.rpartition(".")
+    name = f"{stem}.{content_hash}.{ext}" if dot and stem else f"{name}.{content_hash}"
+    return f"{directory}/{name}" if directory else name
+
+
+class StaticManifest:
+    """
+    Maps each static file to a url that has the hash of its content in the name.
+
+    The urls change whenever the content of a file changes, so they can be cached forever by
+    the browser. Built on startup, outside of prod the files are checked for changes on use.
+    """
+
+    def __init__(self, directory: Path = STATIC_DIR):
+        self.directory = Path(directory)
+        # path -> (mtime_ns, size, fingerprinted path)
+        self._files: dict[str, tuple[int, int, str]] = {}
+        # fingerprinted path -> path
+        self._originals: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._built = False
+
+    def build(self):
+        with self._lock:
+            self._files.clear()
+            self._originals.clear()
+            for root, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if filename.endswith((".br", ".gz")):
+                        continue
+                    full_path = Path(root) / filename
+                    self._add(full_path.relative_to(self.directory).as_posix())
+            self._built = True
+
+    def _add(self, path: str) -> str | None:
+        full_path = self.directory / path
+        try:
+            stat_result = full_path.stat()
+        except FileNotFoundError:
+            return None
+
+        if is_fingerprinted(path):
+            hashed_path = path
+        else:
+            content_hash = hashlib.sha256(full_path.read_bytes()).hexdigest()[:12]
+            hashed_path = fingerprint_path(path, content_hash)
+
+        previous = self._files.get(path)
+        if previous:
+            self._originals.pop(previous[2], None)
+        self._files[path] = (stat_result.st_mtime_ns, stat_result.st_size, hashed_path)
+        self._originals[hashed_path] = path
+        return hashed_path
+
+    def _is_stale(self, path: str, entry: tuple[int, int, str]) -> bool:
+        try:
+            stat_result = (self.directory / path).stat()
+        except FileNotFoundError:
+            return True
+        return (stat_result.st_mtime_ns, stat_result.st_size) != entry[:2]
+
+    def url_path(self, path: str) -> str:
+        """
+        Get the fingerprinted path of a static file.
+
+        Args:
+            path: Path of the file relative to the static directory
+
+        Returns:
+            The fingerprinted path, or the path as is if the file does not exist
+        """
+        if not self._built:
+            self.build()
+
+        path = path.lstrip("/")
+        entry = self._files.get(path)
+        if entry is None or (not settings.is_prod and self._is_stale(path, entry)):
+            with self._lock:
+                return self._add(path) or path
+
+        return entry[2]
+
+    def resolve(self, path: str) -> tuple[str, bool]:
+        """
+        Get the file served by a url path.
+
+        Args:
+            path: The requested path, relative to the static directory
+
+        Returns:
+            The path of the file to serve and if the url is the current fingerprint of the file
+        """
+        if not self._built:
+            self.build()
+
+        if path in self._originals:
+            return self._originals[path], True
+
+        if is_fingerprinted(path):
+            return path, True
+
+        # A fingerprint from before the file changed, serve the current file but don't cache it
+        match = _fingerprint_re.match(path)
+        if match and f"{match['stem']}{match['ext'] or ''}" in self._files:
+            return f"{match['stem']}{match['ext'] or ''}", False
+
+        return path, False
+
+    def import_map(self, static_root: str) -> dict:
+        """
+        Import map that points the js module imports to the fingerprinted files.
+
+        Args:
+            static_root: The url of the static directory, ending with a `/`
+        """
+        return {
+            "imports": {
+                static_root + path: static_root + self.url_path(path)
+                for path in list(self._files)
+                if path.endswith(".js") and not is_fingerprinted(path)
+            }
+        }
+
+
+static_manifest = StaticManifest()
+
+
+def _accepted_encodings(headers: Headers) -> set[str]:
+    encodings = set()
+    for value in headers.get("accept-encoding", "").split(","):
+        encoding, _, params = value.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        encodings.add(encoding.strip().lower())
+    return encodings
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    Serves the static files with the fingerprinted urls from `static_manifest`.
+
+    Fingerprinted urls are cached forever, other urls are revalidated on every use.
+    When a precompressed `.br` or `.gz` copy of a file exists, it is sent to the clients
+    that accept it.
+    """
+
+    def __init__(self, *args, manifest: StaticManifest = static_manifest, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.manifest = manifest
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        path, is_fingerprinted = self.manifest.resolve(Path(path).as_posix())
+        scope["static_fingerprinted"] = is_fingerprinted
+        return await super().get_response(path, scope)
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        headers = {
+            "Cache-Control": IMMUTABLE_CACHE_CONTROL
+            if scope.get("static_fingerprinted")
+            else REVALIDATE_CACHE_CONTROL,
+            "Vary": "Accept-Encoding",
+        }
+
+        media_type, _ = mimetypes.guess_type(str(full_path))
+        accepted = _accepted_encodings(request_headers)
+        for encoding, extension in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(f"{full_path}{extension}")
+            except FileNotFoundError:
+                continue
+            # Ignore copies that are older than the file
+            if compressed_stat.st_mtime < stat_result.st_mtime:
+                continue
+
+            full_path, stat_result = f"{full_path}{extension}", compressed_stat
+            headers["Content-Encoding"] = encoding
+            break
+
+        response = FileResponse(
+            full_path,
+            status_code=status_code,
+            stat_result=stat_result,
+            media_type=media_type,
+            headers=headers,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
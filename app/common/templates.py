@@ -1,13 +1,22 @@
-import time
 from typing import Any, Dict
 
 from fastapi import Request
 from fastapi.templating import Jinja2Templates
-from jinja2 import pass_context
+from jinja2 import (
+    Environment,
+    FileSystemBytecodeCache,
+    FileSystemLoader,
+    Template,
+    pass_context,
+)
+from loguru import logger
 
 from app.auth.utils import AUTH_COOKIE, optional_current_user
-from app.common import utils
-from app.common.constants import SUPPORTED_LANG_FILENAMES, SUPPORTED_LANGUAGES
+from app.common import urls, utils
+from app.common.constants import SUPPORTED_LANGUAGES
+from app.common.static import static_manifest
+from app.common.timing import timed
+from app.common.vendor import get_language_bundles, get_vendor_path
 from app.settings import settings
 
 
@@ -42,7 +51,6 @@ def app_context(request: Request) -> Dict[str, Any]:
         "active_route_name": active_route,
         "supported_languages": {
             "options": SUPPORTED_LANGUAGES,
-            "filenames": SUPPORTED_LANG_FILENAMES,
         },
         "selected_code_themes": {
             "light": selected_code_theme_light,
@@ -51,9 +59,71 @@ def app_context(request: Request) -> Dict[str, Any]:
     }
 
 
-templates = Jinja2Templates(
-    directory="app", context_processors=[app_context], auto_reload=True
-)
+TEMPLATES_DIR = "app"
+
+
+class TimedTemplate(Template):
+    """Adds the render time to the `render` phase of the `Server-Timing` header."""
+
+    def render(self, *args: Any, **kwargs: Any) -> str:
+        with timed("render"):
+            return super().render(*args, **kwargs)
+
+
+def create_environment(bytecode_cache: bool = True) -> Environment:
+    """
+    Create the jinja environment used to render the pages.
+
+    Templates are only checked for changes in dev, in the other environments they are
+    compiled once per worker and never read from disk again.
+
+    Args:
+        bytecode_cache: Store the compiled templates on disk, so the other workers and the
+            next restarts can load them instead of compiling the templates again
+    """
+    env = Environment(
+        loader=FileSystemLoader(TEMPLATES_DIR),
+        autoescape=True,
+        auto_reload=settings.ENV == "dev",
+        bytecode_cache=FileSystemBytecodeCache(settings.TEMPLATE_BYTECODE_CACHE_DIR)
+        if bytecode_cache
+        else None,
+        # Keep every template compiled, the default of 400 could evict some of them
+        cache_size=-1,
+    )
+    env.template_class = TimedTemplate
+    return env
+
+
+def template_names(env: Environment) -> list[str]:
+    """Names of the page templates, the ones in a `templates` directory of an app."""
+    return env.list_templates(
+        filter_func=lambda name: "/templates/" in f"/{name}" and name.endswith(".html")
+    )
+
+
+def precompile_templates(env: Environment | None = None) -> int:
+    """
+    Compile every template, so no request pays for the compilation.
+
+    Args:
+        env: The environment to compile the templates into, defaults to the one used by the views
+
+    Returns:
+        The number of compiled templates
+    """
+    env = env or templates.env
+    names = template_names(env)
+    for name in names:
+        try:
+            env.get_template(name)
+        except Exception:
+            logger.exception(f"Failed to compile template: {name}")
+
+    return len(names)
+
+
+templates = Jinja2Templates(env=create_environment(), context_processors=[app_context])
 
 
 def jinja_global_function(func):
@@ -61,23 +131,65 @@ def jinja_global_function(func):
     return func
 
 
+@jinja_global_function
+@pass_context
+def url_for(context: dict, name: str, /, **path_params) -> str:
+    # Replaces the starlette `url_for`, builds the same urls from a precomputed route table
+    return urls.url_for(context["request"], name, **path_params)
+
+
 @jinja_global_function
 @pass_context
 def static_url(context: dict, path: str) -> str:
-    params = {"v": settings.VERSION}
+    # The url has the hash of the file content, so it can be cached forever
+    return urls.url_for(
+        context["request"], "static", path=static_manifest.url_path(path)
+    )
 
-    if not settings.is_prod:
-        params["t"] = str(time.time())
 
-    return (
-        context["request"].url_for("static", path=path).include_query_params(**params)
+@jinja_global_function
+@pass_context
+def static_import_map(context: dict) -> dict:
+    """
+    Import map so the js modules imported by `app.js` also use their fingerprinted urls.
+    """
+    return static_manifest.import_map(
+        urls.url_for(context["request"], "static", path="/")
     )
 
 
+@jinja_global_function
+@pass_context
+def vendor_url(context: dict, name: str) -> str:
+    # Vendor files have the hash of their content in the name, no need to add a version
+    return urls.url_for(context["request"], "static", path=get_vendor_path(name))
+
+
+@jinja_global_function
+@pass_context
+def vendor_config(context: dict) -> dict:
+    """
+    Urls of the vendor bundles that are loaded on demand by the js.
+    """
+    static_root = urls.url_for(context["request"], "static", path="/")
+    return {
+        "languages": {
+            name: static_root + path for name, path in get_language_bundles().items()
+        },
+        "allLanguages": static_root + get_vendor_path("hljs/languages.js"),
+        "markdownEditor": {
+            "js": static_root + get_vendor_path("markdown-editor.js"),
+            "css": static_root + get_vendor_path("markdown-editor.css"),
+        },
+        "customElements": static_root + get_vendor_path("custom-elements.js"),
+        "highlightedCode": static_root + get_vendor_path("highlighted-code.js"),
+    }
+
+
 @jinja_global_function
 @pass_context
 def snippet_view_url(context: dict, snippet_id) -> str:
-    return context["request"].url_for("snippet.view", id=snippet_id)
+    return urls.url_for(context["request"], "snippet.view", id=snippet_id)
 
 
 @jinja_global_function
@@ -116,7 +228,7 @@ def snippets_index_url(
     elif curr_query:
         params["q"] = curr_query
 
-    return request.url_for("snippets.index").include_query_params(**params)
+    return urls.url_for(request, "snippets.index", query_params=params)
 
 
 @jinja_global_function
@@ -132,3 +244,20 @@ def snippet_language_display(context: dict, language: str) -> str:
         return language
 
     return SUPPORTED_LANGUAGES[language].value[0]
+
+
+@jinja_global_function
+def highlight_snippet(snippet, preview: bool = False):
+    # Imported here to avoid a circular import with the snippets views
+    from app.snippets.highlighting import get_highlighted_snippet
+
+    return get_highlighted_snippet(snippet, preview=preview)
+
+
+@jinja_global_function
+@pass_context
+def snippet_card(context: dict, snippet):
+    # Imported here to avoid a circular import with the snippets views
+    from app.snippets.fragments import render_snippet_card
+
+    return render_snippet_card(context, snippet)
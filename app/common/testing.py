@@ -0,0 +1,78 @@
+"""
+Helpers for the tests that run against the database.
+"""
+
+import asyncio
+import os
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.common.db import async_engine
+
+
+class QueryCounter:
+    """
+    Records the SQL statements sent by an engine while it is entered.
+
+    Counts every statement of the engine whatever the session, task or thread that sends it,
+    so only one request should run at a time. The `EXPLAIN` of the slow query log is ignored.
+    """
+
+    def __init__(self, engine: Engine = async_engine.sync_engine):
+        self.engine = engine
+        self.statements: list[str] = []
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        if not statement.lstrip().upper().startswith("EXPLAIN"):
+            self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __enter__(self) -> "QueryCounter":
+        self.statements = []
+        event.listen(self.engine, "after_cursor_execute", self._after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def report(self) -> str:
+        return "\n".join(
+            f"{index}. {' '.join(statement.split())}"
+            for index, statement in enumerate(self.statements, 1)
+        )
+
+
+def database_available(timeout: float = 2) -> bool:
+    """Whether the configured database accepts connections, to skip the tests that need it."""
+
+    async def connect():
+        async with async_engine.connect():
+            pass
+
+    try:
+        asyncio.run(asyncio.wait_for(connect(), timeout))
+    except (OSError, SQLAlchemyError, asyncio.TimeoutError):
+        return False
+    return True
+
+
+def require_database():
+    """
+    Skip the test when the database is not available.
+
+    With `TESTS_REQUIRE_DATABASE=1` (the CI) the test fails instead, so the database tests
+    can't be skipped without anyone noticing.
+    """
+    if database_available():
+        return
+    if os.environ.get("TESTS_REQUIRE_DATABASE") == "1":
+        pytest.fail("The database is not available and TESTS_REQUIRE_DATABASE=1")
+    pytest.skip("The database is not available")
@@ -0,0 +1,43 @@
+from app.common.cache import LRUCache, get_cache_stats
+
+
+def test_least_recently_used_item_is_evicted():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert cache.get("b") is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 1
+
+
+def test_memory_limit():
+    cache = LRUCache(max_size=100, max_memory=10, sizeof=len)
+    cache.set("a", "aaaa")
+    cache.set("b", "bbbb")
+    cache.set("c", "cccc")
+
+    assert "a" not in cache
+    assert cache.memory == 8
+
+    # Replacing a value updates the memory used
+    cache.set("c", "c")
+    assert cache.memory == 5
+
+    # Values larger than the limit are not cached
+    cache.set("d", "d" * 11)
+    assert "d" not in cache
+    assert len(cache) == 2
+
+
+def test_named_caches_are_registered():
+    cache = LRUCache(name="test_cache")
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    assert get_cache_stats()["test_cache"]["hit_ratio"] == 0.5
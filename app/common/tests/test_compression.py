@@ -0,0 +1,128 @@
+import asyncio
+import gzip
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.common.compression import CompressionMiddleware, select_encoding
+
+BODY = "<div>devscript</div>\n" * 200
+
+
+async def _stream():
+    for _ in range(10):
+        yield BODY
+
+
+async def _receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _discard(message):
+    pass
+
+
+app = Starlette(
+    routes=[
+        Route("/large", lambda request: PlainTextResponse(BODY)),
+        Route("/small", lambda request: PlainTextResponse("ok")),
+        Route(
+            "/image",
+            lambda request: Response(BODY.encode(), media_type="image/png"),
+        ),
+        Route(
+            "/stream",
+            lambda request: StreamingResponse(_stream(), media_type="text/html"),
+        ),
+    ]
+)
+app.add_middleware(CompressionMiddleware, minimum_size=500)
+client = TestClient(app)
+
+
+def test_select_encoding():
+    supported = ["zstd", "br", "gzip"]
+    assert select_encoding("gzip, deflate, br", supported) == "br"
+    assert select_encoding("gzip;q=1.0, br;q=0.5", supported) == "gzip"
+    assert select_encoding("br;q=0, gzip", supported) == "gzip"
+    assert select_encoding("identity", supported) is None
+    assert select_encoding("*", supported) == "zstd"
+
+
+def test_compresses_large_responses():
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+    response = client.get("/large", headers={"Accept-Encoding": "br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == BODY
+
+
+def test_skips_small_and_compressed_responses():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get("/image", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_compresses_streaming_responses():
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as r:
+        assert r.headers["content-encoding"] == "gzip"
+        assert "content-length" not in r.headers
+        assert gzip.decompress(b"".join(r.iter_raw())) == (BODY * 10).encode()
+
+
+def test_pathsend_is_not_offered_to_the_app():
+    extensions = []
+
+    async def inner(scope, receive, send):
+        extensions.append(scope["extensions"])
+        await PlainTextResponse("ok")(scope, receive, send)
+
+    middleware = CompressionMiddleware(inner)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"accept-encoding", b"gzip")],
+        "extensions": {"http.response.pathsend": {}, "http.response.trailers": {}},
+    }
+    asyncio.run(middleware(scope, _receive, _discard))
+
+    assert extensions == [{"http.response.trailers": {}}]
+
+
+def test_held_start_message_is_sent_before_other_messages():
+    messages = []
+
+    async def inner(scope, receive, send):
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [(b"content-type", b"text/plain")],
+            }
+        )
+        await send({"type": "http.response.pathsend", "path": "/tmp/file.txt"})
+
+    async def send(message):
+        messages.append(message)
+
+    middleware = CompressionMiddleware(inner)
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "headers": [(b"accept-encoding", b"gzip")],
+    }
+    asyncio.run(middleware(scope, _receive, send))
+
+    assert [message["type"] for message in messages] == [
+        "http.response.start",
+        "http.response.pathsend",
+    ]
+    assert (b"content-encoding", b"gzip") not in messages[0]["headers"]
@@ -0,0 +1,52 @@
+import io
+import logging
+
+import orjson
+from loguru import logger
+
+from app.logger import AccessLogSampler, BackgroundSink, format_json
+
+
+def _access_record(status_code: int) -> logging.LogRecord:
+    return logging.LogRecord(
+        "uvicorn.access",
+        logging.INFO,
+        __file__,
+        1,
+        '%s - "%s %s HTTP/%s" %d',
+        ("127.0.0.1:52000", "GET", "/snippets/", "1.1", status_code),
+        None,
+    )
+
+
+def test_access_log_sampler_keeps_errors():
+    sampler = AccessLogSampler(0)
+
+    assert not sampler.filter(_access_record(200))
+    assert sampler.filter(_access_record(404))
+    assert sampler.filter(_access_record(500))
+    assert AccessLogSampler(1).filter(_access_record(200))
+
+
+def test_json_logs_in_background():
+    stream = io.StringIO()
+    sink = BackgroundSink(stream)
+    handler_id = logger.add(sink, format=format_json, colorize=False)
+    try:
+        logger.bind(snippet_id=1).info("Snippet {created}")
+        try:
+            1 / 0
+        except ZeroDivisionError:
+            logger.exception("Failed")
+    finally:
+        # Waits for the queued logs
+        logger.remove(handler_id)
+
+    assert not sink.thread.is_alive()
+    info, error = [orjson.loads(line) for line in stream.getvalue().splitlines()]
+    assert info["message"] == "Snippet {created}"
+    assert info["level"] == "INFO"
+    assert info["function"] == "test_json_logs_in_background"
+    assert info["extra"] == {"snippet_id": 1}
+    assert error["level"] == "ERROR"
+    assert "ZeroDivisionError" in error["exception"]
@@ -0,0 +1,133 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from app.app import app
+from app.common.metrics import (
+    MetricsMiddleware,
+    Registry,
+    RequestStats,
+    _after_cursor_execute,
+    _before_cursor_execute,
+    db_queries,
+    http_request_duration,
+    http_requests,
+    request_stats,
+)
+from app.common.utils import sync_await
+from app.settings import settings
+
+
+def test_render():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    duration = registry.histogram(
+        "duration_seconds", "Duration", ("route",), buckets=(0.1, 1)
+    )
+    registry.gauge("items", "Items", collect=lambda: {(): 3})
+
+    requests.inc('/a"b')
+    requests.inc('/a"b')
+    for value in (0.05, 0.1, 0.5, 2):
+        duration.observe(value, "/")
+
+    assert registry.render().splitlines() == [
+        "# HELP requests_total Requests",
+        "# TYPE requests_total counter",
+        'requests_total{route="/a\\"b"} 2',
+        "# HELP duration_seconds Duration",
+        "# TYPE duration_seconds histogram",
+        'duration_seconds_bucket{route="/",le="0.1"} 2',
+        'duration_seconds_bucket{route="/",le="1"} 3',
+        'duration_seconds_bucket{route="/",le="+Inf"} 4',
+        'duration_seconds_sum{route="/"} 2.65',
+        'duration_seconds_count{route="/"} 4',
+        "# HELP items Items",
+        "# TYPE items gauge",
+        "items 3",
+    ]
+
+
+def test_middleware_labels_requests_by_route():
+    app = Starlette(
+        routes=[
+            Route("/metrics-test/{id}", lambda request: PlainTextResponse("ok")),
+            Mount(
+                "/metrics-mount",
+                routes=[Route("/{name}", lambda request: PlainTextResponse("ok"))],
+            ),
+        ]
+    )
+    app.add_middleware(MetricsMiddleware)
+    client = TestClient(app)
+
+    client.get("/metrics-test/1")
+    client.get("/metrics-test/2")
+    client.get("/metrics-mount/a")
+    client.get("/missing")
+
+    assert http_requests.values[("GET", "/metrics-test/{id}", "200")] == 2
+    assert http_requests.values[("GET", "/metrics-mount", "200")] == 1
+    assert http_requests.values[("GET", "<unmatched>", "404")] >= 1
+    assert http_request_duration.values[("GET", "/metrics-test/{id}")][-1] > 0
+
+
+def test_updates_from_other_threads():
+    registry = Registry()
+    counter = registry.counter("updates_total", "Updates")
+    histogram = registry.histogram("values", "Values", buckets=(1,))
+
+    def update():
+        for _ in range(10_000):
+            counter.inc()
+            histogram.observe(0.5)
+
+    threads = [threading.Thread(target=update) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert counter.values[()] == 40_000
+    assert histogram.values[()][0] == 40_000
+
+
+def test_statements_of_sync_await_are_counted_in_the_request():
+    conn = SimpleNamespace(info={})
+
+    async def execute():
+        _before_cursor_execute(conn, None, "SELECT 1", {}, None, False)
+        _after_cursor_execute(conn, None, "SELECT 1", {}, None, False)
+        return threading.current_thread()
+
+    async def main():
+        stats = RequestStats()
+        request_stats.set(stats)
+        with sync_await() as await_:
+            thread = await_(execute())
+        return stats, thread
+
+    queries = db_queries.values[()]
+    stats, thread = asyncio.run(main())
+
+    assert thread is not threading.current_thread()
+    assert stats.queries == 1
+    assert db_queries.values[()] == queries + 1
+
+
+def test_metrics_endpoint(monkeypatch):
+    client = TestClient(app)
+    monkeypatch.setattr(settings, "METRICS_ENABLED", False)
+    assert client.get("/metrics").status_code == 404
+
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "token")
+    assert client.get("/metrics").status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer token"})
+    assert response.status_code == 200
+    assert "# TYPE http_requests_total counter" in response.text
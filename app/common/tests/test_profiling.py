@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.common.profiling import ProfilerMiddleware, ProfileStore, is_profile_requested
+
+
+async def _page(request):
+    return PlainTextResponse("ok")
+
+
+def _client(mocker, is_admin=True):
+    store = ProfileStore(max_size=2)
+    get_user = mocker.patch.object(
+        ProfilerMiddleware,
+        "_get_user",
+        return_value=SimpleNamespace(is_admin=is_admin, email="admin@example.com"),
+    )
+    app = Starlette(routes=[Route("/snippets/", _page)])
+    app.add_middleware(ProfilerMiddleware, store=store)
+    return TestClient(app), store, get_user
+
+
+def test_admin_request_is_profiled(mocker):
+    client, store, _ = _client(mocker)
+
+    response = client.get("/snippets/", headers={"X-Profile": "1"})
+    profile = store.get(response.headers["x-profile-id"])
+    assert profile.path == "/snippets/"
+    assert profile.status == 200
+    assert "_page" in profile.call_tree
+
+    client.get("/snippets/?_profile=1")
+    client.get("/snippets/?_profile=1")
+    assert len(store.all()) == 2
+    assert store.get(profile.id) is None
+
+
+def test_other_requests_are_not_profiled(mocker):
+    client, store, get_user = _client(mocker, is_admin=False)
+
+    response = client.get("/snippets/")
+    assert "x-profile-id" not in response.headers
+    # The user is only loaded when a profile is requested
+    get_user.assert_not_called()
+
+    response = client.get("/snippets/", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in response.headers
+    assert store.all() == []
+
+
+def test_profile_param_is_matched_by_name():
+    def requested(query_string: bytes) -> bool:
+        return is_profile_requested({"query_string": query_string, "headers": []})
+
+    assert requested(b"_profile=1")
+    assert requested(b"q=docker&_profile")
+    assert not requested(b"q=user_profile")
+    assert not requested(b"q=_profile")
+    assert not requested(b"my_profile=1")
+    assert not requested(b"")
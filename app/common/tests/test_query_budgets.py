@@ -0,0 +1,185 @@
+"""
+Number of SQL statements of each route, the tests fail when a change needs more.
+
+A budget only goes up on purpose, when the new statements are worth it. The budgets are the
+counts measured against PostgreSQL 16, when a change sends fewer statements lower its budget.
+
+Needs the database, the tests are skipped when it is not available, or fail with
+`TESTS_REQUIRE_DATABASE=1`.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import create_engine, delete, insert, text
+from starlette.testclient import TestClient
+
+from app.app import app
+from app.auth.constants import LOCAL_PROVIDER
+from app.auth.models import APIKey, Provider, User
+from app.auth.serializers import TokenDataSerializer
+from app.auth.utils import create_token
+from app.common.db import async_session_maker
+from app.common.testing import QueryCounter, require_database
+from app.settings import settings
+from app.snippets.models import Snippet, favorites
+
+# Authentication of a page is 4 statements, the provider and the user with their relations.
+# It is done by the route, then again for the template context.
+AUTH = 4
+PAGE_AUTH = 2 * AUTH
+# Looking up the API key, updating its last use, and the user
+API_KEY_AUTH = 3
+# A snippet or page of snippets, then their user, tags and favorites
+SNIPPETS = 4
+
+# name, method, url, logged in, statements
+BUDGETS = [
+    ("index.mine", "GET", "/snippets/?tab=mine", True, PAGE_AUTH + 1 + SNIPPETS),
+    ("index.favorites", "GET", "/snippets/?tab=favorites", True, PAGE_AUTH + 1 + SNIPPETS),
+    ("index.explore", "GET", "/snippets/?tab=explore", True, PAGE_AUTH + 1 + SNIPPETS),
+    ("index.explore.anonymous", "GET", "/snippets/?tab=explore", False, 1 + SNIPPETS),
+    ("index.partials.list", "GET", "/snippets/partials/list?tab=mine", True, PAGE_AUTH + 1 + SNIPPETS),
+    ("snippet.view", "GET", "/snippets/{snippet}", True, PAGE_AUTH + SNIPPETS),
+    ("snippet.view.anonymous", "GET", "/snippets/{public}", False, SNIPPETS),
+    ("snippet.partials.detail", "GET", "/snippets/{snippet}/partials/detail", True, PAGE_AUTH + SNIPPETS),
+    ("snippet.edit", "GET", "/snippets/{snippet}/edit", True, PAGE_AUTH + SNIPPETS),
+    ("snippet.fork", "GET", "/snippets/{public}/fork", True, PAGE_AUTH + SNIPPETS),
+    # The snippet, the user with their favorites, and the insert or delete
+    ("snippet.toggle_favorite", "POST", "/snippets/{public}/toggle-favorite", True, AUTH + 4),
+    ("api.command", "GET", "/api/snippets/command/{command}", False, API_KEY_AUTH + 2),
+    ("api.command.head", "HEAD", "/api/snippets/command/{command}", False, API_KEY_AUTH + 1),
+    ("api.commands.manifest", "GET", "/api/snippets/commands", False, API_KEY_AUTH + 1),
+    # The count, the page with its users and tags, and which ones are favorites
+    ("api.v1.snippets.list", "GET", "/api/v1/snippets?scope=mine", False, API_KEY_AUTH + 5),
+    # The users, and the invitations when the registration is disabled
+    ("auth.admin", "GET", "/admin", True, PAGE_AUTH + 1 + settings.DISABLE_REGISTRATION),
+]  # fmt: skip
+
+
+async def _create_data() -> dict:
+    suffix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        users = []
+        for name in ("owner", "other"):
+            email = f"budget-{name}-{suffix}@example.com"
+            user = User(email=email, display_name=name, is_admin=name == "owner")
+            session.add(user)
+            session.add(
+                Provider(name=LOCAL_PROVIDER, email=email, is_verified=True, user=user)
+            )
+            users.append(user)
+        owner, other = users
+        api_key = APIKey(key=f"budget-{suffix}", name="budget", user=owner)
+        session.add(api_key)
+        await session.flush()
+
+        public = Snippet(
+            title="Public",
+            content="echo public",
+            language="BASH",
+            public=True,
+            user_id=other.id,
+        )
+        public.tag_associations = await public.bulk_add_tags(session, ["budget"])
+        session.add(public)
+        await session.flush()
+
+        snippets = [
+            Snippet(
+                title="Command",
+                content="echo command",
+                language="BASH",
+                command_name=f"budget-{suffix}",
+                public=True,
+                user_id=owner.id,
+            ),
+            Snippet(
+                title="Fork",
+                content="echo public",
+                language="BASH",
+                user_id=owner.id,
+                forked_from_id=public.id,
+                is_fork=True,
+            ),
+            Snippet(
+                title="Private",
+                content="echo private",
+                language="BASH",
+                user_id=owner.id,
+            ),
+        ]
+        for snippet in snippets:
+            snippet.tag_associations = await snippet.bulk_add_tags(
+                session, ["budget", "query"]
+            )
+            session.add(snippet)
+        await session.commit()
+
+        await session.execute(
+            insert(favorites).values(snippet_id=public.id, user_id=owner.id)
+        )
+        await session.commit()
+
+        token = await create_token(
+            TokenDataSerializer(
+                user_id=owner.id,
+                email=owner.email,
+                provider_name=LOCAL_PROVIDER,
+                token_type="access",
+            )
+        )
+        return {
+            "user_ids": [owner.id, other.id],
+            "token": token,
+            "api_key": api_key.key,
+            "snippet": snippets[0].id,
+            "public": public.id,
+            "command": snippets[0].command_name,
+        }
+
+
+async def _delete_data(user_ids: list[uuid.UUID]):
+    async with async_session_maker() as session:
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+
+@pytest.fixture(scope="module")
+def data():
+    require_database()
+    data = asyncio.run(_create_data())
+    yield data
+    asyncio.run(_delete_data(data["user_ids"]))
+
+
+def test_query_counter():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn, QueryCounter(engine) as counter:
+        conn.execute(text("SELECT 1"))
+        conn.execute(text("EXPLAIN SELECT 1"))
+        conn.execute(text("SELECT 2"))
+
+    assert counter.count == 2
+    assert counter.report() == "1. SELECT 1\n2. SELECT 2"
+
+
+@pytest.mark.parametrize(
+    "method, url, logged_in, budget",
+    [budget[1:] for budget in BUDGETS],
+    ids=[budget[0] for budget in BUDGETS],
+)
+def test_query_budget(data, method, url, logged_in, budget):
+    client = TestClient(app, follow_redirects=False)
+    headers = {"X-API-Key": data["api_key"]}
+    if logged_in:
+        client.cookies.set(settings.COOKIE_NAME, data["token"])
+
+    with QueryCounter() as counter:
+        response = client.request(method, url.format(**data), headers=headers)
+
+    assert response.status_code == 200
+    assert (
+        counter.count <= budget
+    ), f"{counter.count} statements over the budget of {budget}:\n{counter.report()}"
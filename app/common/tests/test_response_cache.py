@@ -0,0 +1,104 @@
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import HTMLResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.common.response_cache import (
+    MemoryBackend,
+    ResponseCache,
+    ResponseCacheMiddleware,
+)
+from app.settings import settings
+
+
+def _client(ttl=60, stale_ttl=0, gone=()):
+    """`gone` are the paths of the pages that are not found anymore."""
+    renders = []
+
+    async def page(request):
+        renders.append(request.url)
+        if request.url.path in gone:
+            return HTMLResponse("<p>not found</p>", status_code=404)
+        return HTMLResponse(f"<p>render {len(renders)}</p>")
+
+    cache = ResponseCache(MemoryBackend(1024 * 1024), ttl=ttl, stale_ttl=stale_ttl)
+    app = Starlette(
+        routes=[
+            Route("/snippets/", page),
+            Route("/snippets/{id}", page),
+            Route("/auth/login", page),
+        ]
+    )
+    app.add_middleware(ResponseCacheMiddleware, cache=cache)
+    return TestClient(app), cache, renders
+
+
+def test_anonymous_pages_are_cached():
+    client, cache, renders = _client()
+
+    response = client.get("/snippets/?tab=explore&q=")
+    assert response.headers["x-cache"] == "MISS"
+
+    # Same page, the params are normalized
+    response = client.get("/snippets/?q=&tab=explore")
+    assert response.headers["x-cache"] == "HIT"
+    assert response.text == "<p>render 1</p>"
+    assert len(renders) == 1
+
+    cache.invalidate()
+    response = client.get("/snippets/?tab=explore")
+    assert response.headers["x-cache"] == "MISS"
+    assert response.text == "<p>render 2</p>"
+
+
+def test_personal_pages_are_not_cached():
+    client, _, renders = _client()
+
+    for _ in range(2):
+        client.get("/snippets/?tab=mine")
+        client.get("/auth/login")
+
+    client.cookies.set(settings.COOKIE_NAME, "token")
+    for _ in range(2):
+        client.get("/snippets/1")
+
+    assert len(renders) == 6
+
+
+def test_stale_response_is_revalidated():
+    client, _, renders = _client(ttl=0, stale_ttl=60)
+
+    with client:
+        client.get("/snippets/1")
+        response = client.get("/snippets/1")
+        assert response.headers["x-cache"] == "STALE"
+        assert response.text == "<p>render 1</p>"
+
+        # Rendered again in the background
+        for _ in range(50):
+            if len(renders) == 2:
+                break
+            time.sleep(0.01)
+        assert len(renders) == 2
+        assert client.get("/snippets/1").text == "<p>render 2</p>"
+
+
+def test_stale_response_is_deleted_when_the_page_is_gone():
+    gone = set()
+    client, cache, _ = _client(ttl=0, stale_ttl=60, gone=gone)
+
+    with client:
+        client.get("/snippets/1")
+        # The snippet is made private, the revalidation gets a 404
+        gone.add("/snippets/1")
+        assert client.get("/snippets/1").headers["x-cache"] == "STALE"
+        for _ in range(50):
+            if not len(cache.backend.cache):
+                break
+            time.sleep(0.01)
+
+        response = client.get("/snippets/1")
+        assert response.status_code == 404
+        assert response.headers["x-cache"] == "MISS"
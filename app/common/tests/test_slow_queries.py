@@ -0,0 +1,43 @@
+import uuid
+
+from app.common.slow_queries import SlowQueryLog, normalize_sql, parameter_shape
+
+
+def test_normalize_sql():
+    assert normalize_sql(
+        "SELECT id FROM snippets\n WHERE id IN ($1, $2::UUID, $3)"
+        " AND title ~* 'it''s' LIMIT 20"
+    ) == ("SELECT id FROM snippets WHERE id IN (?, ...) AND title ~* ? LIMIT ?")
+    assert normalize_sql("SELECT * FROM t WHERE id IN ($1)") == normalize_sql(
+        "SELECT * FROM t WHERE id IN ($1, $2, $3)"
+    )
+
+
+def test_parameter_shape():
+    assert parameter_shape((uuid.uuid4(), "a", [1, 2], None)) == (
+        "(UUID, str, list[2], NoneType)"
+    )
+    assert parameter_shape([(1, "a"), (2, "b")], executemany=True) == "(int, str) x 2"
+
+
+def test_slow_queries_are_aggregated():
+    log = SlowQueryLog(threshold=0.1, max_queries=2, explain=False)
+
+    log.record("SELECT * FROM t WHERE id = $1", (1,), 0.05, "/fast")
+    assert log.all() == []
+
+    for duration in (0.2, 0.3, 0.4):
+        log.record("SELECT * FROM t WHERE id = $1", (1,), duration, "/snippets/")
+    log.record("SELECT * FROM t WHERE id =  $2", ("a",), 1.0, "/snippets/{id}")
+
+    [query] = log.all()
+    assert query.count == 4
+    assert query.max_duration == 1.0
+    assert query.percentiles() == {"p50": 0.4, "p95": 1.0, "p99": 1.0}
+    assert query.routes == {"/snippets/": 3, "/snippets/{id}": 1}
+    assert query.parameter_shapes == {"(int)": 3, "(str)": 1}
+
+    # The least frequent statement is dropped
+    log.record("SELECT 1", (), 0.2, "/a")
+    log.record("SELECT 2", (), 0.2, "/b")
+    assert [q.sql for q in log.all()] == ["SELECT * FROM t WHERE id = ?", "SELECT ?"]
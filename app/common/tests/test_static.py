@@ -0,0 +1,81 @@
+import gzip
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.common.static import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    CachedStaticFiles,
+    StaticManifest,
+)
+
+
+def _client(tmp_path):
+    (tmp_path / "app.js").write_text("console.log('devscript');" * 100)
+    manifest = StaticManifest(tmp_path)
+    app = Starlette(
+        routes=[
+            Mount(
+                "/static",
+                CachedStaticFiles(directory=tmp_path, manifest=manifest),
+                name="static",
+            )
+        ]
+    )
+    return TestClient(app), manifest
+
+
+def test_fingerprinted_url_is_immutable(tmp_path):
+    client, manifest = _client(tmp_path)
+    url_path = manifest.url_path("/app.js")
+
+    assert url_path.startswith("app.") and url_path.endswith(".js")
+    assert url_path != "app.js"
+
+    response = client.get(f"/static/{url_path}")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    response = client.get("/static/app.js")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+
+def test_precompressed_file(tmp_path):
+    client, manifest = _client(tmp_path)
+    content = (tmp_path / "app.js").read_bytes()
+    (tmp_path / "app.js.gz").write_bytes(gzip.compress(content))
+
+    response = client.get(
+        f"/static/{manifest.url_path('app.js')}",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.content == content
+
+    response = client.get("/static/app.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+
+def test_only_hashed_vendor_files_are_immutable(tmp_path):
+    client, manifest = _client(tmp_path)
+    (tmp_path / "vendor").mkdir()
+    (tmp_path / "vendor" / "vendor.0123456789ab.js").write_text("vendor();")
+    (tmp_path / "vendor" / "vendor.js").write_text("vendor();")
+    (tmp_path / "vendor" / "manifest.json").write_text("{}")
+
+    assert manifest.url_path("vendor/vendor.0123456789ab.js") == (
+        "vendor/vendor.0123456789ab.js"
+    )
+    response = client.get("/static/vendor/vendor.0123456789ab.js")
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    # Without the hash in the name, the content can change under the same url
+    for path in ("vendor/vendor.js", "vendor/manifest.json"):
+        response = client.get(f"/static/{path}")
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+        assert manifest.url_path(path) != path
@@ -0,0 +1,176 @@
+import asyncio
+import contextlib
+
+import asyncpg
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
+
+from app.common.db import async_engine
+from app.common.timeouts import (
+    CLIENT_CLOSED_REQUEST,
+    StatementTimeoutMiddleware,
+    _do_connect,
+    request_scope,
+    statement_timeout,
+)
+from app.settings import settings
+
+
+def _scope(method: str, path: str, app: FastAPI | None = None) -> dict:
+    scope = {
+        "type": "http",
+        "method": method,
+        "scheme": "http",
+        "server": ("localhost", 8000),
+        "root_path": "",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "headers": [(b"host", b"localhost:8000")],
+    }
+    for route in app.routes if app is not None else ():
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            scope.update(child_scope)
+    return scope
+
+
+def _app(started: asyncio.Event, cancelled: asyncio.Event) -> FastAPI:
+    app = FastAPI()
+
+    async def slow():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return PlainTextResponse("done")
+
+    app.add_api_route("/slow", slow, methods=["GET", "POST"])
+    app.add_api_route("/snippets/", slow)
+    return app
+
+
+def test_statement_timeout_of_the_route(monkeypatch):
+    monkeypatch.setattr(settings, "STATEMENT_TIMEOUT_MS", 10_000)
+    monkeypatch.setattr(settings, "STATEMENT_TIMEOUTS_MS", {"/snippets/": 5_000})
+    app = _app(asyncio.Event(), asyncio.Event())
+
+    assert statement_timeout(_scope("GET", "/snippets/", app)) == 5_000
+    assert statement_timeout(_scope("GET", "/slow", app)) == 10_000
+
+
+class _Dialect:
+    """Records the parameters of the connections instead of connecting."""
+
+    def __init__(self):
+        self.connections = []
+
+    def connect(self, *cargs, **cparams):
+        self.connections.append(cparams)
+        return cparams
+
+
+def test_statement_timeout_of_the_connections(monkeypatch):
+    monkeypatch.setattr(settings, "STATEMENT_TIMEOUT_MS", 0)
+    monkeypatch.setattr(settings, "STATEMENT_TIMEOUTS_MS", {"/snippets/": 5_000})
+    app = _app(asyncio.Event(), asyncio.Event())
+    dialect = _Dialect()
+    # Shared by all the connections of the engine
+    cparams = {"user": "postgres", "server_settings": {"jit": "off"}}
+
+    def connect(scope=None):
+        token = request_scope.set(scope)
+        try:
+            return _do_connect(dialect, None, (), cparams)
+        finally:
+            request_scope.reset(token)
+
+    assert connect(_scope("GET", "/snippets/", app)) == {
+        "user": "postgres",
+        "server_settings": {"jit": "off", "statement_timeout": "5000"},
+    }
+    # Outside a request, and on a route without a timeout, the default connection
+    assert connect() is None
+    assert connect(_scope("GET", "/slow", app)) is None
+    assert cparams == {"user": "postgres", "server_settings": {"jit": "off"}}
+    assert len(dialect.connections) == 1
+
+
+def _request(method: str) -> tuple[list[dict], bool]:
+    """Messages sent for a request whose client leaves, and if the endpoint was cancelled."""
+
+    async def main():
+        started, cancelled = asyncio.Event(), asyncio.Event()
+        app = StatementTimeoutMiddleware(_app(started, cancelled))
+        messages = []
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await started.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+
+        task = asyncio.create_task(app(_scope(method, "/slow"), receive, send))
+        await started.wait()
+        await asyncio.sleep(0.05)
+        was_cancelled = cancelled.is_set()
+        task.cancel()
+        await asyncio.wait([task])
+        return messages, was_cancelled
+
+    return asyncio.run(main())
+
+
+def test_request_cancelled_on_disconnect():
+    messages, cancelled = _request("GET")
+
+    assert cancelled
+    assert messages[0] == {
+        "type": "http.response.start",
+        "status": CLIENT_CLOSED_REQUEST,
+    }
+
+
+def test_writes_are_not_cancelled_on_disconnect():
+    messages, cancelled = _request("POST")
+
+    assert not cancelled
+    assert messages == []
+
+
+def test_statement_timeout_of_the_engine_connections(monkeypatch):
+    monkeypatch.setattr(settings, "STATEMENT_TIMEOUTS_MS", {"/snippets/": 5_000})
+    app = _app(asyncio.Event(), asyncio.Event())
+    server_settings = []
+
+    async def connect(*args, **kwargs):
+        server_settings.append(kwargs.get("server_settings"))
+        raise OSError("No database in the tests")
+
+    monkeypatch.setattr(asyncpg, "connect", connect)
+
+    async def open_connection():
+        with contextlib.suppress(OSError):
+            async with async_engine.connect():
+                pass
+
+    async def main():
+        token = request_scope.set(_scope("GET", "/snippets/", app))
+        try:
+            await open_connection()
+        finally:
+            request_scope.reset(token)
+        # A background task, after the request
+        await open_connection()
+
+    asyncio.run(main())
+    assert server_settings == [{"statement_timeout": "5000"}, None]
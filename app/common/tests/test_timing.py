@@ -0,0 +1,35 @@
+import re
+
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from app.common.timing import ServerTimingMiddleware, timed
+
+
+def _page(request):
+    with timed("auth"):
+        pass
+    for _ in range(3):
+        with timed("render"):
+            # Nested in the same phase, only timed once
+            with timed("render"):
+                pass
+    return PlainTextResponse("ok")
+
+
+def test_server_timing_header():
+    app = Starlette(routes=[Route("/", _page)])
+    app.add_middleware(ServerTimingMiddleware)
+
+    header = TestClient(app).get("/").headers["server-timing"]
+
+    assert re.fullmatch(
+        r"auth;dur=\d+\.\d, render;dur=\d+\.\d, total;dur=\d+\.\d", header
+    )
+
+
+def test_timed_without_middleware():
+    with timed("render"):
+        pass
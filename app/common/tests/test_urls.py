@@ -0,0 +1,66 @@
+import uuid
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+from app.common.urls import RouteTable, url_for
+
+
+async def _endpoint(request):
+    pass  # pragma: no cover
+
+
+def _request(app, root_path="", host=b"example.com"):
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "router": app.router,
+            "scheme": "https",
+            "server": ("example.com", 443),
+            "root_path": root_path,
+            "path": "/",
+            "query_string": b"",
+            "headers": [(b"host", host)],
+        }
+    )
+
+
+def test_same_urls_as_starlette(tmp_path):
+    app = Starlette(
+        routes=[
+            Route("/", _endpoint, name="index"),
+            Route("/snippets/{id:uuid}/view", _endpoint, name="snippet.view"),
+            Route("/files/{path:path}", _endpoint, name="files"),
+            Route("/{provider}/login", _endpoint, name="login"),
+            Mount("/static", StaticFiles(directory=tmp_path), name="static"),
+        ]
+    )
+    cases = [
+        ("index", {}),
+        ("snippet.view", {"id": uuid.uuid4()}),
+        ("files", {"path": "a/b c.txt"}),
+        ("login", {"provider": "git hub"}),
+        ("static", {"path": "/scripts/app.js"}),
+        ("static", {"path": "styles/main.css"}),
+    ]
+    for request in (_request(app), _request(app, "/devscript", b"example.com:8443")):
+        for name, params in cases:
+            assert url_for(request, name, **params) == str(
+                request.url_for(name, **params)
+            )
+
+        params = {"tab": "mine", "q": 'tag:"a b"', "page": 2}
+        assert url_for(request, "index", query_params=params) == str(
+            request.url_for("index").include_query_params(**params)
+        )
+
+
+def test_unknown_routes_use_starlette():
+    app = Starlette(routes=[Route("/{id}", _endpoint, name="view")])
+
+    assert RouteTable(app.routes).url_path("view", id="1", other="2") is None
+    assert RouteTable(app.routes).url_path("missing") is None
+    assert url_for(_request(app), "view", id="1") == "https://example.com/1"
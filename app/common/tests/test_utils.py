@@ -0,0 +1,49 @@
+from datetime import datetime, timezone
+
+from fastapi import Request
+
+from app.common.utils import http_date, is_not_modified
+
+LAST_MODIFIED = datetime(2025, 2, 6, 12, 30, 15, 123456, tzinfo=timezone.utc)
+ETAG = '"abc123"'
+
+
+def _request(headers: dict) -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "GET",
+            "path": "/",
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+    )
+
+
+def test_http_date():
+    assert http_date(LAST_MODIFIED) == "Thu, 06 Feb 2025 12:30:15 GMT"
+    assert http_date(LAST_MODIFIED.replace(tzinfo=None)) == (
+        "Thu, 06 Feb 2025 12:30:15 GMT"
+    )
+
+
+def test_is_not_modified_etag():
+    assert is_not_modified(_request({"If-None-Match": ETAG}), ETAG)
+    assert is_not_modified(_request({"If-None-Match": f'"other", W/{ETAG}'}), ETAG)
+    assert is_not_modified(_request({"If-None-Match": "*"}), ETAG)
+    assert not is_not_modified(_request({"If-None-Match": '"other"'}), ETAG)
+    assert not is_not_modified(_request({}), ETAG, LAST_MODIFIED)
+
+
+def test_is_not_modified_since():
+    same_second = {"If-Modified-Since": http_date(LAST_MODIFIED)}
+    assert is_not_modified(_request(same_second), ETAG, LAST_MODIFIED)
+
+    before = {"If-Modified-Since": "Thu, 06 Feb 2025 12:30:14 GMT"}
+    assert not is_not_modified(_request(before), ETAG, LAST_MODIFIED)
+
+    invalid = {"If-Modified-Since": "not a date"}
+    assert not is_not_modified(_request(invalid), ETAG, LAST_MODIFIED)
+
+    # If-None-Match takes precedence over If-Modified-Since
+    both = {"If-None-Match": '"other"', **same_second}
+    assert not is_not_modified(_request(both), ETAG, LAST_MODIFIED)
@@ -0,0 +1,120 @@
+import asyncio
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.db import async_engine
+from app.settings import settings
+
+# SQLSTATE of a statement cancelled by `statement_timeout` or a cancel request
+QUERY_CANCELED = "57014"
+# Status of the requests cancelled because their client disconnected, as nginx does
+CLIENT_CLOSED_REQUEST = 499
+# Requests without side effects, the others are left to finish
+CANCELLABLE_METHODS = ("GET", "HEAD")
+
+# Scope of the request being processed, the route is set once the router matched it
+request_scope: ContextVar[Optional[Scope]] = ContextVar("request_scope", default=None)
+
+
+def statement_timeout(scope: Scope) -> int:
+    """Statement timeout of the route of a request in milliseconds, 0 for no timeout."""
+    route = scope.get("route")
+    if route is not None and route.path in settings.STATEMENT_TIMEOUTS_MS:
+        return settings.STATEMENT_TIMEOUTS_MS[route.path]
+    return settings.STATEMENT_TIMEOUT_MS
+
+
+def is_statement_timeout(exc: DBAPIError) -> bool:
+    return getattr(exc.orig, "sqlstate", None) == QUERY_CANCELED
+
+
+@event.listens_for(async_engine.sync_engine, "do_connect")
+def _do_connect(dialect, connection_record, cargs, cparams):
+    # The engine has no pool, a connection is opened for a session and closed with it, so
+    # the timeout is sent with the connection parameters instead of a `SET LOCAL` statement
+    # in each transaction.
+    # `cparams` are the parameters of all the connections of the engine, they are copied.
+    scope = request_scope.get()
+    if scope is None:
+        return None
+    timeout = statement_timeout(scope)
+    if not timeout:
+        return None
+    server_settings = {
+        **cparams.get("server_settings", {}),
+        "statement_timeout": str(timeout),
+    }
+    return dialect.connect(*cargs, **{**cparams, "server_settings": server_settings})
+
+
+class StatementTimeoutMiddleware:
+    """
+    Applies the statement timeout of the route to the connections opened by a request.
+
+    With `cancel_on_disconnect`, a GET or HEAD request is cancelled when its client
+    disconnects, asyncpg then cancels its running statement on the server. The request
+    body is read by a task that watches for the disconnect, and passed on to the app.
+    """
+
+    def __init__(self, app: ASGIApp, cancel_on_disconnect: bool = True):
+        self.app = app
+        self.cancel_on_disconnect = cancel_on_disconnect
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = request_scope.set(scope)
+        try:
+            if self.cancel_on_disconnect and scope["method"] in CANCELLABLE_METHODS:
+                await self._cancel_on_disconnect(scope, receive, send)
+            else:
+                await self.app(scope, receive, send)
+        finally:
+            request_scope.reset(token)
+
+    async def _cancel_on_disconnect(self, scope: Scope, receive: Receive, send: Send):
+        messages: asyncio.Queue[Message] = asyncio.Queue()
+        response_started = response_complete = False
+
+        async def send_wrapper(message: Message):
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body":
+                response_complete = not message.get("more_body", False)
+            await send(message)
+
+        async def listen():
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    # The background tasks run once the response is sent, they are not
+                    # cancelled
+                    if not response_complete:
+                        handler.cancel()
+                    return
+                messages.put_nowait(message)
+
+        handler = asyncio.create_task(self.app(scope, messages.get, send_wrapper))
+        listener = asyncio.create_task(listen())
+        try:
+            await asyncio.wait([handler])
+        finally:
+            listener.cancel()
+            if not handler.done():
+                handler.cancel()
+                await asyncio.wait([handler])
+
+        if not handler.cancelled():
+            # Raises the error of the app, if any
+            handler.result()
+        elif not response_started:
+            # Nobody reads it, it is the status recorded by the metrics
+            await send({"type": "http.response.start", "status": CLIENT_CLOSED_REQUEST})
+            await send({"type": "http.response.body", "body": b""})
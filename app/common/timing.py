@@ -0,0 +1,106 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.common.metrics import RequestStats, request_stats
+
+
+class ServerTiming:
+    """Time spent in each phase of a request, sent in the `Server-Timing` header."""
+
+    def __init__(self):
+        # name -> [duration (seconds), count]
+        self.phases: dict[str, list] = {}
+        # Phases being timed, a phase nested in itself is only timed once
+        self.running: set[str] = set()
+
+    def add(self, name: str, duration: float, count: int = 1):
+        phase = self.phases.get(name)
+        if phase is None:
+            self.phases[name] = [duration, count]
+        else:
+            phase[0] += duration
+            phase[1] += count
+
+    def header(self) -> str:
+        entries = []
+        for name, (duration, count) in self.phases.items():
+            entry = f"{name};dur={duration * 1000:.1f}"
+            if name == "db":
+                entry += f';desc="{count} queries"'
+            entries.append(entry)
+        return ", ".join(entries)
+
+
+# Timings of the request being processed, None when `SERVER_TIMING_ENABLED` is off
+server_timing: ContextVar[Optional[ServerTiming]] = ContextVar(
+    "server_timing", default=None
+)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """
+    Add the time spent in the block to the `name` phase of the current request.
+
+    Phases can overlap (markdown is rendered while serializing), the header shows
+    the time of each one.
+    """
+    timing = server_timing.get()
+    if timing is None or name in timing.running:
+        yield
+        return
+
+    timing.running.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.running.discard(name)
+        timing.add(name, time.perf_counter() - start)
+
+
+class ServerTimingMiddleware:
+    """
+    Sends the time spent in the phases of the request (auth, db, serialize, markdown,
+    render) and its total time in the `Server-Timing` header.
+    The total is the time until the response headers are sent.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = ServerTiming()
+        token = server_timing.set(timing)
+        # The SQL statements are counted by the database events of the metrics
+        stats = request_stats.get()
+        stats_token = None
+        if stats is None:
+            stats = RequestStats(scope)
+            stats_token = request_stats.set(stats)
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                if stats.queries:
+                    timing.add("db", stats.query_duration, stats.queries)
+                timing.add("total", time.perf_counter() - start)
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", timing.header())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            server_timing.reset(token)
+            if stats_token is not None:
+                request_stats.reset(stats_token)
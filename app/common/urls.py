@@ -0,0 +1,112 @@
+import re
+from typing import Any, Sequence
+from urllib.parse import urlencode
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import BaseRoute, Mount, Route
+
+_param_re = re.compile(r"{([^{}]+)}")
+
+
+class RouteTable:
+    """
+    Paths of the named routes, precomputed so urls can be built without going through the
+    route table for every url.
+
+    Builds the same urls as `request.url_for`, names or params it does not know about
+    (routes of mounted sub apps, websockets) are passed on to `request.url_for`.
+
+    Args:
+        routes: The routes of the app
+    """
+
+    def __init__(self, routes: Sequence[BaseRoute]):
+        # name -> [(param names, path parts, is mount)]
+        #   the parts are either text or (param name, convertor)
+        self._routes: dict[str, list[tuple[frozenset, list, bool]]] = {}
+        for route in routes:
+            if isinstance(route, Route):
+                self._add(route, is_mount=False)
+            elif isinstance(route, Mount) and route.name and not route.routes:
+                # A mounted app, like the static files, only has the `path` param
+                self._add(route, is_mount=True)
+
+    def _add(self, route: Route | Mount, is_mount: bool):
+        parts = []
+        for index, part in enumerate(_param_re.split(route.path_format)):
+            if index % 2:
+                parts.append((part, route.param_convertors[part]))
+            elif part:
+                parts.append(part)
+
+        self._routes.setdefault(route.name, []).append(
+            (frozenset(route.param_convertors), parts, is_mount)
+        )
+
+    def url_path(self, name: str, /, **path_params: Any) -> str | None:
+        """
+        Get the path of a route.
+
+        Returns:
+            The path, or None if no route has this name and params
+        """
+        for param_names, parts, is_mount in self._routes.get(name, ()):
+            if param_names.symmetric_difference(path_params):
+                continue
+
+            if is_mount:
+                path_params["path"] = path_params["path"].lstrip("/")
+
+            return "".join(
+                part
+                if isinstance(part, str)
+                else part[1].to_string(path_params[part[0]])
+                for part in parts
+            )
+
+        return None
+
+
+def get_route_table(app: Starlette) -> RouteTable:
+    """The route table of an app, built on first use."""
+    route_table = getattr(app.state, "route_table", None)
+    if route_table is None:
+        route_table = app.state.route_table = RouteTable(app.routes)
+    return route_table
+
+
+def _base_url(request: Request) -> str:
+    # Same for all the urls of a request, kept in the scope once built
+    base_url = request.scope.get("base_url_prefix")
+    if base_url is None:
+        url = request.base_url
+        base_url = f"{url.scheme}://{url.netloc}{url.path.rstrip('/')}"
+        request.scope["base_url_prefix"] = base_url
+    return base_url
+
+
+def url_for(
+    request: Request, name: str, /, query_params: dict | None = None, **path_params: Any
+) -> str:
+    """
+    Build the absolute url of a route, like `request.url_for(name, **path_params)`.
+
+    Args:
+        request: The current request
+        name: Name of the route
+        query_params: Added to the url, like `URL.include_query_params`
+        path_params: The params of the route path
+
+    Returns:
+        The url
+    """
+    path = get_route_table(request.app).url_path(name, **path_params)
+    if path is None:
+        url = request.url_for(name, **path_params)
+        return str(url.include_query_params(**query_params) if query_params else url)
+
+    url = _base_url(request) + path
+    if query_params:
+        url += "?" + urlencode({str(k): str(v) for k, v in query_params.items()})
+    return url
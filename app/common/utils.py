@@ -1,5 +1,7 @@
 import asyncio
 import threading
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import Any, Awaitable, Dict, List, Literal, Optional, TypeVar
 
 from fastapi import Request
@@ -68,6 +70,8 @@ class sync_await:
         return self
 
     def __call__(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        # The coroutine runs in a copy of the caller's context, e.g. its database
+        # statements are counted in the stats of the caller's request
         return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
 
     def __exit__(self, *exc_info: Any) -> None:
@@ -81,3 +85,64 @@ def get_key_from_options(my_dict: dict, key_options: List[str]) -> Any:
         if key in my_dict:
             return my_dict[key]
     return None
+
+
+def http_date(dt: datetime) -> str:
+    """
+    Format a datetime as an HTTP-date, used for the Last-Modified header.
+
+    Args:
+        dt: The datetime to format, naive datetimes are treated as UTC
+
+    Returns:
+        The formatted date (e.g. "Wed, 21 Oct 2015 07:28:00 GMT")
+    """
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Check the conditional request headers to see if the client already has the current version.
+
+    `If-None-Match` takes precedence over `If-Modified-Since` as defined in RFC 9110.
+
+    Args:
+        request: The request object
+        etag: The current strong ETag of the resource, including the quotes
+        last_modified: When the resource was last modified
+
+    Returns:
+        True if a 304 Not Modified response can be sent
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+
+        # If-None-Match uses the weak comparison, so the W/ prefix is ignored
+        client_etags = [
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+        ]
+        return etag.removeprefix("W/") in client_etags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+
+        # HTTP dates only have second precision
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
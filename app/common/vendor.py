@@ -0,0 +1,48 @@
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from loguru import logger
+
+from app.common.constants import SUPPORTED_LANGUAGES
+
+VENDOR_MANIFEST_PATH = (
+    Path(__file__).parent.parent / "static" / "vendor" / "manifest.json"
+)
+
+
+@lru_cache(maxsize=1)
+def get_vendor_manifest() -> dict[str, str]:
+    """
+    Get the vendor bundles built by `python -m app.commands.build_vendor`.
+
+    Returns:
+        Bundle name -> path of the file relative to the static directory
+    """
+    try:
+        return json.loads(VENDOR_MANIFEST_PATH.read_text())
+    except FileNotFoundError:
+        logger.warning(
+            "Vendor files not found, run `python -m app.commands.build_vendor` to build them"
+        )
+        return {}
+
+
+def get_vendor_path(name: str) -> str:
+    return get_vendor_manifest().get(name, f"vendor/{name}")
+
+
+def get_language_bundles() -> dict[str, str]:
+    """
+    Get the highlight.js language bundle of each language.
+
+    Returns:
+        Language name and hljs filename (both lowercase) -> path of the bundle
+    """
+    bundles = {}
+    for language in SUPPORTED_LANGUAGES:
+        path = get_vendor_path(f"hljs/languages/{language.value[1]}.js")
+        bundles[language.name.lower()] = path
+        bundles[language.value[1]] = path
+
+    return bundles
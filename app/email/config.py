@@ -7,6 +7,7 @@ from fastapi_mail import ConnectionConfig, FastMail, MessageSchema, MessageType
 from fastapi_mail.fastmail import email_dispatched as email_dispatched_signal
 from loguru import logger
 
+from app.common.metrics import emails_pending
 from app.settings import settings
 
 
@@ -90,7 +91,11 @@ async def send_email_async(
     )
     fm = FastMail(conf)
     message = _create_message(subject, recipients, template_vars)
-    await fm.send_message(message, template_name=template_name)
+    emails_pending.inc()
+    try:
+        await fm.send_message(message, template_name=template_name)
+    finally:
+        emails_pending.dec()
 
 
 def send_email_background(
@@ -110,7 +115,15 @@ def send_email_background(
 
     fm = FastMail(conf)
     message = _create_message(subject, recipients, template_vars)
-    background_tasks.add_task(fm.send_message, message, template_name=template_name)
+    emails_pending.inc()
+    background_tasks.add_task(_send_message, fm, message, template_name)
+
+
+async def _send_message(fm: FastMail, message: MessageSchema, template_name: str):
+    try:
+        await fm.send_message(message, template_name=template_name)
+    finally:
+        emails_pending.dec()
 
 
 def email_terminal_output(email):
@@ -3,10 +3,17 @@ Source: https://gist.github.com/nkhitrov/a3e31cfcc1b19cba8e1b626276148c49
 Configure handlers and formats for application loggers.
 """
 
+import asyncio
 import logging
+import queue
+import random
 import sys
+import threading
+import traceback
 from pprint import pformat
+from typing import TextIO
 
+import orjson
 import sentry_sdk
 from loguru import logger
 from loguru._defaults import LOGURU_FORMAT, LOGURU_LEVEL
@@ -21,6 +28,12 @@ class InterceptHandler(logging.Handler):
     See https://loguru.readthedocs.io/en/stable/overview.html#entirely-compatible-with-standard-logging
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Frames to skip to get out of `logging`, by call site.
+        # Always the same for a call site, so the stack is only walked once.
+        self._depths: dict[tuple[str, int], int] = {}
+
     def emit(self, record: logging.LogRecord):
         # Get corresponding Loguru level if it exists
         try:
@@ -29,16 +42,86 @@ class InterceptHandler(logging.Handler):
             level = record.levelno
 
         # Find caller from where originated the logged message
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back
-            depth += 1
+        call_site = (record.pathname, record.lineno)
+        depth = self._depths.get(call_site)
+        if depth is None:
+            # Skip this frame, then the ones of `logging`
+            frame, depth = sys._getframe(), 0
+            while frame and (
+                depth == 0 or frame.f_code.co_filename == logging.__file__
+            ):
+                frame = frame.f_back
+                depth += 1
+            self._depths[call_site] = depth
 
         logger.opt(depth=depth, exception=record.exc_info).log(
             level, record.getMessage()
         )
 
 
+class AccessLogSampler(logging.Filter):
+    """
+    Keeps a share of the successful uvicorn access logs, and all the errors.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        # Access log args: client address, method, path, http version, status code
+        if isinstance(record.args, tuple) and len(record.args) == 5:
+            status_code = record.args[4]
+            if isinstance(status_code, int) and status_code >= 400:
+                return True
+        return random.random() < self.rate
+
+
+class BackgroundSink:
+    """
+    Writes the formatted logs to a stream from a thread, the caller only puts them in a queue.
+
+    Loguru `enqueue` pickles each record for a multiprocessing queue, which costs the caller
+    more than the write itself. When the queue is full the callers wait, the logs are not lost.
+    """
+
+    def __init__(self, stream: TextIO, max_size: int = 10_000):
+        self.stream = stream
+        self.name = getattr(stream, "name", None)
+        self.queue: queue.Queue[str | None] = queue.Queue(max_size)
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def isatty(self) -> bool:
+        # Loguru colorizes the text format when the stream is a terminal
+        return self.stream.isatty()
+
+    def write(self, message: str):
+        self.queue.put(message)
+
+    def _run(self):
+        while (message := self.queue.get()) is not None:
+            try:
+                self.stream.write(message)
+                # One flush for the messages logged while writing
+                if self.queue.empty():
+                    self.stream.flush()
+            except Exception:
+                pass
+            finally:
+                self.queue.task_done()
+        self.queue.task_done()
+
+    async def complete(self):
+        """Called by `logger.complete()`, waits for the queued logs to be written."""
+        await asyncio.to_thread(self.queue.join)
+
+    def stop(self):
+        """Called when the handler is removed, writes the queued logs then ends the thread."""
+        self.queue.put(None)
+        self.thread.join()
+
+
 def format_record(record: dict) -> str:
     """
     Custom format for loguru loggers.
@@ -64,6 +147,32 @@ def format_record(record: dict) -> str:
     return format_string
 
 
+def format_json(record: dict) -> str:
+    """
+    Format of the loguru loggers when `LOG_FORMAT` is `json`, one object per line.
+    The bound values are in `extra`, the traceback of an exception in `exception`.
+    """
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if key != "_json"}
+    if extra:
+        entry["extra"] = extra
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+
+    # Returned as a field so the braces of the json are not read as a format
+    record["extra"]["_json"] = orjson.dumps(
+        entry, default=str, option=orjson.OPT_NON_STR_KEYS
+    ).decode()
+    return "{extra[_json]}\n"
+
+
 def init_logging():
     """
     Replaces logging handlers with a handler for using the custom handler.
@@ -102,9 +211,27 @@ def init_logging():
         if logger_name == "sqlalchemy.engine":
             logging_logger.setLevel(logging.WARNING)
 
+    access_logger = logging.getLogger("uvicorn.access")
+    access_logger.filters = [
+        f for f in access_logger.filters if not isinstance(f, AccessLogSampler)
+    ]
+    if settings.LOG_ACCESS_SAMPLE_RATE < 1:
+        access_logger.addFilter(AccessLogSampler(settings.LOG_ACCESS_SAMPLE_RATE))
+
     # set logs output, level and format
+    #   The records are formatted by the caller, and written by a thread with `LOG_ENQUEUE`
+    is_json = settings.LOG_FORMAT == "json"
     logger.configure(
-        handlers=[{"sink": sys.stdout, "level": LOGURU_LEVEL, "format": format_record}]
+        handlers=[
+            {
+                "sink": BackgroundSink(sys.stdout)
+                if settings.LOG_ENQUEUE
+                else sys.stdout,
+                "level": LOGURU_LEVEL,
+                "format": format_json if is_json else format_record,
+                **({"colorize": False} if is_json else {}),
+            }
+        ]
     )
 
     # Setup sentry if enabled
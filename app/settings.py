@@ -1,4 +1,4 @@
-from typing import List, Literal, Optional
+from typing import Dict, List, Literal, Optional
 
 from pydantic_settings import BaseSettings
 
@@ -23,6 +23,75 @@ class Settings(BaseSettings):
     # Syntax Highlighting
     DEFAULT_CODE_THEME_LIGHT: str = "atom-one-light"
     DEFAULT_CODE_THEME_DARK: str = "atom-one-dark"
+    # When True, snippets are highlighted on the server instead of in the browser
+    SERVER_SIDE_HIGHLIGHTING: bool = False
+    HIGHLIGHT_CACHE_SIZE: int = 512  # Number of highlighted snippets kept in memory
+
+    # Rendered snippet cards kept in memory, reused while the snippet is unchanged
+    SNIPPET_CARD_CACHE_SIZE: int = 2048
+    SNIPPET_CARD_CACHE_MAX_MEMORY: int = 16 * 1024 * 1024  # (bytes)
+
+    # Templates
+    # Directory of the compiled templates cache, shared by the workers.
+    #   Defaults to a `_jinja2-cache-<uid>` directory in the system temp directory
+    TEMPLATE_BYTECODE_CACHE_DIR: Optional[str] = None
+
+    # Response Compression
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 500  # (bytes) Smaller responses are not compressed
+    COMPRESSION_GZIP_LEVEL: int = 6  # 1-9
+    COMPRESSION_BROTLI_LEVEL: int = 4  # 0-11
+    COMPRESSION_ZSTD_LEVEL: int = 3  # 1-22, only used when `zstandard` is installed
+
+    # Response Cache
+    #   Pages of anonymous visitors (explore, public snippets) are shared by all of them
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 30  # (seconds) Cached pages are used as is
+    RESPONSE_CACHE_STALE_TTL: int = 300  # (seconds) Then used while rendered again
+    RESPONSE_CACHE_MAX_MEMORY: int = 64 * 1024 * 1024  # (bytes) In memory cache size
+    # Share the cache between the workers, requires the `redis` package
+    RESPONSE_CACHE_REDIS_URL: Optional[str] = None
+
+    # Logging
+    #   `json` writes one JSON object per line, for log shippers
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    #   Write the logs from a background thread, a slow stdout does not block the requests
+    LOG_ENQUEUE: bool = True
+    #   Share of the successful access logs kept, errors are always logged
+    LOG_ACCESS_SAMPLE_RATE: float = 1.0
+
+    # Metrics
+    #   Prometheus metrics of the requests, database and caches, served on `/metrics`
+    METRICS_ENABLED: bool = False
+    # When set, `/metrics` requires an `Authorization: Bearer <token>` header, without it
+    #   the metrics are public
+    METRICS_TOKEN: Optional[str] = None
+
+    # Send the time spent in auth, db, serialization and rendering in a `Server-Timing`
+    #   header, shown in the network tab of the browser devtools
+    SERVER_TIMING_ENABLED: bool = False
+
+    # Admins can profile a request with an `X-Profile` header or a `_profile` query param
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_PROFILES: int = 20  # Last profiles kept in memory by each worker
+
+    # Slow Query Log
+    #   Statements slower than the threshold are shown on the admin page with their plan
+    SLOW_QUERY_THRESHOLD_MS: int = 250  # 0 to disable
+    SLOW_QUERY_MAX_QUERIES: int = 200  # Number of distinct statements kept
+    SLOW_QUERY_EXPLAIN: bool = True  # Capture the plan, with EXPLAIN (ANALYZE off)
+
+    # Statement Timeouts
+    #   Longest a SQL statement of a request can run, the request then fails with a 503
+    STATEMENT_TIMEOUT_MS: int = 10_000  # 0 to disable
+    #   Timeout of some routes by path, the searches are cut short sooner
+    STATEMENT_TIMEOUTS_MS: Dict[str, int] = {
+        "/snippets/": 5_000,
+        "/snippets/partials/list": 5_000,
+        "/api/v1/snippets": 5_000,
+    }
+    #   Cancel a GET request and its running SQL statement when the client disconnects
+    CANCEL_ON_DISCONNECT: bool = True
 
     # Database Settings
     DATABASE_USER: str = "postgres"
@@ -1,9 +1,13 @@
 from fastapi import APIRouter
 
+# Imported so their caches are registered and reported from the start
+from . import fragments, highlighting  # noqa
 from .apis import router as api_router
+from .apis import v1_router as api_v1_router
 from .signals import *  # noqa
 from .views import router as view_router
 
 router = APIRouter()
 router.include_router(view_router, prefix="/snippets", tags=["Snippets"])
 router.include_router(api_router, prefix="/api/snippets", tags=["Snippets"])
+router.include_router(api_v1_router, prefix="/api/v1/snippets", tags=["Snippets API"])
@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy import select
+import uuid
+from datetime import datetime, timezone
+from typing import List, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from fastapi_pagination.default import Params
+from fastapi_pagination.ext.sqlalchemy import paginate
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.auth.apis import get_api_key_user
 from app.auth.models import User
 from app.common.db import get_async_session
+from app.common.exceptions import ValidationError
+from app.common.utils import http_date, is_not_modified
 
-from .models import Snippet
+from .models import Snippet, favorites
+from .search import SnippetsSearchParser
+from .serializers import (
+    CommandsFetchSerializer,
+    SnippetCreateSerializer,
+    SnippetUpdateSerializer,
+)
 
 router = APIRouter()
 
@@ -18,24 +34,397 @@ router = APIRouter()
     "/command/{command_name}", name="api.snippets.command.head", response_class=Response
 )
 async def get_snippet_by_command_api(
+    request: Request,
     command_name: str,
     user: User = Depends(get_api_key_user),
     session: AsyncSession = Depends(get_async_session),
 ):
-    """Get a snippet's content by command name for the authenticated API user."""
-    query = select(Snippet).where(
-        Snippet.user_id == user.id, Snippet.command_name == command_name
-    )
+    """
+    Get a snippet's content by command name for the authenticated API user.
+
+    Supports conditional requests with `If-None-Match` and `If-Modified-Since`.
+    The content is only read from the database when it has to be sent to the client,
+    the ETag and Content-Length come from the metadata stored when the snippet was saved.
+    """
+    query = select(
+        Snippet.id,
+        Snippet.language,
+        Snippet.updated_at,
+        Snippet.content_hash,
+        Snippet.content_bytes,
+    ).where(Snippet.user_id == user.id, Snippet.command_name == command_name)
     result = await session.execute(query)
-    snippet = result.scalar_one_or_none()
+    snippet = result.one_or_none()
 
     if not snippet:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Snippet not found"
         )
 
+    etag = Snippet.build_etag(snippet.content_hash, snippet.updated_at)
+    headers = {
+        "X-Snippet-Lang": str(snippet.language).lower(),
+        "ETag": etag,
+        "Last-Modified": http_date(snippet.updated_at),
+        "Cache-Control": "private, no-cache",
+    }
+
+    if is_not_modified(request, etag, snippet.updated_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    if request.method == "HEAD":
+        headers["Content-Length"] = str(snippet.content_bytes or 0)
+        return Response(media_type="text/plain", headers=headers)
+
+    result = await session.execute(
+        select(Snippet.content).where(Snippet.id == snippet.id)
+    )
+    content = result.scalar_one_or_none()
+
     return Response(
-        content=snippet.content.replace("\r\n", "\n"),
+        content=content or "",
         media_type="text/plain",
-        headers={"X-Snippet-Lang": str(snippet.language).lower()},
+        headers=headers,
+    )
+
+
+@router.get(
+    "/commands",
+    name="api.snippets.commands.manifest",
+    response_class=ORJSONResponse,
+)
+async def get_commands_manifest_api(
+    since: Optional[datetime] = None,
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get the manifest of all the API user's command snippets, used to sync a local cache.
+
+    When `since` is set, only the commands updated after it are included in `commands`.
+    `command_names` always lists every current command so clients can drop removed ones.
+    Pass the returned `cursor` as `since` on the next sync.
+    """
+    if since and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+
+    query = (
+        select(
+            Snippet.command_name,
+            Snippet.language,
+            Snippet.updated_at,
+            Snippet.content_hash,
+        )
+        .where(Snippet.user_id == user.id, Snippet.command_name.isnot(None))
+        .order_by(Snippet.command_name)
+    )
+    result = await session.execute(query)
+    rows = result.all()
+
+    commands = {
+        row.command_name: {
+            "etag": Snippet.build_etag(row.content_hash, row.updated_at),
+            "language": str(row.language).lower(),
+            "updated_at": row.updated_at,
+        }
+        for row in rows
+        if not since or row.updated_at > since
+    }
+    cursor = max((row.updated_at for row in rows), default=since)
+
+    return {
+        "commands": commands,
+        "command_names": [row.command_name for row in rows],
+        "cursor": cursor,
+    }
+
+
+@router.post(
+    "/commands/fetch",
+    name="api.snippets.commands.fetch",
+    response_class=ORJSONResponse,
+)
+async def fetch_commands_api(
+    data: CommandsFetchSerializer,
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get the content of multiple command snippets in a single request.
+    Command names that do not exist are returned in `missing`.
+    """
+    command_names = list(dict.fromkeys(data.command_names))
+    query = select(
+        Snippet.command_name,
+        Snippet.language,
+        Snippet.updated_at,
+        Snippet.content_hash,
+        Snippet.content,
+    ).where(Snippet.user_id == user.id, Snippet.command_name.in_(command_names))
+    result = await session.execute(query)
+
+    commands = {
+        row.command_name: {
+            "content": row.content or "",
+            "etag": Snippet.build_etag(row.content_hash, row.updated_at),
+            "language": str(row.language).lower(),
+            "updated_at": row.updated_at,
+        }
+        for row in result.all()
+    }
+
+    return {
+        "commands": commands,
+        "missing": [name for name in command_names if name not in commands],
+    }
+
+
+# =================================================================================
+#
+# Snippets JSON API (v1)
+#       - CRUD and search for the authenticated API user
+#
+# =================================================================================
+v1_router = APIRouter(default_response_class=ORJSONResponse)
+
+MAX_PAGE_SIZE = 100
+MAX_BATCH_IDS = 100
+
+
+def _api_snippet_dump(snippet: Snippet, user: User) -> dict:
+    # Never expose the owner's email through the API
+    return snippet.to_serializer(user).model_dump(exclude={"user": {"email"}})
+
+
+async def _get_favorite_ids(
+    session: AsyncSession, user: User, snippet_ids: List[uuid.UUID]
+) -> set:
+    """Get which of the given snippets the user has favorited in a single query."""
+    if not snippet_ids:
+        return set()
+
+    query = select(favorites.c.snippet_id).where(
+        favorites.c.user_id == user.id, favorites.c.snippet_id.in_(snippet_ids)
     )
+    result = await session.execute(query)
+    return set(result.scalars().all())
+
+
+async def _get_snippet_for_api(
+    session: AsyncSession, id: uuid.UUID, user: User, owned_only: bool = False
+) -> Snippet:
+    is_owned = Snippet.user_id == user.id
+    query = (
+        select(Snippet)
+        .where(Snippet.id == id)
+        .where(is_owned if owned_only else or_(Snippet.public, is_owned))
+        .execution_options(populate_existing=True)
+        .options(
+            selectinload(Snippet.user),
+            selectinload(Snippet.tags),
+            selectinload(Snippet.tag_associations),
+            selectinload(Snippet.favorited_by),
+        )
+    )
+    result = await session.execute(query)
+    snippet = result.scalar_one_or_none()
+
+    if not snippet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Snippet not found"
+        )
+
+    return snippet
+
+
+# --------------------------------------------------------------------------------------------------------------
+# GET | List & search snippets
+# --------------------------------------------------------------------------------------------------------------
+@v1_router.get("", name="api.v1.snippets.list")
+async def list_snippets_api(
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+    q: str = "",
+    scope: Literal["mine", "favorites", "explore"] = "mine",
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+):
+    """
+    List snippets using the same search syntax as the web UI.
+    Returns the lean list projection, use the get endpoints for the full snippet.
+    """
+    search_query = SnippetsSearchParser(q=q)
+
+    items_query = select(Snippet).options(*Snippet.list_load_options())
+
+    if scope == "explore":
+        items_query = items_query.where(Snippet.public)
+    elif scope == "favorites":
+        items_query = items_query.where(
+            Snippet.favorited_by.any(User.id == user.id),
+            or_(Snippet.public, Snippet.user_id == user.id),
+        )
+    else:
+        items_query = items_query.where(Snippet.user_id == user.id)
+
+    items_query = search_query.apply_filters(items_query, user)
+    items_query = items_query.order_by(Snippet.updated_at.desc())
+
+    page_data = await paginate(
+        session,
+        items_query,
+        params=Params(page=page, size=page_size),
+    )
+
+    favorite_ids = await _get_favorite_ids(
+        session, user, [snippet.id for snippet in page_data.items]
+    )
+
+    return {
+        "items": [
+            snippet.to_list_serializer(snippet.id in favorite_ids).model_dump()
+            for snippet in page_data.items
+        ],
+        "total": page_data.total,
+        "page": page_data.page,
+        "page_size": page_data.size,
+        "pages": page_data.pages,
+    }
+
+
+# --------------------------------------------------------------------------------------------------------------
+# GET | Get many snippets by id
+# --------------------------------------------------------------------------------------------------------------
+@v1_router.get("/batch", name="api.v1.snippets.batch")
+async def get_snippets_batch_api(
+    ids: List[uuid.UUID] = Query(..., max_length=MAX_BATCH_IDS),
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """
+    Get multiple full snippets in a single request.
+    Ids that do not exist or are not visible to the user are returned in `missing`.
+    """
+    ids = list(dict.fromkeys(ids))
+    query = (
+        select(Snippet)
+        .where(Snippet.id.in_(ids))
+        .where(or_(Snippet.public, Snippet.user_id == user.id))
+        .options(
+            selectinload(Snippet.user),
+            selectinload(Snippet.tags),
+            selectinload(Snippet.favorited_by),
+        )
+    )
+    result = await session.execute(query)
+    snippets = {snippet.id: snippet for snippet in result.scalars().all()}
+
+    return {
+        "items": [
+            _api_snippet_dump(snippets[id], user) for id in ids if id in snippets
+        ],
+        "missing": [str(id) for id in ids if id not in snippets],
+    }
+
+
+# --------------------------------------------------------------------------------------------------------------
+# GET | Get a snippet
+# --------------------------------------------------------------------------------------------------------------
+@v1_router.get("/{id}", name="api.v1.snippets.get")
+async def get_snippet_api(
+    id: uuid.UUID,
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Get a single snippet that is public or owned by the API user."""
+    snippet = await _get_snippet_for_api(session, id, user)
+    return _api_snippet_dump(snippet, user)
+
+
+# --------------------------------------------------------------------------------------------------------------
+# POST | Create a snippet
+# --------------------------------------------------------------------------------------------------------------
+@v1_router.post("", name="api.v1.snippets.create", status_code=status.HTTP_201_CREATED)
+async def create_snippet_api(
+    data: SnippetCreateSerializer,
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Create a new snippet owned by the API user."""
+    try:
+        snippet = Snippet(
+            **data.model_dump(exclude={"tags"}),
+            user_id=user.id,
+        )
+        snippet.tag_associations = await snippet.bulk_add_tags(session, data.tags)
+        session.add(snippet)
+        await session.commit()
+    except ValidationError as e:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    snippet = await _get_snippet_for_api(session, snippet.id, user, owned_only=True)
+    return ORJSONResponse(
+        _api_snippet_dump(snippet, user), status_code=status.HTTP_201_CREATED
+    )
+
+
+# --------------------------------------------------------------------------------------------------------------
+# PATCH | Update a snippet
+# --------------------------------------------------------------------------------------------------------------
+@v1_router.patch("/{id}", name="api.v1.snippets.update")
+async def update_snippet_api(
+    id: uuid.UUID,
+    data: SnippetUpdateSerializer,
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Update the fields that are set in the body of a snippet owned by the API user."""
+    snippet = await _get_snippet_for_api(session, id, user, owned_only=True)
+
+    updates = data.model_dump(exclude_unset=True)
+    try:
+        if "tags" in updates:
+            tags = updates.pop("tags") or []
+            snippet.tag_associations = await snippet.bulk_add_tags(session, tags)
+
+        for key, value in updates.items():
+            setattr(snippet, key, value)
+
+        await session.commit()
+    except ValidationError as e:
+        await session.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    snippet = await _get_snippet_for_api(session, id, user, owned_only=True)
+    return _api_snippet_dump(snippet, user)
+
+
+# --------------------------------------------------------------------------------------------------------------
+# DELETE | Delete a snippet
+# --------------------------------------------------------------------------------------------------------------
+@v1_router.delete(
+    "/{id}",
+    name="api.v1.snippets.delete",
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def delete_snippet_api(
+    id: uuid.UUID,
+    user: User = Depends(get_api_key_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """Delete a snippet owned by the API user."""
+    query = select(Snippet).where(Snippet.id == id, Snippet.user_id == user.id)
+    result = await session.execute(query)
+    snippet = result.scalar_one_or_none()
+
+    if not snippet:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Snippet not found"
+        )
+
+    await session.delete(snippet)
+    await session.commit()
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
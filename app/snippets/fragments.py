@@ -0,0 +1,105 @@
+import sys
+import time
+from typing import Any, Hashable
+
+from jinja2.runtime import Context
+from markupsafe import Markup
+
+from app.common.cache import LRUCache
+from app.settings import settings
+
+SNIPPET_CARD_TEMPLATE = "snippets/templates/_components/snippet_card.html"
+
+
+class FragmentCache(LRUCache):
+    """
+    LRU cache of rendered html fragments, that also tracks the render time it saved.
+
+    Each value is stored with the time it took to render, a hit adds it to `time_saved`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("sizeof", lambda value: sys.getsizeof(value[0]))
+        super().__init__(*args, **kwargs)
+        self.time_saved = 0.0
+
+    def get_fragment(self, key: Hashable) -> Markup | None:
+        cached = self.get(key)
+        if cached is None:
+            return None
+
+        html, render_time = cached
+        self.time_saved += render_time
+        return html
+
+    def set_fragment(self, key: Hashable, html: Markup, render_time: float):
+        self.set(key, (html, render_time))
+
+    def clear(self):
+        super().clear()
+        self.time_saved = 0.0
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        return {**super().stats, "render_ms_saved": round(self.time_saved * 1000, 1)}
+
+
+snippet_card_cache = FragmentCache(
+    max_size=settings.SNIPPET_CARD_CACHE_SIZE,
+    max_memory=settings.SNIPPET_CARD_CACHE_MAX_MEMORY,
+    name="snippet_cards",
+)
+
+
+def snippet_card_key(context: Context, snippet) -> tuple:
+    """
+    Everything the html of a snippet card depends on.
+
+    The columns of the snippet change its `updated_at`, its tags don't: a tag-only edit
+    doesn't update the `snippets` row, so the tag names are part of the key. The rest is
+    the state of the page: the viewer, the selected snippet and the current tab and search
+    used by the card links.
+    """
+    request = context["request"]
+    user = context.get("user")
+    selected_snippet = context.get("selected_snippet")
+    return (
+        snippet.id,
+        snippet.updated_at,
+        tuple(snippet.tags or ()),
+        snippet.is_favorite,
+        snippet.user.display_name if snippet.user else None,
+        # Anonymous, someone else's snippet or the viewer's own snippet
+        None if not user else bool(snippet.user and snippet.user.id == str(user.id)),
+        bool(selected_snippet and selected_snippet.id == snippet.id),
+        str(request.base_url),
+        request.query_params.get("tab"),
+        request.query_params.get("q"),
+        settings.SERVER_SIDE_HIGHLIGHTING,
+    )
+
+
+def render_snippet_card(context: Context, snippet) -> Markup:
+    """
+    Render the card of a snippet on the index page, reusing the html of unchanged cards.
+
+    Args:
+        context: The context of the page template
+        snippet: The snippet serializer
+
+    Returns:
+        The html of the card
+    """
+    key = snippet_card_key(context, snippet) if snippet.id else None
+    if key is not None:
+        html = snippet_card_cache.get_fragment(key)
+        if html is not None:
+            return html
+
+    start = time.perf_counter()
+    template = context.environment.get_template(SNIPPET_CARD_TEMPLATE)
+    html = Markup(template.render({**context.get_all(), "snippet": snippet}))
+    if key is not None:
+        snippet_card_cache.set_fragment(key, html, time.perf_counter() - start)
+
+    return html
@@ -0,0 +1,156 @@
+from functools import lru_cache
+from html import escape
+from itertools import groupby
+
+from markupsafe import Markup
+from pygments import lex
+from pygments.lexer import Lexer
+from pygments.lexers import get_lexer_by_name
+from pygments.token import (
+    Comment,
+    Generic,
+    Keyword,
+    Name,
+    Number,
+    Operator,
+    String,
+    _TokenType,
+)
+from pygments.util import ClassNotFound
+
+from app.common.cache import LRUCache
+from app.common.constants import SUPPORTED_LANGUAGES
+from app.settings import settings
+
+# Pygments lexer used for a language when it is not the same as the hljs filename
+#   None means the language is displayed as plain text
+LEXER_NAMES = {
+    SUPPORTED_LANGUAGES.PHP_TEMPLATE.name: "html+php",
+    SUPPORTED_LANGUAGES.PLAINTEXT.name: None,
+    SUPPORTED_LANGUAGES.PGSQL.name: "postgresql",
+    SUPPORTED_LANGUAGES.PYTHON_REPL.name: "pycon",
+    SUPPORTED_LANGUAGES.SHELL.name: "console",
+    SUPPORTED_LANGUAGES.WASM.name: "wast",
+}
+
+# Pygments token type -> highlight.js css classes, so the existing hljs themes style the output
+#   Token types not listed use the classes of their closest parent type
+TOKEN_CLASSES = {
+    Keyword: "hljs-keyword",
+    Keyword.Constant: "hljs-literal",
+    Keyword.Type: "hljs-type",
+    Name.Attribute: "hljs-attr",
+    Name.Builtin: "hljs-built_in",
+    Name.Builtin.Pseudo: "hljs-variable language_",
+    Name.Class: "hljs-title class_",
+    Name.Constant: "hljs-variable constant_",
+    Name.Decorator: "hljs-meta",
+    Name.Entity: "hljs-symbol",
+    Name.Exception: "hljs-title class_",
+    Name.Function: "hljs-title function_",
+    Name.Label: "hljs-symbol",
+    Name.Property: "hljs-property",
+    Name.Tag: "hljs-name",
+    Name.Variable: "hljs-variable",
+    String: "hljs-string",
+    String.Escape: "hljs-char escape_",
+    String.Interpol: "hljs-subst",
+    String.Regex: "hljs-regexp",
+    String.Symbol: "hljs-symbol",
+    Number: "hljs-number",
+    Operator.Word: "hljs-keyword",
+    Comment: "hljs-comment",
+    Comment.Preproc: "hljs-meta",
+    Comment.PreprocFile: "hljs-string",
+    Generic.Deleted: "hljs-deletion",
+    Generic.Emph: "hljs-emphasis",
+    Generic.Heading: "hljs-section",
+    Generic.Inserted: "hljs-addition",
+    Generic.Prompt: "hljs-meta prompt_",
+    Generic.Strong: "hljs-strong",
+    Generic.Subheading: "hljs-section",
+}
+
+_highlight_cache = LRUCache(
+    max_size=settings.HIGHLIGHT_CACHE_SIZE, name="highlighted_snippets"
+)
+
+
+@lru_cache(maxsize=None)
+def _token_class(token_type: _TokenType) -> str | None:
+    while token_type is not None:
+        if token_type in TOKEN_CLASSES:
+            return TOKEN_CLASSES[token_type]
+        token_type = token_type.parent
+
+    return None
+
+
+@lru_cache(maxsize=None)
+def _get_lexer(language: str) -> Lexer | None:
+    if language in LEXER_NAMES:
+        lexer_name = LEXER_NAMES[language]
+    elif language in SUPPORTED_LANGUAGES.__members__:
+        lexer_name = SUPPORTED_LANGUAGES[language].value[1]
+    else:
+        return None
+
+    if lexer_name is None:
+        return None
+
+    try:
+        # Keep the code exactly as it is, the output must match the copied content
+        return get_lexer_by_name(lexer_name, stripnl=False, ensurenl=False)
+    except ClassNotFound:
+        return None
+
+
+def highlight_code(code: str, language: str) -> str:
+    """
+    Highlight code into html that uses the highlight.js css classes.
+
+    Args:
+        code: The code to highlight
+        language: The snippet language
+
+    Returns:
+        The escaped and highlighted html, to place inside the `<code>` element
+    """
+    lexer = _get_lexer(language)
+    if lexer is None:
+        return escape(code, quote=False)
+
+    output = []
+    # Merge the neighbouring tokens that use the same classes to keep the html small
+    for css_class, tokens in groupby(
+        lex(code, lexer), key=lambda t: _token_class(t[0])
+    ):
+        text = escape("".join(value for _, value in tokens), quote=False)
+        output.append(f'<span class="{css_class}">{text}</span>' if css_class else text)
+
+    return "".join(output)
+
+
+def get_highlighted_snippet(snippet, preview: bool = False) -> Markup | None:
+    """
+    Get the highlighted html of a snippet's content, cached per snippet version.
+
+    Args:
+        snippet: The snippet serializer
+        preview: Highlight the truncated content shown on snippet cards
+
+    Returns:
+        The highlighted html, or None when server-side highlighting is disabled
+    """
+    if not settings.SERVER_SIDE_HIGHLIGHTING or not snippet.content:
+        return None
+
+    key = (snippet.id, snippet.updated_at, preview)
+    highlighted = _highlight_cache.get(key)
+    if highlighted is None:
+        code = snippet.content_truncated if preview else snippet.content
+        highlighted = Markup(highlight_code(code, snippet.language))
+        if snippet.id is not None:
+            _highlight_cache.set(key, highlighted)
+
+    return highlighted
@@ -1,16 +1,29 @@
+import hashlib
 import uuid
 from datetime import datetime, timezone
 from typing import List, Optional
 
 import sqlalchemy as sa
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Mapped, mapped_column, relationship, validates
+from sqlalchemy.orm import (
+    Mapped,
+    load_only,
+    mapped_column,
+    relationship,
+    selectinload,
+    validates,
+)
 
+from app.auth.models import User
 from app.common.constants import SUPPORTED_LANGUAGES
 from app.common.exceptions import ValidationError
 from app.common.models import Base
+from app.common.timing import timed
+
+from .rendering import MARKDOWN_RENDERER_VERSION, render_markdown
+from .serializers import SnippetListSerializer, SnippetSerializer
 
-from .serializers import SnippetSerializer
+CONTENT_PREVIEW_LENGTH = 200
 
 
 # =================================================================================
@@ -40,7 +53,23 @@ class Snippet(Base):
     title: Mapped[str] = mapped_column(sa.String(100), nullable=False)
     subtitle: Mapped[Optional[str]] = mapped_column(sa.String(200), nullable=True)
     description: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+    # Rendered when the description is set, see `app.snippets.rendering`
+    description_html: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+    description_html_version: Mapped[Optional[str]] = mapped_column(
+        sa.String(16), nullable=True
+    )
     content: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+    # Content metadata, set by the `content` validator so read paths never touch `content`
+    content_bytes: Mapped[int] = mapped_column(
+        sa.Integer, default=0, server_default="0", nullable=False
+    )
+    content_lines: Mapped[int] = mapped_column(
+        sa.Integer, default=0, server_default="0", nullable=False
+    )
+    content_hash: Mapped[Optional[str]] = mapped_column(sa.String(64), nullable=True)
+    content_preview: Mapped[Optional[str]] = mapped_column(
+        sa.String(CONTENT_PREVIEW_LENGTH + 3), nullable=True
+    )
     language: Mapped[str] = mapped_column(sa.String(50), nullable=False)
     command_name: Mapped[Optional[str]] = mapped_column(sa.String(32), nullable=True)
     public: Mapped[bool] = mapped_column(sa.Boolean, default=False, nullable=False)
@@ -111,7 +140,15 @@ class Snippet(Base):
         """
         Convert empty strings to None for nullable fields
         """
+        if key == "content" and value is not None:
+            # Normalize line endings once here so the content can be served as-is
+            value = value.replace("\r\n", "\n").replace("\r", "\n")
+
         if value is None or value.strip() == "":
+            if key == "content":
+                self.set_content_metadata(None)
+            if key == "description":
+                self.set_description_html(None)
             return None
 
         if key == "subtitle" and len(value.strip()) > Snippet.subtitle.type.length:
@@ -130,6 +167,12 @@ class Snippet(Base):
                 f"Description cannot be larger than {'{:,}'.format(content_size)} characters"
             )
 
+        if key == "content":
+            self.set_content_metadata(value.strip())
+
+        if key == "description":
+            self.set_description_html(value.strip())
+
         return value.strip()
 
     @validates("command_name")
@@ -150,13 +193,116 @@ class Snippet(Base):
 
         return value.strip()
 
+    def set_content_metadata(self, content: str | None):
+        """
+        Store the size, line count, hash and preview of the content.
+
+        Args:
+            content: The normalized content of the snippet
+        """
+        if content is None:
+            self.content_bytes = 0
+            self.content_lines = 0
+            self.content_hash = None
+            self.content_preview = None
+            return
+
+        encoded = content.encode()
+        self.content_bytes = len(encoded)
+        self.content_lines = content.count("\n") + 1
+        self.content_hash = hashlib.sha256(encoded).hexdigest()
+        self.content_preview = (
+            content[:CONTENT_PREVIEW_LENGTH] + "..."
+            if len(content) > CONTENT_PREVIEW_LENGTH
+            else content
+        )
+
+    def set_description_html(self, description: str | None):
+        """
+        Render the description and store the html with the renderer version used.
+
+        Args:
+            description: The markdown description of the snippet
+        """
+        self.description_html = render_markdown(description)
+        self.description_html_version = (
+            MARKDOWN_RENDERER_VERSION if description else None
+        )
+
+    @staticmethod
+    def build_etag(content_hash: str | None, updated_at: datetime) -> str:
+        """
+        Build the strong ETag of a snippet's content.
+
+        Args:
+            content_hash: A hash of the snippet content
+            updated_at: When the snippet was last updated
+
+        Returns:
+            The quoted ETag value
+        """
+        value = f"{content_hash or ''}:{updated_at.isoformat()}"
+        return f'"{hashlib.sha256(value.encode()).hexdigest()[:32]}"'
+
     def to_serializer(self, user=None):
         is_favorite = self.is_favorite(user.id) if user else False
-        return SnippetSerializer(
-            **self.as_dict,
+        with timed("serialize"):
+            return SnippetSerializer(
+                **self.as_dict,
+                is_favorite=is_favorite,
+            )
+
+    def to_list_serializer(self, is_favorite: bool = False):
+        """
+        Build the lean list projection of the snippet.
+        Only reads the columns that are loaded by `Snippet.list_load_options`.
+        """
+        return SnippetListSerializer(
+            id=self.id,
+            title=self.title,
+            subtitle=self.subtitle,
+            language=self.language,
+            content_bytes=self.content_bytes,
+            content_lines=self.content_lines,
+            command_name=self.command_name,
+            public=self.public,
+            archived=self.archived,
+            tags=self.tags,
+            user_id=self.user_id,
+            user_display_name=self.user.display_name if self.user else None,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+            forked_from_id=self.forked_from_id,
+            is_fork=self.is_fork,
             is_favorite=is_favorite,
         )
 
+    @classmethod
+    def list_load_options(cls):
+        """
+        Loader options for the lean list projection, skips the large text columns.
+        """
+        return (
+            load_only(
+                cls.id,
+                cls.created_at,
+                cls.updated_at,
+                cls.title,
+                cls.subtitle,
+                cls.language,
+                cls.content_bytes,
+                cls.content_lines,
+                cls.command_name,
+                cls.public,
+                cls.archived,
+                cls.user_id,
+                cls.forked_from_id,
+                cls.is_fork,
+            ),
+            selectinload(cls.user).load_only(User.id, User.display_name),
+            selectinload(cls.tags),
+        )
+
     def is_favorite(self, user_id):
         """
         Check if the snippet is favorited by a user.
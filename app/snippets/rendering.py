@@ -0,0 +1,78 @@
+import hashlib
+import json
+import queue
+from importlib.metadata import version
+
+import markdown
+
+from app.common.timing import timed
+
+MARKDOWN_EXTENSIONS = [
+    "pymdownx.extra",
+    "pymdownx.tasklist",
+    "sane_lists",
+]
+
+# Stored next to the rendered html of each description.
+# Changes whenever the extensions or the version of a markdown library changes,
+#   so rows rendered with an older renderer can be found and rendered again.
+MARKDOWN_RENDERER_VERSION = hashlib.sha256(
+    json.dumps(
+        [
+            MARKDOWN_EXTENSIONS,
+            version("markdown"),
+            version("pymdown-extensions"),
+        ]
+    ).encode()
+).hexdigest()[:16]
+
+
+class MarkdownRendererPool:
+    """
+    Thread-safe pool of reusable Markdown renderers.
+
+    Creating a `markdown.Markdown` instance loads all of its extensions, which is slower than
+    rendering most descriptions. Each render takes an idle instance from the pool (or creates a
+    new one if they are all in use) and puts it back when done, so an instance is never used by
+    two threads at the same time.
+    """
+
+    def __init__(self, extensions: list[str], max_size: int = 8):
+        self.extensions = extensions
+        self._pool = queue.Queue(maxsize=max_size)
+
+    def render(self, text: str) -> str:
+        try:
+            renderer = self._pool.get_nowait()
+        except queue.Empty:
+            renderer = markdown.Markdown(extensions=self.extensions)
+
+        try:
+            return renderer.convert(text)
+        finally:
+            # Clear the state (footnotes, abbreviations, ...) left by the last document
+            renderer.reset()
+            try:
+                self._pool.put_nowait(renderer)
+            except queue.Full:
+                pass
+
+
+_renderer_pool = MarkdownRendererPool(MARKDOWN_EXTENSIONS)
+
+
+def render_markdown(text: str | None) -> str | None:
+    """
+    Render a snippet description to html.
+
+    Args:
+        text: The markdown source
+
+    Returns:
+        The rendered html, or None if there is no text
+    """
+    if not text:
+        return None
+
+    with timed("markdown"):
+        return _renderer_pool.render(text)
@@ -2,9 +2,13 @@ import re
 from typing import ClassVar, List, Optional
 
 from pydantic import BaseModel
+from sqlalchemy import Select, or_
 
+from app.auth.models import User
 from app.common.constants import SUPPORTED_LANGUAGES
 
+from .models import Snippet, Tag
+
 # Allow for different keys to be used for the same search filter
 SEARCH_KEY_MAP = {
     "languages": "languages",
@@ -118,6 +122,80 @@ class SnippetsSearchParser(BaseModel):
                 if match:
                     self._add_search_term(match)
 
+    def apply_filters(self, items_query: Select, user: User | None = None) -> Select:
+        """
+        Apply the parsed filters and search terms to a snippets query.
+
+        Args:
+            items_query: The select query on `Snippet` to filter
+            user: The current user, used by the `is:mine` and `is:favorite` filters
+
+        Returns:
+            The filtered query
+        """
+        for lang in self.languages:
+            items_query = items_query.where(Snippet.language == lang)
+
+        for tag in self.tags:
+            items_query = items_query.where(Snippet.tags.any(Tag.name.ilike(tag)))
+
+        if self.is_mine and user:
+            items_query = items_query.where(Snippet.user_id == user.id)
+
+        if self.is_public:
+            items_query = items_query.where(Snippet.public)
+
+        if self.is_fork:
+            items_query = items_query.where(Snippet.is_fork)
+
+        if self.is_favorite and user:
+            items_query = items_query.where(
+                Snippet.favorited_by.any(User.id == user.id)
+            )
+
+        if self.is_command:
+            items_query = items_query.where(Snippet.command_name.isnot(None))
+
+        if self.is_archived:
+            items_query = items_query.where(Snippet.archived)
+        else:
+            items_query = items_query.where(Snippet.archived.is_(False))
+
+        if len(self.search_terms) > 0:
+            filter_fields = (
+                Snippet.title,
+                Snippet.description,
+                Snippet.content,
+                Snippet.command_name,
+                Snippet.subtitle,
+                Snippet.language,
+            )
+
+            for term in self.search_terms:
+                should_exact_match = term.startswith('"') and term.endswith('"')
+
+                # https://www.postgresql.org/docs/current/functions-matching.html#POSIX-CONSTRAINT-ESCAPES-TABLE
+                if should_exact_match:
+                    term = term[1:-1]
+                    term_regex = (
+                        rf"\y{term}\y"  # Match whole word - \y is a word boundary
+                    )
+                    tag_conditions = [Snippet.tags.any(Tag.name == term.lower())]
+                else:
+                    term_regex = rf".*{term}.*"  # Match any part of the word
+                    tag_conditions = [Snippet.tags.any(Tag.name.ilike(f"%{term}%"))]
+
+                op = "~*"  # Case-INsensitive regex match
+                string_conditions = [
+                    field.op(op)(term_regex) for field in filter_fields
+                ]
+
+                items_query = items_query.where(
+                    or_(*string_conditions, *tag_conditions)
+                )
+
+        return items_query
+
     def _add_language(self, input_lang: str):
         language = self._lookup_language(input_lang) or input_lang
 
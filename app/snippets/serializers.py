@@ -1,12 +1,13 @@
 from datetime import datetime
 from typing import List, Optional
 
-import markdown
-from pydantic import BaseModel, ConfigDict, ValidationInfo, field_validator
+from pydantic import BaseModel, ConfigDict, Field, ValidationInfo, field_validator
 
 from app.auth.models import User
 from app.auth.serializers import UserSerializer
 
+from .rendering import MARKDOWN_RENDERER_VERSION, render_markdown
+
 
 class SnippetSerializer(BaseModel):
     """
@@ -19,8 +20,13 @@ class SnippetSerializer(BaseModel):
     title: Optional[str] = None
     subtitle: Optional[str] = None
     content: Optional[str] = None
+    content_bytes: Optional[int] = 0
+    content_lines: Optional[int] = 0
+    content_preview: Optional[str] = None
     language: Optional[str] = None
     description: Optional[str] = None
+    description_html: Optional[str] = Field(None, exclude=True)
+    description_html_version: Optional[str] = Field(None, exclude=True)
     command_name: Optional[str] = None
     public: Optional[bool] = False
     archived: Optional[bool] = False
@@ -64,6 +70,9 @@ class SnippetSerializer(BaseModel):
 
     @property
     def content_truncated(self):
+        if self.content_preview is not None:
+            return self.content_preview
+
         if self.content is None:
             return ""
 
@@ -71,15 +80,115 @@ class SnippetSerializer(BaseModel):
 
     @property
     def html_description(self):
-        return (
-            markdown.markdown(
-                self.description,
-                extensions=[
-                    "pymdownx.extra",
-                    "pymdownx.tasklist",
-                    "sane_lists",
-                ],
-            )
-            if self.description
-            else None
-        )
+        # Use the html rendered on save, unless it was rendered by an older renderer
+        if (
+            self.description_html is not None
+            and self.description_html_version == MARKDOWN_RENDERER_VERSION
+        ):
+            return self.description_html
+
+        return render_markdown(self.description)
+
+
+class SnippetListSerializer(BaseModel):
+    """
+    Lean projection of a snippet used for list responses.
+    Does not include the content or description so they never need to be loaded.
+    """
+
+    model_config = ConfigDict(extra="ignore")
+
+    id: str
+    title: str
+    subtitle: Optional[str] = None
+    language: str
+    content_bytes: int = 0
+    content_lines: int = 0
+    command_name: Optional[str] = None
+    public: bool = False
+    archived: bool = False
+    tags: List[str] = []
+    user_id: str
+    user_display_name: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    forked_from_id: Optional[str] = None
+    is_fork: bool = False
+    is_favorite: bool = False
+
+    @field_validator("id", "user_id", "forked_from_id", mode="before")
+    def uuid_to_str(cls, v: str, info: ValidationInfo) -> str:
+        if v is None:
+            return None
+        return str(v)
+
+    @field_validator("tags", mode="before")
+    def tags_to_list(
+        cls,
+        tags: List[str] | List["app.snippets.models.Tag"] | None,  # noqa: F821 # type: ignore
+        info: ValidationInfo,
+    ) -> List[str]:
+        if not tags:
+            return []
+
+        if hasattr(tags[0], "name"):
+            return [tag.name for tag in tags]  # type: ignore
+
+        return tags  # type: ignore
+
+
+class SnippetCreateSerializer(BaseModel):
+    """
+    Request body used to create a snippet through the API
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    title: str
+    content: str
+    language: str
+    subtitle: Optional[str] = None
+    description: Optional[str] = None
+    command_name: Optional[str] = None
+    tags: List[str] = Field(default_factory=list)
+    public: bool = False
+    archived: bool = False
+
+
+class SnippetUpdateSerializer(BaseModel):
+    """
+    Request body used to update a snippet through the API.
+    Only the fields that are set will be updated.
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    title: Optional[str] = None
+    content: Optional[str] = None
+    language: Optional[str] = None
+    subtitle: Optional[str] = None
+    description: Optional[str] = None
+    command_name: Optional[str] = None
+    tags: Optional[List[str]] = None
+    public: Optional[bool] = None
+    archived: Optional[bool] = None
+
+    @field_validator("title", "language", "public", "archived")
+    @classmethod
+    def not_null(cls, value, info: ValidationInfo):
+        """
+        The fields that can't be empty are left out to keep their value, not set to null
+        """
+        if value is None:
+            raise ValueError(f"{info.field_name} cannot be null")
+        return value
+
+
+class CommandsFetchSerializer(BaseModel):
+    """
+    Request body used to get the content of multiple command snippets
+    """
+
+    model_config = ConfigDict(extra="forbid")
+
+    command_names: List[str] = Field(..., max_length=100)
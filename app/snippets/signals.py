@@ -1,8 +1,10 @@
-from sqlalchemy import event, select
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session, object_session
 
 from app.common import utils
 from app.common.db import async_session_maker
 from app.common.exceptions import ValidationError
+from app.common.response_cache import response_cache
 from app.snippets.models import Snippet
 
 
@@ -50,3 +52,25 @@ def snippet_before_upsert(mapper, connection, target):
 
     if found_existing:
         raise ValidationError("Command name already exists for this user")
+
+
+@event.listens_for(Snippet, "after_insert")
+@event.listens_for(Snippet, "after_update")
+@event.listens_for(Snippet, "after_delete")
+def snippet_after_change(mapper, connection, target):
+    # Public snippets are in the cached anonymous pages, invalidated once the change is committed
+    was_public = True in inspect(target).attrs.public.history.deleted
+    session = object_session(target)
+    if (target.public or was_public) and session is not None:
+        session.info["invalidate_response_cache"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_response_cache(session):
+    if session.info.pop("invalidate_response_cache", False):
+        response_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def discard_response_cache_invalidation(session):
+    session.info.pop("invalidate_response_cache", None)
@@ -0,0 +1,72 @@
+import asyncio
+
+from loguru import logger
+from sqlalchemy import and_, select, update
+
+from app.common.db import async_session_maker
+
+from .models import Snippet
+from .rendering import MARKDOWN_RENDERER_VERSION, render_markdown
+
+
+async def rerender_stale_descriptions(batch_size: int = 100) -> int:
+    """
+    Render again the descriptions that were rendered with an older markdown renderer.
+
+    Runs in batches in the background, until a description is re-rendered the html is rendered
+    on the fly when it is displayed.
+
+    Args:
+        batch_size: Number of snippets to render per transaction
+
+    Returns:
+        The number of snippets that were rendered
+    """
+    is_stale = and_(
+        Snippet.description.isnot(None),
+        Snippet.description_html_version.is_distinct_from(MARKDOWN_RENDERER_VERSION),
+    )
+    total = 0
+    while True:
+        async with async_session_maker() as session:
+            result = await session.execute(
+                select(Snippet.id, Snippet.description)
+                .where(is_stale)
+                .order_by(Snippet.id)
+                .limit(batch_size)
+            )
+            rows = result.all()
+            if not rows:
+                break
+
+            # Render in a thread so large descriptions don't block the event loop
+            rendered = await asyncio.to_thread(
+                lambda: [(row, render_markdown(row.description)) for row in rows]
+            )
+            for row, description_html in rendered:
+                await session.execute(
+                    update(Snippet)
+                    # Skip snippets that were edited (and rendered) in the meantime
+                    .where(
+                        Snippet.id == row.id,
+                        Snippet.description == row.description,
+                        is_stale,
+                    )
+                    .values(
+                        description_html=description_html,
+                        description_html_version=MARKDOWN_RENDERER_VERSION,
+                        # Not a change to the snippet, keep the same ETag and sort order
+                        updated_at=Snippet.updated_at,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            await session.commit()
+
+        total += len(rows)
+        if len(rows) < batch_size:
+            break
+
+    if total:
+        logger.info(f"Rendered {total} snippet descriptions with the current renderer")
+
+    return total
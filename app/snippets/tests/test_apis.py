@@ -0,0 +1,268 @@
+"""
+Requests to the JSON API (v1). Needs the database, the tests are skipped when it is not
+available.
+"""
+
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import delete
+from starlette.testclient import TestClient
+
+from app.app import app
+from app.auth.models import APIKey, User
+from app.common.db import async_session_maker
+from app.common.testing import require_database
+from app.snippets.models import Snippet
+
+client = TestClient(app)
+
+
+async def _create_data() -> dict:
+    suffix = uuid.uuid4().hex[:8]
+    async with async_session_maker() as session:
+        users, api_keys = [], []
+        for name in ("owner", "other"):
+            user = User(email=f"api-{name}-{suffix}@example.com", display_name=name)
+            api_key = APIKey(key=f"api-{name}-{suffix}", name=name, user=user)
+            session.add_all([user, api_key])
+            users.append(user)
+            api_keys.append(api_key)
+        await session.flush()
+
+        public, private = (
+            Snippet(
+                title=title,
+                content=f"echo {title}",
+                language="BASH",
+                public=title == "public",
+                user_id=users[1].id,
+            )
+            for title in ("public", "private")
+        )
+        session.add_all([public, private])
+        await session.commit()
+
+        return {
+            "suffix": suffix,
+            "user_ids": [user.id for user in users],
+            "owner": {"X-API-Key": api_keys[0].key},
+            "other": {"X-API-Key": api_keys[1].key},
+            "public": str(public.id),
+            "private": str(private.id),
+        }
+
+
+async def _delete_data(user_ids: list[uuid.UUID]):
+    async with async_session_maker() as session:
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+        await session.commit()
+
+
+@pytest.fixture(scope="module")
+def data():
+    require_database()
+    data = asyncio.run(_create_data())
+    yield data
+    asyncio.run(_delete_data(data["user_ids"]))
+
+
+def _create(data: dict, **fields) -> dict:
+    body = {"title": "Snippet", "content": "echo hello", "language": "BASH", **fields}
+    response = client.post("/api/v1/snippets", json=body, headers=data["owner"])
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+def test_api_key_is_required(data):
+    assert client.get("/api/v1/snippets").status_code == 422
+
+    response = client.get("/api/v1/snippets", headers={"X-API-Key": "invalid"})
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Invalid API key"}
+
+
+def test_create_snippet(data):
+    snippet = _create(data, title=" Created ", tags=["Docker", "docker", "k8s"])
+
+    assert snippet["title"] == "Created"
+    assert snippet["tags"] == ["docker", "k8s"]
+    assert snippet["public"] is False
+    assert "email" not in snippet["user"]
+
+    response = client.get(f"/api/v1/snippets/{snippet['id']}", headers=data["owner"])
+    assert response.json()["content"] == "echo hello"
+
+
+@pytest.mark.parametrize(
+    "body, status_code",
+    [
+        ({"content": "echo", "language": "BASH"}, 422),
+        ({"title": "t", "content": "echo", "language": "BASH", "user_id": "1"}, 422),
+        ({"title": " ", "content": "echo", "language": "BASH"}, 400),
+        ({"title": "t", "content": "echo", "language": "COBOL"}, 400),
+        (
+            {
+                "title": "t",
+                "content": "echo",
+                "language": "BASH",
+                "command_name": "a b",
+            },
+            400,
+        ),
+    ],
+    ids=["missing title", "unknown field", "blank title", "language", "command name"],
+)
+def test_create_snippet_errors(data, body, status_code):
+    response = client.post("/api/v1/snippets", json=body, headers=data["owner"])
+
+    assert response.status_code == status_code
+    assert "detail" in response.json()
+
+
+def test_update_snippet(data):
+    snippet = _create(data, tags=["docker"], subtitle="subtitle")
+    url = f"/api/v1/snippets/{snippet['id']}"
+
+    response = client.patch(
+        url, json={"title": "Updated", "tags": ["git"]}, headers=data["owner"]
+    )
+    assert response.status_code == 200
+    assert response.json()["title"] == "Updated"
+    assert response.json()["tags"] == ["git"]
+    # The fields that are not set keep their value, the nullable ones can be cleared
+    assert response.json()["subtitle"] == "subtitle"
+    response = client.patch(url, json={"subtitle": None}, headers=data["owner"])
+    assert response.json()["subtitle"] is None
+    assert response.json()["content"] == "echo hello"
+
+
+@pytest.mark.parametrize(
+    "body, status_code",
+    [
+        ({"public": None}, 422),
+        ({"archived": None}, 422),
+        ({"title": None}, 422),
+        ({"language": None}, 422),
+        ({"title": ""}, 400),
+        ({"owner": "someone"}, 422),
+    ],
+    ids=[
+        "null public",
+        "null archived",
+        "null title",
+        "null language",
+        "blank",
+        "unknown",
+    ],
+)
+def test_update_snippet_errors(data, body, status_code):
+    snippet = _create(data)
+    url = f"/api/v1/snippets/{snippet['id']}"
+
+    response = client.patch(url, json=body, headers=data["owner"])
+    assert response.status_code == status_code
+
+    # Unchanged
+    assert client.get(url, headers=data["owner"]).json()["title"] == "Snippet"
+
+
+def test_only_the_owner_can_change_a_snippet(data):
+    url = f"/api/v1/snippets/{data['public']}"
+
+    # Visible, but not editable by the other users
+    assert client.get(url, headers=data["owner"]).status_code == 200
+    response = client.patch(url, json={"title": "Mine"}, headers=data["owner"])
+    assert response.status_code == 404
+    assert client.delete(url, headers=data["owner"]).status_code == 404
+
+    private_url = f"/api/v1/snippets/{data['private']}"
+    assert client.get(private_url, headers=data["owner"]).status_code == 404
+    assert client.get(private_url, headers=data["other"]).status_code == 200
+    assert client.get(url, headers=data["other"]).json()["title"] == "public"
+
+
+def test_delete_snippet(data):
+    snippet = _create(data)
+    url = f"/api/v1/snippets/{snippet['id']}"
+
+    response = client.delete(url, headers=data["owner"])
+    assert response.status_code == 204
+    assert client.get(url, headers=data["owner"]).status_code == 404
+    assert client.delete(url, headers=data["owner"]).status_code == 404
+
+
+def test_search_snippets(data):
+    tag = f"search-{data['suffix']}"
+    found = [_create(data, title=f"Found {i}", tags=[tag]) for i in range(3)]
+    _create(data, title="Other tag", tags=["other"])
+
+    response = client.get(
+        "/api/v1/snippets",
+        params={"q": f"tag:{tag}", "page_size": 2},
+        headers=data["owner"],
+    )
+    assert response.status_code == 200
+    page = response.json()
+    assert (page["total"], page["pages"], page["page_size"]) == (3, 2, 2)
+    # The most recently updated first
+    assert [item["id"] for item in page["items"]] == [found[2]["id"], found[1]["id"]]
+    # The lean projection, without the content
+    assert "content" not in page["items"][0]
+
+    response = client.get(
+        "/api/v1/snippets",
+        params={"scope": "explore", "page_size": 100},
+        headers=data["owner"],
+    )
+    ids = {item["id"] for item in response.json()["items"]}
+    assert data["private"] not in ids
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{"page_size": 101}, {"page": 0}, {"scope": "everything"}],
+    ids=["page size", "page", "scope"],
+)
+def test_search_snippets_errors(data, params):
+    response = client.get("/api/v1/snippets", params=params, headers=data["owner"])
+    assert response.status_code == 422
+
+
+def test_batch(data):
+    snippet = _create(data)
+    unknown = str(uuid.uuid4())
+
+    response = client.get(
+        "/api/v1/snippets/batch",
+        params={
+            "ids": [
+                snippet["id"],
+                data["public"],
+                data["private"],
+                unknown,
+                data["public"],
+            ]
+        },
+        headers=data["owner"],
+    )
+    assert response.status_code == 200
+    batch = response.json()
+    assert [item["id"] for item in batch["items"]] == [snippet["id"], data["public"]]
+    # Not visible to the user, or not found
+    assert batch["missing"] == [data["private"], unknown]
+
+
+def test_batch_errors(data):
+    response = client.get(
+        "/api/v1/snippets/batch",
+        params={"ids": [str(uuid.uuid4()) for _ in range(101)]},
+        headers=data["owner"],
+    )
+    assert response.status_code == 422
+
+    response = client.get(
+        "/api/v1/snippets/batch", params={"ids": "not-a-uuid"}, headers=data["owner"]
+    )
+    assert response.status_code == 422
@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta, timezone
+
+from jinja2 import DictLoader, Environment, pass_context
+from starlette.requests import Request
+
+from app.snippets.fragments import (
+    SNIPPET_CARD_TEMPLATE,
+    render_snippet_card,
+    snippet_card_cache,
+)
+from app.snippets.serializers import SnippetSerializer
+
+
+def _render(snippets, query_string=b""):
+    renders = []
+    env = Environment(
+        loader=DictLoader(
+            {
+                "index.html": "{% for snippet in snippets %}{{ card(snippet) }}{% endfor %}",
+                SNIPPET_CARD_TEMPLATE: "{{ count() }}<b>{{ snippet.title }}</b>",
+            }
+        ),
+        autoescape=True,
+    )
+    env.globals["card"] = pass_context(render_snippet_card)
+    env.globals["count"] = lambda: renders.append(1) or ""
+
+    request = Request(
+        {
+            "type": "http",
+            "scheme": "http",
+            "server": ("localhost", 8000),
+            "path": "/snippets/",
+            "root_path": "",
+            "query_string": query_string,
+            "headers": [],
+        }
+    )
+    html = env.get_template("index.html").render(
+        request=request, user=None, snippets=snippets
+    )
+    return html, len(renders)
+
+
+def test_unchanged_cards_are_reused():
+    snippet_card_cache.clear()
+    updated_at = datetime.now(timezone.utc)
+    snippets = [
+        SnippetSerializer(id=f"snippet-{i}", title=f"<{i}>", updated_at=updated_at)
+        for i in range(3)
+    ]
+
+    html, renders = _render(snippets)
+    assert html == "<b>&lt;0&gt;</b><b>&lt;1&gt;</b><b>&lt;2&gt;</b>"
+    assert renders == 3
+
+    # The cache is shared with the other tests rendering pages
+    hits = snippet_card_cache.stats["hits"]
+    assert _render(snippets) == (html, 0)
+    assert snippet_card_cache.stats["hits"] == hits + 3
+
+    # Updated snippets and other tabs render the cards again
+    snippets[0] = snippets[0].model_copy(
+        update={"title": "new", "updated_at": updated_at + timedelta(seconds=1)}
+    )
+    html, renders = _render(snippets)
+    assert html.startswith("<b>new</b>")
+    assert renders == 1
+    assert _render(snippets, b"tab=mine")[1] == 3
+
+
+def test_cards_are_rendered_again_when_the_tags_change():
+    snippet_card_cache.clear()
+    snippet = SnippetSerializer(
+        id="snippet",
+        title="title",
+        tags=["docker"],
+        updated_at=datetime.now(timezone.utc),
+    )
+    assert _render([snippet])[1] == 1
+    assert _render([snippet])[1] == 0
+
+    # A tag-only edit keeps the `updated_at` of the snippet
+    snippet = snippet.model_copy(update={"tags": ["docker", "k8s"]})
+    assert _render([snippet])[1] == 1
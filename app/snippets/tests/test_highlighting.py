@@ -0,0 +1,13 @@
+from app.snippets.highlighting import highlight_code
+
+
+def test_highlight_code_uses_hljs_classes():
+    html = highlight_code('def run():\n    return "<b>"\n', "PYTHON")
+
+    assert '<span class="hljs-keyword">def</span>' in html
+    assert '<span class="hljs-title function_">run</span>' in html
+    assert '<span class="hljs-string">"&lt;b&gt;"</span>' in html
+
+
+def test_highlight_code_plain_text():
+    assert highlight_code("a < b\r\n", "PLAINTEXT") == "a &lt; b\r\n"
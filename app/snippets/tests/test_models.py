@@ -0,0 +1,25 @@
+from app.snippets.models import Snippet
+from app.snippets.rendering import MARKDOWN_RENDERER_VERSION
+
+
+def test_content_metadata():
+    snippet = Snippet(content="echo one\r\necho two\r\n" + "x" * 300)
+
+    assert "\r" not in snippet.content
+    assert snippet.content_bytes == len(snippet.content.encode())
+    assert snippet.content_lines == 3
+    assert len(snippet.content_hash) == 64
+    assert snippet.content_preview == snippet.content[:200] + "..."
+
+    snippet.content = "  "
+    assert snippet.content is None
+    assert snippet.content_bytes == 0
+    assert snippet.content_hash is None
+
+
+def test_description_html():
+    snippet = Snippet(description="# Title\n\n- [x] done")
+
+    assert snippet.description_html.startswith("<h1>Title</h1>")
+    assert snippet.description_html_version == MARKDOWN_RENDERER_VERSION
+    assert snippet.to_serializer().html_description == snippet.description_html
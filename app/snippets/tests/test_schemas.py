@@ -41,6 +41,10 @@ This is a test description
 
     assert snippet.model_dump() == {
         **expects_data,
+        "content_bytes": 0,
+        "content_lines": 0,
+        "content_preview": None,
+        "archived": False,
         "forked_from_id": None,
         "is_fork": False,
         "is_favorite": False,
@@ -17,7 +17,7 @@ from app.common.exceptions import ValidationError
 from app.common.templates import templates
 from app.common.utils import flash
 
-from .models import Snippet, Tag
+from .models import Snippet
 from .search import SnippetsSearchParser
 from .serializers import SnippetSerializer
 
@@ -57,23 +57,37 @@ class Tab:
 
 
 # --------------------------------------------------------------------------------------------------------------
-# GET | Snippets Index View
+# Index Context
 # --------------------------------------------------------------------------------------------------------------
-@router.get("/", name="snippets.index")
-async def index(
+async def get_index_context(
     request: Request,
-    user: User | None = Depends(optional_current_user),
-    session: AsyncSession = Depends(get_async_session),
-    q: str = "",
-    selected_id: uuid.UUID | str | None = None,
-    tab: str | None = None,
-    page: int = 1,
-    page_size: int = 20,
-):
+    user: User | None,
+    session: AsyncSession,
+    q: str,
+    selected_id: uuid.UUID | str | None,
+    tab: str | None,
+    page: int,
+    page_size: int,
+    partial: bool = False,
+) -> dict | RedirectResponse:
+    """
+    Search the snippets of a tab and build the context of the index page.
+
+    Args:
+        partial: Building the panes only, an unknown `selected_id` selects the first
+            snippet of the page instead of redirecting
+
+    Returns:
+        The template context, or a redirect when the params are not valid
+    """
     if not tab:
         tab = Tab.MINE if user else Tab.EXPLORE
 
     if tab is None or tab not in Tab.order:
+        if partial:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Tab not found"
+            )
         return RedirectResponse(request.url_for("snippets.index"))
 
     tabs = [
@@ -110,83 +124,28 @@ async def index(
         elif tab == Tab.MINE:
             items_query = items_query.where(Snippet.user_id == user.id)
     else:
-        return templates.TemplateResponse(
-            request,
-            "snippets/templates/index.html",
-            {
-                "tabs": tabs,
-                "selected_tab": tab,
-                "supported_tabs": Tab,
-                "snippets": [],
-                "selected_snippet": None,
-                "search_context": search_query,
-                "pagination_context": {
-                    "total_pages": 0,
-                    "total_items": 0,
-                    "page_size": 0,
-                    "page": 1,
-                    "start_index": 0,
-                    "end_index": 0,
-                    "has_next": False,
-                    "has_prev": False,
-                    "next_page_url": None,
-                    "prev_page_url": None,
-                },
+        return {
+            "tabs": tabs,
+            "selected_tab": tab,
+            "supported_tabs": Tab,
+            "snippets": [],
+            "selected_snippet": None,
+            "search_context": search_query,
+            "pagination_context": {
+                "total_pages": 0,
+                "total_items": 0,
+                "page_size": 0,
+                "page": 1,
+                "start_index": 0,
+                "end_index": 0,
+                "has_next": False,
+                "has_prev": False,
+                "next_page_url": None,
+                "prev_page_url": None,
             },
-        )
-
-    for lang in search_query.languages:
-        items_query = items_query.where(Snippet.language == lang)
-
-    for tag in search_query.tags:
-        items_query = items_query.where(Snippet.tags.any(Tag.name.ilike(tag)))
-
-    if search_query.is_mine and user:
-        items_query = items_query.where(Snippet.user_id == user.id)
-
-    if search_query.is_public:
-        items_query = items_query.where(Snippet.public)
-
-    if search_query.is_fork:
-        items_query = items_query.where(Snippet.is_fork)
-
-    if search_query.is_favorite and user:
-        items_query = items_query.where(Snippet.favorited_by.any(User.id == user.id))
-
-    if search_query.is_command:
-        items_query = items_query.where(Snippet.command_name.isnot(None))
-
-    if search_query.is_archived:
-        items_query = items_query.where(Snippet.archived)
-    else:
-        items_query = items_query.where(Snippet.archived.is_(False))
-
-    if len(search_query.search_terms) > 0:
-        filter_fields = (
-            Snippet.title,
-            Snippet.description,
-            Snippet.content,
-            Snippet.command_name,
-            Snippet.subtitle,
-            Snippet.language,
-        )
-
-        for term in search_query.search_terms:
-            should_exact_match = term.startswith('"') and term.endswith('"')
-
-            # https://www.postgresql.org/docs/current/functions-matching.html#POSIX-CONSTRAINT-ESCAPES-TABLE
-            if should_exact_match:
-                term = term[1:-1]
-                term_regex = rf"\y{term}\y"  # Match whole word - \y is a word boundary
-                tag_conditions = [Snippet.tags.any(Tag.name == term.lower())]
-            else:
-                term_regex = rf".*{term}.*"  # Match any part of the word
-                tag_conditions = [Snippet.tags.any(Tag.name.ilike(f"%{term}%"))]
-
-            op = "~*"  # Case-INsensitive regex match
-            string_conditions = [field.op(op)(term_regex) for field in filter_fields]
+        }
 
-            items_query = items_query.where(or_(*string_conditions, *tag_conditions))
+    items_query = search_query.apply_filters(items_query, user)
 
     items_query = items_query.order_by(Snippet.updated_at.desc())
 
@@ -205,7 +164,7 @@ async def index(
                 selected_snippet = snippet
                 break
 
-        if not selected_snippet:
+        if not selected_snippet and not partial:
             return RedirectResponse(
                 request.url_for("snippets.index").include_query_params(
                     tab=tab,
@@ -246,29 +205,72 @@ async def index(
     start_index = (page_data.page * page_data.size) - (page_data.size - 1)
     end_index = start_index + len(page_data.items) - 1
 
-    return templates.TemplateResponse(
-        request,
-        "snippets/templates/index.html",
-        {
-            "tabs": tabs,
-            "selected_tab": tab,
-            "supported_tabs": Tab,
-            "snippets": snippet_list,
-            "selected_snippet": selected_snippet,
-            "search_context": search_query,
-            "pagination_context": {
-                "total_pages": page_data.pages,
-                "total_items": page_data.total,
-                "page_size": page_data.size,
-                "page": page_data.page,
-                "start_index": start_index,
-                "end_index": end_index,
-                "has_next": has_next,
-                "has_prev": has_prev,
-                "next_page_url": next_page_url,
-                "prev_page_url": prev_page_url,
-            },
+    return {
+        "tabs": tabs,
+        "selected_tab": tab,
+        "supported_tabs": Tab,
+        "snippets": snippet_list,
+        "selected_snippet": selected_snippet,
+        "search_context": search_query,
+        "pagination_context": {
+            "total_pages": page_data.pages,
+            "total_items": page_data.total,
+            "page_size": page_data.size,
+            "page": page_data.page,
+            "start_index": start_index,
+            "end_index": end_index,
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "next_page_url": next_page_url,
+            "prev_page_url": prev_page_url,
         },
+    }
+
+
+# --------------------------------------------------------------------------------------------------------------
+# GET | Snippets Index View
+# --------------------------------------------------------------------------------------------------------------
+@router.get("/", name="snippets.index")
+async def index(
+    request: Request,
+    user: User | None = Depends(optional_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    q: str = "",
+    selected_id: uuid.UUID | str | None = None,
+    tab: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+):
+    context = await get_index_context(
+        request, user, session, q, selected_id, tab, page, page_size
+    )
+    if isinstance(context, RedirectResponse):
+        return context
+
+    return templates.TemplateResponse(request, "snippets/templates/index.html", context)
+
+
+# --------------------------------------------------------------------------------------------------------------
+# GET | Snippets Index Panes
+#   The tabs, list and selected snippet of the index page, without the rest of the page.
+#   Used to change the tab or the page without loading the whole page.
+# --------------------------------------------------------------------------------------------------------------
+@router.get("/partials/list", name="snippets.partials.list")
+async def index_panes(
+    request: Request,
+    user: User | None = Depends(optional_current_user),
+    session: AsyncSession = Depends(get_async_session),
+    q: str = "",
+    selected_id: uuid.UUID | str | None = None,
+    tab: str | None = None,
+    page: int = 1,
+    page_size: int = 20,
+):
+    context = await get_index_context(
+        request, user, session, q, selected_id, tab, page, page_size, partial=True
+    )
+    return templates.TemplateResponse(
+        request, "snippets/templates/_partials/snippet_panes.html", context
     )
 
 
@@ -440,13 +442,15 @@ async def create_snippet_post(
 #      - View a single snippet
 #
 # =================================================================================
-@router.get("/{id}", name="snippet.view")
-async def view_snippet(
-    request: Request,
-    id: str | uuid.UUID,
-    user: Optional[User] = Depends(optional_current_user),
-    session: AsyncSession = Depends(get_async_session),
-):
+async def get_visible_snippet(
+    session: AsyncSession, id: str | uuid.UUID, user: Optional[User]
+) -> Snippet:
+    """
+    Get a snippet by its id, if it is public or owned by the user.
+
+    Raises:
+        HTTPException: 404 if the snippet does not exist or can't be viewed by the user
+    """
     if isinstance(id, str):
         try:
             id = uuid.UUID(id)
@@ -475,6 +479,18 @@ async def view_snippet(
             status_code=status.HTTP_404_NOT_FOUND, detail="Snippet not found"
         )
 
+    return snippet
+
+
+@router.get("/{id}", name="snippet.view")
+async def view_snippet(
+    request: Request,
+    id: str | uuid.UUID,
+    user: Optional[User] = Depends(optional_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    snippet = await get_visible_snippet(session, id, user)
+
     return templates.TemplateResponse(
         request,
         "snippets/templates/snippet.html",
@@ -484,6 +500,28 @@ async def view_snippet(
     )
 
 
+# --------------------------------------------------------------------------------------------------------------
+# GET | Snippet Detail Pane
+#   The selected snippet pane of the index page, loaded when another snippet is selected
+# --------------------------------------------------------------------------------------------------------------
+@router.get("/{id}/partials/detail", name="snippet.partials.detail")
+async def view_snippet_pane(
+    request: Request,
+    id: str | uuid.UUID,
+    user: Optional[User] = Depends(optional_current_user),
+    session: AsyncSession = Depends(get_async_session),
+):
+    snippet = await get_visible_snippet(session, id, user)
+
+    return templates.TemplateResponse(
+        request,
+        "snippets/templates/_partials/snippet_detail.html",
+        {
+            "selected_snippet": snippet.to_serializer(user),
+        },
+    )
+
+
 # =================================================================================
 #
 # Edit Snippet
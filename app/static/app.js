@@ -8,6 +8,8 @@ import useMarkdownEditor from "./scripts/useMarkdownEditor.js";
 import useTagsInput from "./scripts/useTagsInput.js";
 import useSelectDropdown from "./scripts/useSelectDropdown.js";
 import useFavoriteBtn from "./scripts/useFavoriteBtn.js";
+import useVendorLoader from "./scripts/useVendorLoader.js";
+import useSnippetPanes from "./scripts/useSnippetPanes.js";
 
 document.addEventListener("DOMContentLoaded", (event) => {
     // Immediately scroll to the selected snippet if the URL has a selected_id query parameter
@@ -17,8 +19,11 @@ document.addEventListener("DOMContentLoaded", (event) => {
     const theme = useTheme();
     theme.setup();
 
+    // Loads the vendor bundles only needed on some pages
+    const vendorLoader = useVendorLoader();
+
     // Initialize code highlighter first since code editor depends on it
-    const codeHighlighter = useCodeHighlighter();
+    const codeHighlighter = useCodeHighlighter(vendorLoader);
     codeHighlighter.highlightAll();
 
     // Initialize code editor with highlighter
@@ -30,7 +35,7 @@ document.addEventListener("DOMContentLoaded", (event) => {
     const dateFormatter = useDateFormatter();
     const favoriteBtn = useFavoriteBtn();
     const keyboardShortcuts = useKeyboardShortcuts();
-    const markdownEditor = useMarkdownEditor();
+    const markdownEditor = useMarkdownEditor(vendorLoader);
     const selectDropdown = useSelectDropdown();
     const tagsInput = useTagsInput();
 
@@ -42,6 +47,16 @@ document.addEventListener("DOMContentLoaded", (event) => {
     markdownEditor.setup();
     tagsInput.setup();
     selectDropdown.setup();
+
+    // Loads the snippets index panes without reloading the page,
+    // the swapped panes are set up like the rest of the page
+    const snippetPanes = useSnippetPanes(($pane) => {
+        codeHighlighter.highlightAll($pane);
+        copyToClipboard.setup($pane);
+        favoriteBtn.setup($pane);
+        dateFormatter.format($pane);
+    });
+    snippetPanes.setup();
 });
 
 function scrollToSelectedSnippet() {
@@ -51,14 +51,14 @@ export default function useCodeEditor(codeHighlighter) {
         const detectedLangSpan = document.getElementById("detected-language");
 
         if (langSelect && detectedLangSpan) {
-            textarea.addEventListener("input", () => {
+            textarea.addEventListener("input", async () => {
                 detectedLangSpan.textContent = "";
                 if (langSelect.value === "auto") {
                     // Clear language attribute when auto is selected
                     textarea.removeAttribute("language");
 
                     if (textarea.value.trim()) {
-                        const detectedLang = codeHighlighter.detectLanguage(
+                        const detectedLang = await codeHighlighter.detectLanguage(
                             textarea.value
                         );
                         if (detectedLang) {
@@ -81,16 +81,26 @@ export default function useCodeEditor(codeHighlighter) {
             // Set detected language on form submit if auto is selected
             const form = document.getElementById("form--snippet-save");
             if (form) {
-                form.addEventListener("submit", () => {
+                let languageDetected = false;
+                form.addEventListener("submit", async (event) => {
+                    if (languageDetected) {
+                        // Sent again below, with the detected language
+                        languageDetected = false;
+                        return;
+                    }
                     if (langSelect.value === "auto") {
+                        // The grammars may still be loading, the form is sent again
+                        // once the language is detected
+                        event.preventDefault();
                         // Default to PLAINTEXT
                         let selectedLang = "PLAINTEXT";
 
                         // Try to detect language if there's content
                         if (textarea.value.trim()) {
-                            const detectedLang = codeHighlighter.detectLanguage(
-                                textarea.value
-                            );
+                            const detectedLang =
+                                await codeHighlighter.detectLanguage(
+                                    textarea.value
+                                );
                             if (detectedLang) {
                                 // Map the detected language to our supported language enum
                                 const mappedLang =
@@ -109,6 +119,9 @@ export default function useCodeEditor(codeHighlighter) {
                         if (matchingOption) {
                             langSelect.value = matchingOption.value;
                         }
+
+                        languageDetected = true;
+                        form.requestSubmit(event.submitter);
                     }
                 });
             }
@@ -1,30 +1,97 @@
-export default function useCodeHighlighter() {
-    hljs.addPlugin(
-        new CopyButtonPlugin({
-            autohide: false, // Always show the copy button
-        })
-    );
-
-    function highlightAll() {
-        highlightCodeBlocks();
-        highlightTextareas();
+export default function useCodeHighlighter(vendorLoader) {
+    const copyButtonPlugin = new CopyButtonPlugin({
+        autohide: false, // Always show the copy button
+    });
+    hljs.addPlugin(copyButtonPlugin);
+
+    // Never rejects, a vendor script that fails to load is logged and the code is
+    // highlighted with the grammars that did load
+    async function highlightAll(root = document) {
+        await highlightCodeBlocks(root);
+        await highlightTextareas().catch((error) =>
+            console.error("Failed to load the code editor", error)
+        );
     }
 
-    function highlightCodeBlocks() {
-        document.querySelectorAll("pre code").forEach((block) => {
-            hljs.highlightElement(block);
+    async function highlightCodeBlocks(root) {
+        const blocks = root.querySelectorAll("pre code");
+
+        // Only load the grammars of the languages on the page
+        await loadLanguages(
+            Array.from(blocks)
+                .filter((block) => !block.dataset.highlighted)
+                .map(getBlockLanguage)
+        );
+
+        blocks.forEach((block) => {
+            // Already highlighted on the server, only add the copy button
+            if (block.dataset.highlighted) {
+                copyButtonPlugin["after:highlightElement"]({
+                    el: block,
+                    text: block.textContent,
+                });
+                return;
+            }
+            try {
+                hljs.highlightElement(block);
+            } catch (error) {
+                // The grammar of the block did not load, the other blocks are highlighted
+                console.error(error);
+            }
         });
     }
 
     async function highlightTextareas() {
+        if (!document.querySelector('textarea[is="highlighted-code"]')) {
+            return;
+        }
+
+        // The code editor can use any language and detects the language of its content
+        await loadAllLanguages();
+
         // Highlighted code script automatically runs when the script is loaded
         if (!window.chrome && !window.netscape) {
-            await import("https://unpkg.com/@ungap/custom-elements");
+            await vendorLoader.loadScript(vendorLoader.config.customElements);
         }
-        await import("https://unpkg.com/highlighted-code");
+        await import(vendorLoader.config.highlightedCode);
+    }
+
+    function getBlockLanguage(block) {
+        const languageClass = Array.from(block.classList).find((name) =>
+            name.startsWith("language-")
+        );
+        return languageClass
+            ? languageClass.slice("language-".length).toLowerCase()
+            : null;
+    }
+
+    async function loadLanguages(languages) {
+        const urls = new Set(
+            languages
+                .filter((language) => language && !hljs.getLanguage(language))
+                .map((language) => vendorLoader.config.languages[language])
+                .filter(Boolean)
+        );
+        const results = await Promise.allSettled(
+            Array.from(urls).map(vendorLoader.loadScript)
+        );
+        results
+            .filter((result) => result.status === "rejected")
+            .forEach((result) =>
+                console.error("Failed to load a language", result.reason)
+            );
+    }
+
+    function loadAllLanguages() {
+        return vendorLoader.loadScript(vendorLoader.config.allLanguages);
     }
 
-    function detectLanguage(code) {
+    // Waits for the grammars of every language, the detection would only pick among the
+    // ones already loaded otherwise
+    async function detectLanguage(code) {
+        await loadAllLanguages().catch((error) =>
+            console.error("Failed to load the languages", error)
+        );
         return hljs.highlightAuto(code).language;
     }
 
@@ -1,6 +1,6 @@
 export default function useCopyToClipboard() {
-  function setup() {
-    document.querySelectorAll("[data-copy-to-cliboard]").forEach((element) => {
+  function setup(root = document) {
+    root.querySelectorAll("[data-copy-to-cliboard]").forEach((element) => {
       element.addEventListener("click", (e) => {
         copyToClipboard(e, element.getAttribute("data-copy-to-cliboard"));
       });
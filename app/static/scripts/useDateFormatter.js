@@ -7,8 +7,8 @@ export default function useDateFormatter() {
   const DEFAULT_FORMAT = "fromNow";
   const DEFAULT_TITLE_FORMAT = "dddd, MMMM D, YYYY h:mm A";
 
-  function format() {
-    const $datetimeElements = document.querySelectorAll(`[${timestampAttribute}]`);
+  function format(root = document) {
+    const $datetimeElements = root.querySelectorAll(`[${timestampAttribute}]`);
     if ($datetimeElements.length === 0) {
       return;
     }
@@ -1,6 +1,6 @@
 export default function useFavoriteBtn() {
-  function setup() {
-    document.querySelectorAll("[data-favorite-btn]").forEach((element) => {
+  function setup(root = document) {
+    root.querySelectorAll("[data-favorite-btn]").forEach((element) => {
       element.addEventListener("click", (e) => {
         const $btn = e.currentTarget;
         const snippetId = $btn.getAttribute("data-favorite-btn");
@@ -1,10 +1,16 @@
-export default function useMarkdownEditor() {
-  function setup() {
+export default function useMarkdownEditor(vendorLoader) {
+  async function setup() {
     const $textareas = document.querySelectorAll("[data-markdown-editor]");
     if ($textareas.length === 0) {
       return;
     }
 
+    // The editor is only loaded on the pages that use it
+    await Promise.all([
+      vendorLoader.loadStyle(vendorLoader.config.markdownEditor.css),
+      vendorLoader.loadScript(vendorLoader.config.markdownEditor.js),
+    ]);
+
     for (let i = 0; i < $textareas.length; i++) {
       const $textarea = $textareas[i];
       $textarea.style.display = "none";
@@ -0,0 +1,134 @@
+// Classes of the selected snippet card, see `_components/snippet_card.html`
+const SELECTED_CARD_CLASSES = [
+    "lg:border-emerald-950",
+    "lg:hover:border-emerald-950",
+    "dark:lg:border-emerald-950",
+    "dark:lg:hover:border-emerald-950",
+];
+
+// Minimum width of the layout with the list and the selected snippet side by side
+const WIDE_LAYOUT_WIDTH = 1024;
+
+export default function useSnippetPanes(onSwap) {
+    let controller = null;
+
+    function setup() {
+        if (!document.getElementById("snippets-panes")) {
+            return;
+        }
+
+        document.addEventListener("click", handleClick);
+        window.addEventListener("popstate", () =>
+            loadPanes(window.location.href, false)
+        );
+    }
+
+    function handleClick(e) {
+        if (e.defaultPrevented || e.button !== 0 || e.metaKey || e.ctrlKey || e.shiftKey) {
+            return;
+        }
+
+        // Tabs and pagination, only the panes are loaded
+        const $link = e.target.closest("[data-pane-link]");
+        if ($link) {
+            const url = $link.getAttribute("href") || $link.dataset.paneLink;
+            if (url) {
+                e.preventDefault();
+                loadPanes(url);
+            }
+            return;
+        }
+
+        // Snippet cards, only the selected snippet is loaded
+        const $card = e.target.closest("[data-snippet-card]");
+        if (!$card || e.target.closest("a, button")) {
+            return;
+        }
+
+        e.preventDefault();
+        if (window.innerWidth < WIDE_LAYOUT_WIDTH) {
+            window.location.href = $card.dataset.viewUrl;
+            return;
+        }
+        selectSnippet($card);
+    }
+
+    async function fetchHtml(url) {
+        // Only the last clicked tab, page or snippet is shown
+        controller?.abort();
+        controller = new AbortController();
+
+        const response = await fetch(url, {
+            signal: controller.signal,
+            headers: { Accept: "text/html" },
+        });
+        if (!response.ok) {
+            throw new Error(`Failed to load ${url}: ${response.status}`);
+        }
+        return response.text();
+    }
+
+    async function loadPanes(url, pushState = true) {
+        const target = new URL(url, window.location.href);
+        const panesUrl = document.getElementById("snippets-panes").dataset.panesUrl;
+
+        let html;
+        try {
+            html = await fetchHtml(panesUrl + target.search);
+        } catch (error) {
+            if (error.name !== "AbortError") {
+                window.location.href = target.href;
+            }
+            return;
+        }
+
+        swap(html);
+        if (pushState) {
+            history.pushState({}, "", target.href);
+        }
+
+        const $tabs = document.getElementById("snippets-tabs");
+        if ($tabs?.dataset.pageTitle) {
+            document.title = $tabs.dataset.pageTitle;
+        }
+        document.getElementById("snippets-list")?.scrollTo({ top: 0 });
+    }
+
+    async function selectSnippet($card) {
+        let html;
+        try {
+            html = await fetchHtml($card.dataset.detailUrl);
+        } catch (error) {
+            if (error.name !== "AbortError") {
+                window.location.href = $card.dataset.indexUrl;
+            }
+            return;
+        }
+
+        swap(html);
+        history.pushState({}, "", $card.dataset.indexUrl);
+
+        document.querySelectorAll("[data-snippet-card]").forEach(($element) => {
+            SELECTED_CARD_CLASSES.forEach((name) =>
+                $element.classList.toggle(name, $element === $card)
+            );
+        });
+    }
+
+    function swap(html) {
+        // Each pane of the response replaces the element with the same id
+        const $document = new DOMParser().parseFromString(html, "text/html");
+        $document.querySelectorAll("[data-pane][id]").forEach(($pane) => {
+            const $current = document.getElementById($pane.id);
+            if (!$current) {
+                return;
+            }
+            $current.replaceWith($pane);
+            onSwap($pane);
+        });
+    }
+
+    return {
+        setup,
+    };
+}
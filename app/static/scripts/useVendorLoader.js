@@ -0,0 +1,46 @@
+// Vendor bundles that are not needed on every page, urls are set in `base.html`
+const config = JSON.parse(
+    document.getElementById("vendor-config")?.textContent || "{}"
+);
+const loading = new Map();
+
+export default function useVendorLoader() {
+    function loadScript(url) {
+        if (!loading.has(url)) {
+            loading.set(
+                url,
+                new Promise((resolve, reject) => {
+                    const $script = document.createElement("script");
+                    $script.src = url;
+                    $script.onload = resolve;
+                    $script.onerror = reject;
+                    document.head.appendChild($script);
+                })
+            );
+        }
+        return loading.get(url);
+    }
+
+    function loadStyle(url) {
+        if (!loading.has(url)) {
+            loading.set(
+                url,
+                new Promise((resolve, reject) => {
+                    const $link = document.createElement("link");
+                    $link.rel = "stylesheet";
+                    $link.href = url;
+                    $link.onload = resolve;
+                    $link.onerror = reject;
+                    document.head.appendChild($link);
+                })
+            );
+        }
+        return loading.get(url);
+    }
+
+    return {
+        config,
+        loadScript,
+        loadStyle,
+    };
+}
@@ -0,0 +1,159 @@
+"""
+Run the benchmarks, write their results to a JSON file, and compare them with a previous file.
+
+Compare the results of a branch with the ones of the main branch, measured on the same machine,
+a time that got slower by more than the threshold is reported as a regression.
+
+Usage:
+    python -m benchmarks --output baseline.json
+    python -m benchmarks hot_paths templates --rounds 3 --compare baseline.json
+"""
+
+import argparse
+import importlib
+import inspect
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+
+from benchmarks.utils import git_commit
+
+# Benchmark module -> result key of the time compared between runs, lower is better
+BENCHMARKS = {
+    "hot_paths": "us",
+    "templates": "ms",
+    "urls": "route_table_us",
+    "metrics": "us",
+    "compression": "ms",
+    "logs": "us",
+}
+
+
+def run(names: list[str], min_time: float, rounds: int = 1) -> dict:
+    results = {}
+    for name in names:
+        module = importlib.import_module(f"benchmarks.{name}")
+        kwargs = (
+            {"min_time": min_time}
+            if "min_time" in inspect.signature(module.run).parameters
+            else {}
+        )
+        key = BENCHMARKS[name]
+        # Best of the rounds, the noise only ever makes things slower
+        for round in range(rounds):
+            print(f"Running {name} ({round + 1}/{rounds})...", file=sys.stderr)
+            for result in module.run(**kwargs):
+                previous = results.get(f"{name}/{result['name']}")
+                if previous is None or result[key] < previous["value"]:
+                    results[f"{name}/{result['name']}"] = {
+                        "value": result[key],
+                        "unit": key.rsplit("_", 1)[-1],
+                    }
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "rounds": rounds,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[dict]:
+    """
+    Change of each result present in both runs.
+
+    Args:
+        baseline: Results of the reference run
+        current: Results of the new run
+        threshold: Percentage of slowdown reported as a regression
+
+    Returns:
+        The compared results, with the change in percent and if it is a regression
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or before["unit"] != result["unit"] or before["value"] <= 0:
+            continue
+        change = (result["value"] - before["value"]) / before["value"] * 100
+        rows.append(
+            {
+                "name": name,
+                "unit": result["unit"],
+                "before": before["value"],
+                "after": result["value"],
+                "change": round(change, 1),
+                "regression": change > threshold,
+            }
+        )
+    return rows
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument(
+        "names",
+        nargs="*",
+        metavar="benchmark",
+        help=f"Benchmarks to run, all by default: {', '.join(BENCHMARKS)}",
+    )
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Results to compare with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Slowdown in percent reported as a regression (default: 10)",
+    )
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per case")
+    parser.add_argument(
+        "--rounds", type=int, default=1, help="Keep the best of this many runs"
+    )
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(unknown)}")
+
+    current = run(args.names or list(BENCHMARKS), args.min_time, args.rounds)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if not args.compare:
+        print(f"{'benchmark':<52}{'value':>12}")
+        for name, result in current["results"].items():
+            print(f"{name:<52}{result['value']:>10.3f}{result['unit']:>4}")
+        return 0
+
+    with open(args.compare) as f:
+        baseline = json.load(f)
+
+    rows = compare(baseline, current, args.threshold)
+    print(
+        f"baseline: {baseline['meta']['commit']}, current: {current['meta']['commit']}"
+    )
+    print(f"{'benchmark':<52}{'before':>12}{'after':>12}{'change':>10}")
+    for row in rows:
+        print(
+            f"{row['name']:<52}{row['before']:>10.3f}{row['unit']:>2}"
+            f"{row['after']:>10.3f}{row['unit']:>2}{row['change']:>+9.1f}%"
+            f"{'  REGRESSION' if row['regression'] else ''}"
+        )
+
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(
+            f"{len(regressions)} regressions over {args.threshold:g}%", file=sys.stderr
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,148 @@
+"""
+Bytes on the wire and CPU cost of the response compression, per encoding, level and page size.
+
+Used to pick the `COMPRESSION_*_LEVEL` settings for a deployment.
+
+Usage:
+    python -m benchmarks.compression
+"""
+
+import json
+import random
+import time
+from html import escape
+
+from app.common.compression import (
+    BrotliCompressor,
+    GzipCompressor,
+    ZstdCompressor,
+    brotli,
+    zstandard,
+)
+
+LEVELS = {
+    "gzip": (GzipCompressor, [1, 4, 6, 9]),
+    "br": (BrotliCompressor, [1, 4, 6, 11]),
+    "zstd": (ZstdCompressor, [1, 3, 9, 19]),
+}
+PAGE_SIZES = [10_000, 100_000, 500_000]
+
+_WORDS = (
+    "import os sys def return if else for in while class self print echo grep awk "
+    "sed docker run exec kubectl get pods curl -H X-API-Key json select from where"
+).split()
+
+
+def _snippet_card(rng: random.Random, index: int) -> str:
+    code = "\n".join(
+        " ".join(rng.choices(_WORDS, k=rng.randint(3, 10)))
+        for _ in range(rng.randint(3, 12))
+    )
+    tags = "".join(
+        f'<a href="/snippets?q=tag:%22{tag}%22" class="tag">{tag}</a>'
+        for tag in rng.sample(_WORDS, 3)
+    )
+    return (
+        f'<div id="snippet-{index}" class="flex flex-col gap-2 p-4 rounded-xl bg-stone-50">'
+        f'<a href="/snippets/{index}/view" class="font-bold">Snippet {index}</a>'
+        f'<div class="flex flex-wrap gap-1">{tags}</div>'
+        f'<pre class="codeblock"><code class="language-python">{escape(code)}</code></pre>'
+        "</div>\n"
+    )
+
+
+def make_html_page(size: int, seed: int = 1) -> bytes:
+    """Build an html page like the snippets index of about `size` bytes."""
+    rng = random.Random(seed)
+    cards, total, index = [], 0, 0
+    while total < size:
+        card = _snippet_card(rng, index)
+        cards.append(card)
+        total += len(card)
+        index += 1
+    return ("<html><body>" + "".join(cards) + "</body></html>").encode()
+
+
+def make_json_page(size: int, seed: int = 1) -> bytes:
+    """Build a json api response of about `size` bytes."""
+    rng = random.Random(seed)
+    items, total = [], 0
+    while total < size:
+        item = {
+            "id": f"{rng.getrandbits(128):032x}",
+            "title": " ".join(rng.choices(_WORDS, k=4)),
+            "language": "PYTHON",
+            "tags": rng.sample(_WORDS, 3),
+            "content": "\n".join(" ".join(rng.choices(_WORDS, k=8)) for _ in range(6)),
+        }
+        items.append(item)
+        total += len(json.dumps(item))
+    return json.dumps({"items": items}).encode()
+
+
+def _available_encodings():
+    available = {"gzip"}
+    if brotli is not None:
+        available.add("br")
+    if zstandard is not None:
+        available.add("zstd")
+    return [encoding for encoding in LEVELS if encoding in available]
+
+
+def measure(compressor_class, level: int, data: bytes, min_time: float = 0.2) -> dict:
+    compressed = b""
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        compressor = compressor_class(level)
+        compressed = compressor.compress(data) + compressor.finish()
+        runs += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+
+    seconds = elapsed / runs
+    return {
+        "size": len(data),
+        "compressed_size": len(compressed),
+        "ratio": round(len(compressed) / len(data), 4),
+        "ms": round(seconds * 1000, 3),
+        "mb_per_s": round(len(data) / seconds / 1_000_000, 1),
+    }
+
+
+def run(min_time: float = 0.2) -> list[dict]:
+    results = []
+    for page_type, make_page in (("html", make_html_page), ("json", make_json_page)):
+        for size in PAGE_SIZES:
+            data = make_page(size)
+            for encoding in _available_encodings():
+                compressor_class, levels = LEVELS[encoding]
+                for level in levels:
+                    result = measure(compressor_class, level, data, min_time)
+                    results.append(
+                        {
+                            "name": f"{page_type}-{size // 1000}kb-{encoding}-{level}",
+                            "page": page_type,
+                            "encoding": encoding,
+                            "level": level,
+                            **result,
+                        }
+                    )
+    return results
+
+
+def main():
+    print(
+        f"{'page':<6}{'size':>10}{'encoding':>10}{'level':>7}"
+        f"{'on wire':>10}{'ratio':>8}{'ms':>10}{'MB/s':>9}"
+    )
+    for r in run():
+        print(
+            f"{r['page']:<6}{r['size']:>10}{r['encoding']:>10}{r['level']:>7}"
+            f"{r['compressed_size']:>10}{r['ratio']:>8.3f}{r['ms']:>10.3f}{r['mb_per_s']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Time of the code that runs on most requests: search parsing, snippet serialization, tags,
+tokens and the snippet card template.
+
+Usage:
+    python -m benchmarks.hot_paths
+"""
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.auth.models import User
+from app.auth.serializers import TokenDataSerializer
+from app.auth.utils import create_token, get_token_payload
+from app.common.templates import templates
+from app.snippets.fragments import SNIPPET_CARD_TEMPLATE
+from app.snippets.models import Snippet, Tag
+from app.snippets.search import SnippetsSearchParser
+from benchmarks.templates import make_context, make_request
+
+# Queries like the ones typed in the search box
+QUERIES = [
+    "",
+    "docker",
+    "lang:python",
+    "tag:git",
+    "is:favorite",
+    "lang:bash tag:docker compose",
+    'tag:"k8s" is:public kubectl get pods',
+    "languages: python, javascript tags: api, http is:mine requests",
+    'is:command is:fork lang:"go" tag:ci build release',
+    "backup postgres pg_dump cron nightly",
+]
+TAGS = ["docker", "linux", "git", "k8s", "aws", "postgres", "python", "shell"]
+
+
+def measure(fn, min_time=0.2) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            fn()
+        runs += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def measure_async(fn, min_time=0.2) -> float:
+    async def main():
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            for _ in range(100):
+                await fn()
+            runs += 100
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                return elapsed / runs
+
+    return asyncio.run(main())
+
+
+def make_user() -> User:
+    return User(id=uuid.uuid4(), email="benchmark@example.com", display_name="Bench")
+
+
+def make_snippet(user: User, index: int = 0) -> Snippet:
+    """A snippet with its columns and relationships set, like one loaded from the database."""
+    now = datetime.now(timezone.utc)
+    snippet = Snippet(
+        id=uuid.uuid4(),
+        title=f"Snippet {index}",
+        subtitle="Benchmark snippet",
+        description="Runs **docker compose** with `--build`\n\n- one\n- two",
+        content="\n".join(f"echo 'line {line}'" for line in range(40)),
+        language="BASH",
+        command_name=f"snippet-{index}",
+        public=True,
+        archived=False,
+        is_fork=False,
+        user=user,
+        user_id=user.id,
+        created_at=now - timedelta(days=index),
+        updated_at=now,
+    )
+    snippet.tags = [Tag(name=tag) for tag in TAGS[:4]]
+    snippet.favorited_by = [user]
+    return snippet
+
+
+class _PlanningSession:
+    """
+    Answers the two queries of `Snippet.bulk_add_tags` from memory, so only the planning
+    of the tags to create and to reorder is measured.
+    """
+
+    class _Result:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def scalars(self):
+            return self
+
+        def all(self):
+            return self.rows
+
+    def __init__(self, existing_tags: list[Tag]):
+        self.existing_tags = existing_tags
+        self.queries = 0
+
+    async def execute(self, query):
+        self.queries += 1
+        # Existing tags first, then the tags of the snippet, a new snippet has none
+        return self._Result(self.existing_tags if self.queries % 2 else [])
+
+    def add(self, instance):
+        pass
+
+
+def run(min_time: float = 0.2) -> list[dict]:
+    user = make_user()
+    snippet = make_snippet(user)
+    serializer = snippet.to_serializer(user)
+    stale_serializer = serializer.model_copy(update={"description_html_version": None})
+
+    parsers = [SnippetsSearchParser(q=q) for q in QUERIES]
+    query = select(Snippet).options(*Snippet.list_load_options())
+
+    session = _PlanningSession([Tag(name=tag) for tag in TAGS[:6]])
+    tag_names = [" Docker", "linux", "GIT", "new-tag", "docker", "", "another-tag"]
+
+    token_data = TokenDataSerializer(
+        user_id=user.id, email=user.email, provider_name="local", token_type="access"
+    )
+    token = asyncio.run(create_token(token_data))
+
+    request = make_request()
+    card_template = templates.env.get_template(SNIPPET_CARD_TEMPLATE)
+    card_context = {**make_context(request), "snippet": serializer, "user": user}
+
+    def parse_queries():
+        for q in QUERIES:
+            SnippetsSearchParser(q=q)
+
+    def apply_filters():
+        for parser in parsers:
+            parser.apply_filters(query, user)
+
+    results = [
+        # Per query of the corpus
+        ("search.parse", measure(parse_queries, min_time) / len(QUERIES)),
+        ("search.apply_filters", measure(apply_filters, min_time) / len(QUERIES)),
+        (
+            "snippet.to_serializer",
+            measure(lambda: snippet.to_serializer(user), min_time),
+        ),
+        ("snippet.as_dict", measure(lambda: snippet.as_dict, min_time)),
+        (
+            "serializer.html_description",
+            measure(lambda: serializer.html_description, min_time),
+        ),
+        (
+            "serializer.html_description stale",
+            measure(lambda: stale_serializer.html_description, min_time),
+        ),
+        (
+            "snippet.bulk_add_tags",
+            measure_async(
+                lambda: Snippet(id=uuid.uuid4()).bulk_add_tags(session, tag_names),
+                min_time,
+            ),
+        ),
+        ("token.create", measure_async(lambda: create_token(token_data), min_time)),
+        (
+            "token.payload",
+            measure_async(lambda: get_token_payload(token, "access"), min_time),
+        ),
+        (
+            "snippet_card.render",
+            measure(lambda: card_template.render(card_context), min_time),
+        ),
+    ]
+    return [{"name": name, "us": round(seconds * 1e6, 2)} for name, seconds in results]
+
+
+def main():
+    print(f"{'operation':<36}{'us':>10}")
+    for r in run():
+        print(f"{r['name']:<36}{r['us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
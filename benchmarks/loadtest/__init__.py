@@ -0,0 +1,13 @@
+"""
+Load test of a running server with the traffic of real users: anonymous visitors browsing the
+explore tab, logged in users searching with `lang:`/`tag:`/`is:` filters, the CLI fetching
+commands with an API key, users creating and editing snippets with tags, and favorite toggles.
+
+The results, throughput and latency percentiles of each request, are written to a JSON file
+so two commits can be compared.
+
+Usage:
+    python -m benchmarks.loadtest setup --users 20 --snippets 50
+    python -m benchmarks.loadtest run --url http://localhost:8000 --users 10 --duration 60
+    python -m benchmarks.loadtest compare before.json after.json
+"""
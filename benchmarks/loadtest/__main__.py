@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from .scenarios import SCENARIOS
+
+ACCOUNTS_FILE = "loadtest-accounts.json"
+RESULTS_FILE = "loadtest-results.json"
+
+
+def parse_weights(values: list[str]) -> dict[str, int]:
+    weights = {name: weight for name, (_, weight) in SCENARIOS.items()}
+    for value in values:
+        name, _, weight = value.partition("=")
+        if name not in SCENARIOS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(
+                f"Invalid weight {value!r}, expected one of {', '.join(SCENARIOS)}=<int>"
+            )
+        weights[name] = int(weight)
+    return {name: weight for name, weight in weights.items() if weight}
+
+
+def setup(args):
+    # Imported here so the other commands don't need a database
+    import app.app  # noqa: F401
+
+    from .dataset import create_dataset
+
+    dataset = asyncio.run(
+        create_dataset(users=args.users, snippets=args.snippets, seed=args.seed)
+    )
+    with open(args.accounts, "w") as f:
+        json.dump(dataset, f, indent=2)
+    print(f"Created {args.users} users with {args.snippets} snippets each")
+    print(f"Accounts written to {args.accounts}")
+
+
+def run(args):
+    from .runner import run_load_test
+
+    weights = parse_weights(args.weight)
+    with open(args.accounts) as f:
+        dataset = json.load(f)
+
+    results = asyncio.run(
+        run_load_test(
+            args.url,
+            dataset,
+            users=args.users,
+            duration=args.duration,
+            weights=weights,
+            seed=args.seed,
+        )
+    )
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+
+    print(f"{'request':<28}{'count':>8}{'errors':>8}{'rps':>9}", end="")
+    print(f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}")
+    for name, r in [*results["requests"].items(), ("total", results["total"])]:
+        print(
+            f"{name:<28}{r['count']:>8}{r['errors']:>8}{r['rps']:>9.1f}"
+            f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}{r['max_ms']:>9.1f}"
+        )
+    for name, count in results["failed_scenarios"].items():
+        print(f"Scenario {name} failed {count} times")
+    print(f"Results written to {args.output}")
+
+
+def compare(args):
+    from .runner import compare as compare_results
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"before: {before['meta']['commit']}, after: {after['meta']['commit']}")
+    print(f"{'request':<28}", end="")
+    print("".join(f"{key:>26}" for key in ("rps", "p50 ms", "p95 ms", "p99 ms")))
+    for row in compare_results(before, after):
+        print(f"{row['name']:<28}", end="")
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            old, new, change = row[key]
+            print(f"{old:>9.1f} -> {new:>7.1f} {change:>7}", end="")
+        print()
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    parser_setup = commands.add_parser("setup", help="Create the users and snippets")
+    parser_setup.add_argument("--users", type=int, default=20)
+    parser_setup.add_argument("--snippets", type=int, default=50, help="Per user")
+    parser_setup.add_argument("--seed", type=int, default=0)
+    parser_setup.add_argument("--accounts", default=ACCOUNTS_FILE)
+    parser_setup.set_defaults(func=setup)
+
+    parser_run = commands.add_parser("run", help="Run the scenarios")
+    parser_run.add_argument("--url", default="http://localhost:8000")
+    parser_run.add_argument("--users", type=int, default=10, help="Concurrent users")
+    parser_run.add_argument("--duration", type=float, default=60, help="Seconds")
+    parser_run.add_argument("--seed", type=int, default=0)
+    parser_run.add_argument(
+        "--weight",
+        action="append",
+        default=[],
+        metavar="SCENARIO=N",
+        help=f"How often a scenario runs, one of {', '.join(SCENARIOS)}",
+    )
+    parser_run.add_argument("--accounts", default=ACCOUNTS_FILE)
+    parser_run.add_argument("--output", default=RESULTS_FILE)
+    parser_run.set_defaults(func=run)
+
+    parser_compare = commands.add_parser(
+        "compare", help="Compare the results of two runs"
+    )
+    parser_compare.add_argument("before")
+    parser_compare.add_argument("after")
+    parser_compare.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,142 @@
+"""
+Accounts and snippets used by the load test scenarios.
+
+The users are local accounts with a known password and an API key, their emails all end
+with `@{EMAIL_DOMAIN}` so the dataset can be created again without touching the other users.
+"""
+
+import random
+import secrets
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from app.auth.constants import LOCAL_PROVIDER
+from app.auth.models import APIKey, Provider, User
+from app.auth.utils import verify_and_get_password_hash
+from app.commands.corpus import (
+    LANGUAGE_EXPONENT,
+    POPULAR_LANGUAGES,
+    POPULAR_TAGS,
+    TAG_EXPONENT,
+    WORDS,
+    all_languages,
+    zipf_choices,
+)
+from app.common.db import async_session_maker
+from app.snippets.models import Snippet
+
+EMAIL_DOMAIN = "loadtest.example.com"
+PASSWORD = "Loadtest-Password-1"
+
+# Searched and used by the scenarios, the snippets use the languages of the seeded corpus
+LANGUAGES = POPULAR_LANGUAGES
+TAGS = POPULAR_TAGS
+
+
+def _content(rng: random.Random) -> str:
+    return "\n".join(
+        " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+        for _ in range(rng.randint(3, 60))
+    )
+
+
+async def _delete_dataset(session):
+    result = await session.execute(
+        select(User).where(User.email.endswith(f"@{EMAIL_DOMAIN}"))
+    )
+    for user in result.scalars().all():
+        await session.delete(user)
+    await session.commit()
+
+
+async def create_dataset(users: int = 20, snippets: int = 50, seed: int = 0) -> dict:
+    """
+    Create the load test users and their snippets, replacing the previous ones.
+
+    Args:
+        users: Number of users
+        snippets: Number of snippets of each user
+        seed: Same seed, same snippets
+
+    Returns:
+        The accounts of the users, with their password, API key and command names
+    """
+    rng = random.Random(seed)
+    password_hash = await verify_and_get_password_hash(PASSWORD)
+    languages = all_languages()
+
+    accounts = []
+    async with async_session_maker() as session:
+        await _delete_dataset(session)
+
+        for index in range(users):
+            email = f"user{index}@{EMAIL_DOMAIN}"
+            api_key = secrets.token_urlsafe(32)
+            user = User(
+                email=email, display_name=f"Load Test {index}", password=password_hash
+            )
+            session.add(user)
+            session.add(
+                Provider(name=LOCAL_PROVIDER, email=email, is_verified=True, user=user)
+            )
+            session.add(APIKey(key=api_key, name="loadtest", user=user))
+            await session.flush()
+
+            command_names = []
+            for number in range(snippets):
+                command_name = f"cmd-{number}" if rng.random() < 0.3 else None
+                snippet = Snippet(
+                    title=f"{rng.choice(WORDS)} {rng.choice(WORDS)} {number}",
+                    subtitle=" ".join(rng.choices(WORDS, k=6)),
+                    description=f"Runs **{rng.choice(WORDS)}** with `{rng.choice(WORDS)}`",
+                    content=_content(rng),
+                    language=zipf_choices(rng, languages, LANGUAGE_EXPONENT)[0],
+                    command_name=command_name,
+                    public=rng.random() < 0.6,
+                    user_id=user.id,
+                )
+                snippet.tag_associations = await snippet.bulk_add_tags(
+                    session,
+                    list(
+                        dict.fromkeys(
+                            zipf_choices(rng, TAGS, TAG_EXPONENT, k=rng.randint(0, 4))
+                        )
+                    ),
+                )
+                session.add(snippet)
+                if command_name:
+                    command_names.append(command_name)
+
+            await session.commit()
+            accounts.append(
+                {
+                    "email": email,
+                    "password": PASSWORD,
+                    "api_key": api_key,
+                    "command_names": command_names,
+                }
+            )
+
+        # Each user favorites some public snippets of the others
+        result = await session.execute(
+            select(Snippet.id).where(
+                Snippet.public,
+                Snippet.user.has(User.email.endswith(f"@{EMAIL_DOMAIN}")),
+            )
+        )
+        public_ids = result.scalars().all()
+        result = await session.execute(
+            select(User)
+            .where(User.email.endswith(f"@{EMAIL_DOMAIN}"))
+            .options(selectinload(User.favorites))
+        )
+        for user in result.scalars().all():
+            favorite_ids = rng.sample(public_ids, k=min(len(public_ids), 10))
+            favorites = await session.execute(
+                select(Snippet).where(Snippet.id.in_(favorite_ids))
+            )
+            user.favorites.extend(favorites.scalars().all())
+        await session.commit()
+
+    return {"users": accounts, "languages": LANGUAGES, "tags": TAGS}
@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import random
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import httpx
+
+from app.settings import settings
+from benchmarks.utils import git_commit
+
+from .scenarios import SCENARIOS, Context, LoadClient
+from .stats import Stats
+
+
+async def login(client: httpx.AsyncClient, account: dict):
+    response = await client.post(
+        "/auth/login", data={"email": account["email"], "password": account["password"]}
+    )
+    if settings.COOKIE_NAME not in response.cookies:
+        raise RuntimeError(
+            f"Could not login as {account['email']}, run the setup command first"
+        )
+
+
+async def public_snippet_ids(client: httpx.AsyncClient, api_key: str) -> list[str]:
+    ids = []
+    for page in range(1, 6):
+        response = await client.get(
+            "/api/v1/snippets",
+            params={"scope": "explore", "page": page, "page_size": 100},
+            headers={"X-API-Key": api_key},
+        )
+        response.raise_for_status()
+        items = response.json()["items"]
+        ids.extend(item["id"] for item in items)
+        if len(items) < 100:
+            break
+    return ids
+
+
+async def run_load_test(
+    url: str,
+    dataset: dict,
+    users: int = 10,
+    duration: float = 60,
+    weights: Optional[dict[str, int]] = None,
+    seed: int = 0,
+) -> dict:
+    """
+    Run the scenarios with concurrent virtual users against a running server.
+
+    Args:
+        url: URL of the server
+        dataset: Accounts written by the setup command
+        users: Number of concurrent virtual users
+        duration: Seconds to run the scenarios for, after the users logged in
+        weights: How often each scenario is picked, defaults to the `SCENARIOS` weights
+        seed: Same seed, same sequence of scenarios for each user
+
+    Returns:
+        The throughput and latency percentiles of each request
+    """
+    weights = weights or {name: weight for name, (_, weight) in SCENARIOS.items()}
+    names = list(weights)
+    stats = Stats()
+    accounts = dataset["users"]
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        public_ids = await public_snippet_ids(client, accounts[0]["api_key"])
+
+    async def virtual_user(
+        index: int, anonymous: httpx.AsyncClient, client: httpx.AsyncClient
+    ):
+        ctx = Context(
+            rng=random.Random(seed + index),
+            anonymous=LoadClient(anonymous, stats),
+            client=LoadClient(client, stats),
+            account=accounts[index % len(accounts)],
+            languages=dataset["languages"],
+            tags=dataset["tags"],
+            public_ids=public_ids,
+        )
+
+        end = time.monotonic() + duration
+        while time.monotonic() < end:
+            name = ctx.rng.choices(names, weights=[weights[n] for n in names])[0]
+            try:
+                await SCENARIOS[name][0](ctx)
+            except Exception:
+                stats.failed_scenarios[name] += 1
+
+    async with contextlib.AsyncExitStack() as stack:
+        clients = [
+            [
+                await stack.enter_async_context(
+                    httpx.AsyncClient(base_url=url, timeout=30)
+                )
+                for _ in range(2)
+            ]
+            for _ in range(users)
+        ]
+        # Everybody starts once all the users are logged in, a failed login stops the run
+        await asyncio.gather(
+            *(
+                login(client, accounts[index % len(accounts)])
+                for index, (_, client) in enumerate(clients)
+            )
+        )
+        stats.started_at = time.perf_counter()
+        await asyncio.gather(
+            *(
+                virtual_user(index, anonymous, client)
+                for index, (anonymous, client) in enumerate(clients)
+            )
+        )
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "url": url,
+            "users": users,
+            "duration": duration,
+            "seed": seed,
+            "weights": weights,
+        },
+        **stats.summary(),
+    }
+
+
+def compare(before: dict, after: dict) -> list[dict]:
+    """Throughput and latency changes of the requests of two runs."""
+    rows = []
+    names = ["total", *sorted(set(before["requests"]) | set(after["requests"]))]
+    for name in names:
+        old = before["total"] if name == "total" else before["requests"].get(name)
+        new = after["total"] if name == "total" else after["requests"].get(name)
+        if not old or not new:
+            continue
+        rows.append(
+            {
+                "name": name,
+                **{
+                    key: (old[key], new[key], change(old[key], new[key]))
+                    for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+                },
+                "errors": (old["errors"], new["errors"]),
+            }
+        )
+    return rows
+
+
+def change(old: float, new: float) -> str:
+    if not old:
+        return "-"
+    return f"{(new - old) / old * 100:+.1f}%"
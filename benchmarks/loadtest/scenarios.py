@@ -0,0 +1,197 @@
+"""
+What the virtual users do, each scenario is a short visit of one kind of user.
+"""
+
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+import httpx
+
+from .stats import Stats
+
+
+class LoadClient:
+    """Records the duration and status of each request under a name."""
+
+    def __init__(self, client: httpx.AsyncClient, stats: Stats):
+        self.client = client
+        self.stats = stats
+
+    async def request(
+        self,
+        name: str,
+        method: str,
+        url: str,
+        expected: tuple[int, ...] = (200,),
+        **kwargs,
+    ) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            self.stats.record(name, time.perf_counter() - start, error=True)
+            return None
+
+        self.stats.record(
+            name,
+            time.perf_counter() - start,
+            error=response.status_code not in expected,
+        )
+        return response
+
+
+@dataclass
+class Context:
+    """State of a virtual user."""
+
+    rng: random.Random
+    anonymous: LoadClient
+    # Logged in with the account, and its API key
+    client: LoadClient
+    account: dict
+    languages: list[str]
+    tags: list[str]
+    # Public snippets, shared by all the virtual users
+    public_ids: list[str] = field(default_factory=list)
+
+
+async def explore(ctx: Context):
+    """Anonymous visitor browsing the explore tab and opening public snippets."""
+    await ctx.anonymous.request("home", "GET", "/")
+    await ctx.anonymous.request(
+        "explore", "GET", "/snippets/", params={"tab": "explore"}
+    )
+    await ctx.anonymous.request(
+        "explore.page",
+        "GET",
+        "/snippets/partials/list",
+        params={"tab": "explore", "page": ctx.rng.randint(2, 5)},
+    )
+    if ctx.public_ids:
+        snippet_id = ctx.rng.choice(ctx.public_ids)
+        await ctx.anonymous.request(
+            "snippet.detail", "GET", f"/snippets/{snippet_id}/partials/detail"
+        )
+        await ctx.anonymous.request("snippet.view", "GET", f"/snippets/{snippet_id}")
+
+
+def search_query(ctx: Context) -> str:
+    rng = ctx.rng
+    filters = [
+        lambda: f"lang:{rng.choice(ctx.languages).lower()}",
+        lambda: f"tag:{rng.choice(ctx.tags)}",
+        lambda: f"is:{rng.choice(['public', 'fork', 'favorite', 'command', 'mine'])}",
+        lambda: rng.choice(["docker", "select", "curl", "grep", "kubectl"]),
+    ]
+    return " ".join(f() for f in rng.sample(filters, k=rng.randint(1, 3)))
+
+
+async def search(ctx: Context):
+    """Logged in user searching their snippets and the explore tab."""
+    for tab in ("mine", "explore"):
+        await ctx.client.request(
+            f"search.{tab}",
+            "GET",
+            "/snippets/",
+            params={"tab": tab, "q": search_query(ctx)},
+        )
+    await ctx.client.request(
+        "search.page",
+        "GET",
+        "/snippets/partials/list",
+        params={"tab": "mine", "q": search_query(ctx), "page": 2},
+    )
+
+
+async def command_api(ctx: Context):
+    """CLI syncing and running commands with an API key."""
+    headers = {"X-API-Key": ctx.account["api_key"]}
+    await ctx.client.request(
+        "api.commands.manifest", "GET", "/api/snippets/commands", headers=headers
+    )
+
+    command_names = ctx.account["command_names"]
+    if not command_names:
+        return
+
+    name = ctx.rng.choice(command_names)
+    response = await ctx.client.request(
+        "api.command", "GET", f"/api/snippets/command/{name}", headers=headers
+    )
+    if response is not None and "etag" in response.headers:
+        await ctx.client.request(
+            "api.command.not_modified",
+            "GET",
+            f"/api/snippets/command/{name}",
+            expected=(304,),
+            headers={**headers, "If-None-Match": response.headers["etag"]},
+        )
+
+    await ctx.client.request(
+        "api.commands.fetch",
+        "POST",
+        "/api/snippets/commands/fetch",
+        headers=headers,
+        json={
+            "command_names": ctx.rng.sample(
+                command_names, k=min(len(command_names), 10)
+            )
+        },
+    )
+
+
+async def create_edit(ctx: Context):
+    """Logged in user creating a snippet with tags, editing it, then deleting it."""
+    rng = ctx.rng
+    form = {
+        "title": f"load test {uuid.uuid4().hex[:8]}",
+        "content": "\n".join(f"echo {rng.random()}" for _ in range(rng.randint(1, 40))),
+        "language": rng.choice(ctx.languages),
+        "tags": ",".join(rng.sample(ctx.tags, k=3)),
+        "public": "true",
+    }
+    await ctx.client.request("snippet.create.form", "GET", "/snippets/create")
+    response = await ctx.client.request(
+        "snippet.create", "POST", "/snippets/create", expected=(303,), data=form
+    )
+    if response is None or response.status_code != 303:
+        return
+
+    snippet_id = response.headers["location"].rstrip("/").rsplit("/", 1)[-1]
+    await ctx.client.request("snippet.edit.form", "GET", f"/snippets/{snippet_id}/edit")
+    await ctx.client.request(
+        "snippet.edit",
+        "POST",
+        f"/snippets/{snippet_id}/edit",
+        expected=(303,),
+        data={**form, "tags": ",".join(rng.sample(ctx.tags, k=2))},
+    )
+    # Keep the size of the dataset stable
+    await ctx.client.request(
+        "snippet.delete", "POST", f"/snippets/{snippet_id}/delete", expected=(303,)
+    )
+
+
+async def toggle_favorite(ctx: Context):
+    """Logged in user adding a public snippet to their favorites, and removing it."""
+    if not ctx.public_ids:
+        return
+
+    snippet_id = ctx.rng.choice(ctx.public_ids)
+    for _ in range(2):
+        await ctx.client.request(
+            "snippet.toggle_favorite", "POST", f"/snippets/{snippet_id}/toggle-favorite"
+        )
+
+
+# name -> (scenario, default weight)
+SCENARIOS: dict[str, tuple[Callable[[Context], Awaitable[None]], int]] = {
+    "explore": (explore, 40),
+    "search": (search, 25),
+    "command_api": (command_api, 20),
+    "create_edit": (create_edit, 10),
+    "toggle_favorite": (toggle_favorite, 5),
+}
@@ -0,0 +1,56 @@
+import time
+from collections import defaultdict
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * percent / 100))
+    return sorted_values[index]
+
+
+class Stats:
+    """Durations and errors of the requests, by name."""
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.failed_scenarios: dict[str, int] = defaultdict(int)
+        self.started_at = time.perf_counter()
+
+    def record(self, name: str, duration: float, error: bool = False):
+        self.durations[name].append(duration)
+        if error:
+            self.errors[name] += 1
+
+    def _summary(self, durations: list[float], errors: int, elapsed: float) -> dict:
+        durations = sorted(durations)
+        return {
+            "count": len(durations),
+            "errors": errors,
+            "rps": round(len(durations) / elapsed, 2),
+            "mean_ms": round(sum(durations) / len(durations) * 1000, 2)
+            if durations
+            else 0.0,
+            **{
+                f"p{p}_ms": round(percentile(durations, p) * 1000, 2)
+                for p in (50, 90, 95, 99)
+            },
+            "max_ms": round(durations[-1] * 1000, 2) if durations else 0.0,
+        }
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started_at
+        return {
+            "elapsed": round(elapsed, 2),
+            "total": self._summary(
+                [d for durations in self.durations.values() for d in durations],
+                sum(self.errors.values()),
+                elapsed,
+            ),
+            "requests": {
+                name: self._summary(durations, self.errors[name], elapsed)
+                for name, durations in sorted(self.durations.items())
+            },
+            "failed_scenarios": dict(self.failed_scenarios),
+        }
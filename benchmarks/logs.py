@@ -0,0 +1,114 @@
+"""
+Time spent by the caller of a log: a loguru log, and an uvicorn access log going through
+`InterceptHandler`, for each format, with and without the background sink, written to devnull.
+
+Writing to devnull is free, so the synchronous sink never waits here like it does on a busy
+stdout. With `enqueue` the writes are done by a thread, the caller only formats and queues.
+
+Usage:
+    python -m benchmarks.logs
+"""
+
+import contextlib
+import logging
+import os
+import time
+
+from loguru import logger
+
+from app.logger import init_logging
+from app.settings import settings
+
+CONFIGS = [
+    # format, enqueue, access log sample rate
+    ("text", False, 1.0),
+    ("text", True, 1.0),
+    ("json", False, 1.0),
+    ("json", True, 1.0),
+    ("json", True, 0.1),
+]
+
+
+def measure(fn, min_time=0.2) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(1000):
+            fn()
+        runs += 1000
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+@contextlib.contextmanager
+def configured(log_format: str, enqueue: bool, sample_rate: float):
+    """Logging configured by `init_logging` with the given settings, to devnull."""
+    previous = (
+        settings.LOG_FORMAT,
+        settings.LOG_ENQUEUE,
+        settings.LOG_ACCESS_SAMPLE_RATE,
+    )
+    settings.LOG_FORMAT = log_format
+    settings.LOG_ENQUEUE = enqueue
+    settings.LOG_ACCESS_SAMPLE_RATE = sample_rate
+    with open(os.devnull, "w") as devnull:
+        try:
+            # The sink is the `sys.stdout` of the configuration
+            with contextlib.redirect_stdout(devnull):
+                init_logging()
+            yield
+        finally:
+            # Writes the queued logs of the background sink
+            logger.remove()
+            (
+                settings.LOG_FORMAT,
+                settings.LOG_ENQUEUE,
+                settings.LOG_ACCESS_SAMPLE_RATE,
+            ) = previous
+
+
+def run(min_time: float = 0.2) -> list[dict]:
+    access_logger = logging.getLogger("uvicorn.access")
+    access_logger.setLevel(logging.INFO)
+    access_logger.propagate = False
+
+    def log():
+        logger.info("Snippet created")
+
+    def log_bound():
+        logger.bind(snippet_id="0b5e5c1e", user_id="5d9f8c2a").info("Snippet created")
+
+    def access_log():
+        access_logger.info(
+            '%s - "%s %s HTTP/%s" %d',
+            "127.0.0.1:52000",
+            "GET",
+            "/snippets/",
+            "1.1",
+            200,
+        )
+
+    results = []
+    for log_format, enqueue, sample_rate in CONFIGS:
+        name = f"{log_format}{' enqueue' if enqueue else ''}"
+        with configured(log_format, enqueue, sample_rate):
+            if sample_rate == 1:
+                results.append((f"log {name}", measure(log, min_time)))
+                results.append((f"log bound {name}", measure(log_bound, min_time)))
+            else:
+                name += f" sample {sample_rate:g}"
+            results.append((f"access log {name}", measure(access_log, min_time)))
+
+    init_logging()
+    return [{"name": name, "us": round(seconds * 1e6, 2)} for name, seconds in results]
+
+
+def main():
+    print(f"{'log call':<40}{'us':>10}")
+    for r in run():
+        print(f"{r['name']:<40}{r['us']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
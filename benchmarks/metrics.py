@@ -0,0 +1,120 @@
+"""
+Overhead of the metrics collection: updating a metric, and a request through `MetricsMiddleware`.
+
+Usage:
+    python -m benchmarks.metrics
+"""
+
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from app.common.metrics import Counter, Histogram, MetricsMiddleware, registry
+
+ROUNDS = 5
+
+
+def measure(fn, min_time=0.2) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(1000):
+            fn()
+        runs += 1000
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/snippets/{id}")
+    async def view(id: str):
+        return PlainTextResponse("ok")
+
+    return app
+
+
+def measure_request(app, min_time=0.2) -> float:
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "scheme": "http",
+        "server": ("localhost", 8000),
+        "root_path": "",
+        "path": "/snippets/1",
+        "raw_path": b"/snippets/1",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost:8000")],
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def requests(count: int):
+        for _ in range(count):
+            await app(dict(scope), receive, send)
+
+    async def main() -> float:
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            await requests(500)
+            runs += 500
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                return elapsed / runs
+
+    return asyncio.run(main())
+
+
+def run(min_time: float = 0.2) -> list[dict]:
+    counter = Counter("benchmark_total", "Benchmark", ("method", "route", "status"))
+    histogram = Histogram("benchmark_seconds", "Benchmark", ("method", "route"))
+
+    without_metrics = _app()
+    with_metrics = _app()
+    with_metrics.add_middleware(MetricsMiddleware)
+    # Best of interleaved rounds, the difference is small compared to the noise
+    base = instrumented = float("inf")
+    for _ in range(ROUNDS):
+        base = min(base, measure_request(without_metrics, min_time))
+        instrumented = min(instrumented, measure_request(with_metrics, min_time))
+
+    return [
+        {
+            "name": "counter.inc",
+            "us": round(
+                measure(lambda: counter.inc("GET", "/", "200"), min_time) * 1e6, 3
+            ),
+        },
+        {
+            "name": "histogram.observe",
+            "us": round(
+                measure(lambda: histogram.observe(0.042, "GET", "/"), min_time) * 1e6, 3
+            ),
+        },
+        {"name": "request", "us": round(base * 1e6, 2)},
+        {"name": "request + metrics", "us": round(instrumented * 1e6, 2)},
+        {"name": "metrics overhead", "us": round((instrumented - base) * 1e6, 2)},
+        {
+            "name": "render /metrics",
+            "us": round(measure(registry.render, min_time) * 1e6, 2),
+        },
+    ]
+
+
+def main():
+    print(f"{'operation':<24}{'us':>10}")
+    for r in run():
+        print(f"{r['name']:<24}{r['us']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Render latency of the snippets index page, cold (first render in a new worker) and warm.
+
+Cold renders are measured with and without the compiled templates in the bytecode cache,
+warm renders with and without `auto_reload` checking the template files for changes, and
+with the snippet cards reused from the fragment cache.
+
+Usage:
+    python -m benchmarks.templates
+"""
+
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from jinja2 import Environment, FileSystemBytecodeCache
+from starlette.requests import Request
+
+from app.app import app
+from app.common.templates import app_context, create_environment, templates
+from app.snippets.fragments import snippet_card_cache
+from app.snippets.search import SnippetsSearchParser
+from app.snippets.serializers import SnippetSerializer
+from app.snippets.views import Tab
+
+TEMPLATE = "snippets/templates/index.html"
+PAGE_SIZE = 20
+
+
+def make_request(path: str = "/snippets/") -> Request:
+    return Request(
+        {
+            "type": "http",
+            "app": app,
+            "router": app.router,
+            "method": "GET",
+            "scheme": "http",
+            "server": ("localhost", 8000),
+            "root_path": "",
+            "path": path,
+            "query_string": b"",
+            "headers": [(b"host", b"localhost:8000")],
+            "session": {},
+        }
+    )
+
+
+def make_context(request: Request, page_size: int = PAGE_SIZE) -> dict:
+    """Context of the index view for a page of `page_size` snippets."""
+    now = datetime.now(timezone.utc)
+    snippets = [
+        SnippetSerializer(
+            id=f"00000000-0000-0000-0000-{index:012d}",
+            title=f"Snippet {index}",
+            subtitle="Benchmark snippet",
+            content="\n".join(f"echo 'line {line}'" for line in range(20)),
+            language="BASH",
+            description="Some **markdown** description",
+            command_name=f"snippet-{index}" if index % 2 else None,
+            public=True,
+            tags=["bash", "benchmark"],
+            user_id="00000000-0000-0000-0000-000000000000",
+            created_at=now - timedelta(days=index),
+            updated_at=now - timedelta(hours=index),
+        )
+        for index in range(page_size)
+    ]
+    return {
+        **app_context(request),
+        "tabs": [
+            {
+                "label": Tab.labels[tab],
+                "value": tab,
+                "url": request.url_for("snippets.index").include_query_params(tab=tab),
+            }
+            for tab in Tab.order
+        ],
+        "selected_tab": Tab.EXPLORE,
+        "supported_tabs": Tab,
+        "snippets": snippets,
+        "selected_snippet": snippets[0],
+        "search_context": SnippetsSearchParser(q=""),
+        "pagination_context": {
+            "total_pages": 1,
+            "total_items": page_size,
+            "page_size": page_size,
+            "page": 1,
+            "start_index": 1,
+            "end_index": page_size,
+            "has_next": False,
+            "has_prev": False,
+            "next_page_url": None,
+            "prev_page_url": None,
+        },
+    }
+
+
+def new_environment(
+    bytecode_cache: FileSystemBytecodeCache | None = None, auto_reload: bool = False
+) -> Environment:
+    """A new environment, like the one of a worker that just started."""
+    env = create_environment(bytecode_cache=False)
+    env.bytecode_cache = bytecode_cache
+    env.auto_reload = auto_reload
+    env.globals.update(templates.env.globals)
+    return env
+
+
+def _timed_render(
+    env: Environment, context: dict, cached_fragments: bool = False
+) -> float:
+    if not cached_fragments:
+        snippet_card_cache.clear()
+    start = time.perf_counter()
+    env.get_template(TEMPLATE).render(context)
+    return time.perf_counter() - start
+
+
+def _result(name: str, timings: list[float]) -> dict:
+    return {
+        "name": name,
+        "template": TEMPLATE,
+        "runs": len(timings),
+        "ms": round(statistics.median(timings) * 1000, 3),
+        "min_ms": round(min(timings) * 1000, 3),
+    }
+
+
+def run(cold_runs: int = 10, warm_runs: int = 200) -> list[dict]:
+    context = make_context(make_request())
+
+    cold = [_timed_render(new_environment(), context) for _ in range(cold_runs)]
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        # The first worker compiles the templates and fills the cache
+        _timed_render(new_environment(bytecode_cache), context)
+        cold_cached = [
+            _timed_render(new_environment(bytecode_cache), context)
+            for _ in range(cold_runs)
+        ]
+
+    results = [
+        _result("cold", cold),
+        _result("cold-bytecode-cache", cold_cached),
+    ]
+    for name, auto_reload, cached_fragments in (
+        ("warm", False, False),
+        ("warm-auto-reload", True, False),
+        ("warm-fragment-cache", False, True),
+    ):
+        env = new_environment(auto_reload=auto_reload)
+        _timed_render(env, context, cached_fragments)
+        timings = [
+            _timed_render(env, context, cached_fragments) for _ in range(warm_runs)
+        ]
+        results.append(_result(name, timings))
+
+    return results
+
+
+def main():
+    print(f"{'render':<22}{'runs':>6}{'median ms':>12}{'min ms':>10}")
+    for r in run():
+        print(f"{r['name']:<22}{r['runs']:>6}{r['ms']:>12.3f}{r['min_ms']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Time to build the urls used by the templates, `request.url_for` vs the precomputed route table.
+
+Usage:
+    python -m benchmarks.urls
+"""
+
+import time
+
+from app.common.urls import url_for
+from benchmarks.templates import make_request
+
+SNIPPET_ID = "0b6f8a52-3f5c-4f6e-9a3e-6c1f0d2b7a44"
+
+# name, path params, query params
+CASES = [
+    ("static", {"path": "scripts/app.3f2a9c1b7d4e.js"}, None),
+    ("snippet.view", {"id": SNIPPET_ID}, None),
+    ("snippets.index", {}, {"tab": "mine", "selected_id": SNIPPET_ID}),
+    ("auth.providers.login", {"provider": "github"}, None),
+]
+
+
+def _starlette_url_for(request, name, path_params, query_params):
+    url = request.url_for(name, **path_params)
+    return str(url.include_query_params(**query_params) if query_params else url)
+
+
+def _route_table_url_for(request, name, path_params, query_params):
+    return url_for(request, name, query_params=query_params, **path_params)
+
+
+def measure(build, request, name, path_params, query_params, min_time=0.2) -> float:
+    runs = 0
+    start = time.perf_counter()
+    while True:
+        for _ in range(100):
+            build(request, name, path_params, query_params)
+        runs += 100
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / runs
+
+
+def run(min_time: float = 0.2) -> list[dict]:
+    request = make_request()
+    results = []
+    for name, path_params, query_params in CASES:
+        expected = _starlette_url_for(request, name, path_params, query_params)
+        assert (
+            _route_table_url_for(request, name, path_params, query_params) == expected
+        )
+
+        starlette = measure(
+            _starlette_url_for, request, name, path_params, query_params, min_time
+        )
+        route_table = measure(
+            _route_table_url_for, request, name, path_params, query_params, min_time
+        )
+        results.append(
+            {
+                "name": name,
+                "url_for_us": round(starlette * 1_000_000, 2),
+                "route_table_us": round(route_table * 1_000_000, 2),
+                "speedup": round(starlette / route_table, 1),
+            }
+        )
+    return results
+
+
+def main():
+    print(f"{'route':<24}{'url_for us':>12}{'route table us':>16}{'speedup':>9}")
+    for r in run():
+        print(
+            f"{r['name']:<24}{r['url_for_us']:>12.2f}{r['route_table_us']:>16.2f}"
+            f"{r['speedup']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+import subprocess
+from typing import Optional
+
+
+def git_commit() -> Optional[str]:
+    """Short hash of the checked out commit, to know what the results were measured on."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,134 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class Cache:
+    """
+    On-disk cache of command snippets.
+
+    The content of each snippet is stored once by its sha256 (content-addressed), so renaming a
+    command or two commands with the same content never store or download it twice.
+    `index.json` maps each command name to its content hash, ETag and language.
+
+    Layout:
+        <cache_dir>/index.json
+        <cache_dir>/objects/<sha256[:2]>/<sha256><extension>
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = Path(cache_dir)
+        self.index_path = self.cache_dir / "index.json"
+        self.objects_dir = self.cache_dir / "objects"
+        self._index: Optional[Dict] = None
+
+    @property
+    def index(self) -> Dict:
+        if self._index is None:
+            try:
+                with open(self.index_path, "r") as f:
+                    self._index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                self._index = {}
+
+            self._index.setdefault("commands", {})
+            self._index.setdefault("cursor", None)
+
+        return self._index
+
+    @property
+    def commands(self) -> Dict[str, Dict]:
+        return self.index["commands"]
+
+    @property
+    def cursor(self) -> Optional[str]:
+        return self.index["cursor"]
+
+    @cursor.setter
+    def cursor(self, value: Optional[str]):
+        self.index["cursor"] = value
+
+    def get(self, command_name: str) -> Optional[Dict]:
+        """Get the cache entry of a command if its content is on disk."""
+        entry = self.commands.get(command_name)
+        if entry and self.object_path(entry).exists():
+            return entry
+        return None
+
+    def object_path(self, entry: Dict) -> Path:
+        sha = entry["sha256"]
+        return self.objects_dir / sha[:2] / f"{sha}{entry.get('extension', '')}"
+
+    def put(
+        self,
+        command_name: str,
+        content: bytes,
+        etag: Optional[str],
+        language: str,
+        extension: str = "",
+        updated_at: Optional[str] = None,
+    ) -> Dict:
+        """Store the content of a command and update its index entry."""
+        entry = {
+            "sha256": hashlib.sha256(content).hexdigest(),
+            "extension": extension,
+            "etag": etag,
+            "language": language,
+            "updated_at": updated_at,
+            "checked_at": time.time(),
+        }
+
+        path = self.object_path(entry)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            _atomic_write(path, content)
+
+        self.commands[command_name] = entry
+        return entry
+
+    def touch(self, command_name: str):
+        """Mark a command as just revalidated with the server."""
+        if command_name in self.commands:
+            self.commands[command_name]["checked_at"] = time.time()
+
+    def is_fresh(self, entry: Dict, max_age: int) -> bool:
+        return max_age > 0 and time.time() - entry.get("checked_at", 0) < max_age
+
+    def remove(self, command_name: str):
+        self.commands.pop(command_name, None)
+
+    def prune(self, command_names):
+        """Remove commands that no longer exist and any content no longer referenced."""
+        for name in set(self.commands) - set(command_names):
+            self.remove(name)
+
+        referenced = {self.object_path(entry) for entry in self.commands.values()}
+        if self.objects_dir.exists():
+            for path in self.objects_dir.glob("*/*"):
+                if path not in referenced:
+                    path.unlink(missing_ok=True)
+
+    def clear(self):
+        self._index = {"commands": {}, "cursor": None}
+        self.prune([])
+        self.save()
+
+    def save(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(self.index_path, json.dumps(self.index, indent=2).encode())
+
+
+def _atomic_write(path: Path, data: bytes):
+    # Write to a temp file first so a concurrent run never reads a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,149 @@
+import http.client
+import json
+import threading
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import quote, urlencode, urlsplit
+
+from . import __version__
+
+
+class APIError(Exception):
+    def __init__(self, status: int, detail: str):
+        self.status = status
+        self.detail = detail
+        super().__init__(f"HTTP {status}: {detail}")
+
+
+@dataclass
+class APIResponse:
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class Client:
+    """
+    Client for the devscript command API.
+
+    Keeps one persistent keep-alive connection per thread, so parallel requests made from a
+    thread pool reuse their connections instead of opening a new one for every request.
+    """
+
+    def __init__(self, api_url: str, api_key: Optional[str], timeout: float = 5.0):
+        url = urlsplit(api_url)
+        self.scheme = url.scheme or "http"
+        self.host = url.hostname or "localhost"
+        self.port = url.port
+        self.base_path = url.path.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+        # Connections of all the threads, closed by `close`
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def get_command(self, command_name: str, etag: Optional[str] = None):
+        headers = {"If-None-Match": etag} if etag else {}
+        return self.request(
+            "GET",
+            f"/api/snippets/command/{quote(command_name)}",
+            headers=headers,
+            expected=(200, 304),
+        )
+
+    def get_manifest(self, since: Optional[str] = None) -> Dict:
+        query = f"?{urlencode({'since': since})}" if since else ""
+        return self.request("GET", f"/api/snippets/commands{query}").json()
+
+    def fetch_commands(self, command_names) -> Dict:
+        return self.request(
+            "POST",
+            "/api/snippets/commands/fetch",
+            body={"command_names": list(command_names)},
+        ).json()
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        headers: Optional[Dict] = None,
+        body: Optional[Dict] = None,
+        expected=(200,),
+    ) -> APIResponse:
+        if not self.api_key:
+            raise APIError(401, "No API key set, use the DEVSCRIPT_API_KEY env var")
+
+        headers = {
+            "X-API-Key": self.api_key,
+            "User-Agent": f"devscript-cli/{__version__}",
+            **(headers or {}),
+        }
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+
+        # Retry once in case the server closed the pooled keep-alive connection
+        for attempt in range(2):
+            conn = self._get_connection()
+            try:
+                conn.request(method, self.base_path + path, body=data, headers=headers)
+                response = conn.getresponse()
+                response_body = response.read()
+                break
+            except (
+                http.client.RemoteDisconnected,
+                BrokenPipeError,
+                ConnectionResetError,
+            ):
+                self._close_connection()
+                if attempt:
+                    raise
+
+        result = APIResponse(
+            status=response.status,
+            headers={k.lower(): v for k, v in response.getheaders()},
+            body=response_body,
+        )
+        if result.status not in expected:
+            try:
+                detail = result.json().get("detail", "")
+            except ValueError:
+                detail = response.reason
+            raise APIError(result.status, str(detail))
+
+        return result
+
+    def close(self):
+        """Close the connections opened by every thread."""
+        with self._lock:
+            connections, self._connections = self._connections, set()
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+
+    def _get_connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn_class = (
+                http.client.HTTPSConnection
+                if self.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            conn = conn_class(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.add(conn)
+        return conn
+
+    def _close_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+            with self._lock:
+                self._connections.discard(conn)
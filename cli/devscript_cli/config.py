@@ -0,0 +1,96 @@
+import os
+import shlex
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+# Language (as sent in the X-Snippet-Lang header) -> (interpreter command, file extension)
+# Can be overridden per language with env vars, e.g. DEVSCRIPT_INTERPRETER_PYTHON="python3.12"
+INTERPRETERS = {
+    "bash": (["bash"], ".sh"),
+    "shell": (["sh"], ".sh"),
+    "python": (["python3"], ".py"),
+    "javascript": (["node"], ".js"),
+    "typescript": (["npx", "--yes", "tsx"], ".ts"),
+    "ruby": (["ruby"], ".rb"),
+    "perl": (["perl"], ".pl"),
+    "php": (["php"], ".php"),
+    "lua": (["lua"], ".lua"),
+    "r": (["Rscript"], ".R"),
+    "powershell": (["pwsh", "-File"], ".ps1"),
+}
+
+
+@dataclass
+class Config:
+    api_url: str
+    api_key: Optional[str]
+    cache_dir: Path
+    # Seconds a cached command is used without checking the server for a new version
+    max_age: int = 0
+    # Seconds to wait for the server before falling back to the cache
+    timeout: float = 5.0
+    offline: bool = False
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        """
+        Raises:
+            ValueError: An env var has an invalid value
+        """
+        cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+        return cls(
+            api_url=_env("API_URL", "http://localhost:8000").rstrip("/"),
+            api_key=_env("API_KEY"),
+            cache_dir=Path(_env("CACHE_DIR") or Path(cache_home) / "devscript"),
+            max_age=_env_number("MAX_AGE", "0", int),
+            timeout=_env_number("TIMEOUT", "5", float),
+            offline=_env("OFFLINE", "false").lower() in ("1", "true", "yes"),
+        )
+
+
+def get_interpreter(language: str) -> Tuple[Optional[List[str]], str]:
+    """
+    Get the command used to run a snippet in the given language.
+
+    Args:
+        language: The snippet language from the X-Snippet-Lang header
+
+    Returns:
+        The interpreter command (None if unsupported) and the file extension to use
+    """
+    language = (language or "").lower()
+    command, extension = INTERPRETERS.get(language, (None, ""))
+
+    override = os.environ.get(f"DEVSCRIPT_INTERPRETER_{language.upper()}")
+    if override:
+        command = shlex.split(override)
+
+    return command, extension
+
+
+def _env(name: str, default: Optional[str] = None) -> Optional[str]:
+    # The DSC_ prefix is supported for the env vars used by the documented bash function
+    return (
+        os.environ.get(f"DEVSCRIPT_{name}") or os.environ.get(f"DSC_{name}") or default
+    )
+
+
+def _env_number(name: str, default: str, type_: type):
+    value = _env(name, default)
+    try:
+        number = type_(value)
+    except ValueError:
+        number = None
+    # Also rejects nan
+    if number is None or not number >= 0:
+        env_var = next(
+            (
+                f"{prefix}{name}"
+                for prefix in ("DEVSCRIPT_", "DSC_")
+                if os.environ.get(f"{prefix}{name}")
+            ),
+            f"DEVSCRIPT_{name}",
+        )
+        raise ValueError(f"Invalid {env_var} '{value}', expected a number of seconds")
+    return number
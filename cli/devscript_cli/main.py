@@ -0,0 +1,204 @@
+"""
+devscript command line client
+
+Usage:
+    devscript <command-name> [args...]       Run a command snippet
+    devscript run <command-name> [args...]   Same as above
+    devscript sync                           Download all of your command snippets
+    devscript list                           List the cached command snippets
+    devscript clear-cache                    Remove all cached command snippets
+"""
+
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+from .cache import Cache
+from .config import Config, get_interpreter
+
+SUBCOMMANDS = ("run", "sync", "list", "clear-cache", "help", "-h", "--help")
+
+# Number of commands requested per call to the bulk fetch endpoint
+FETCH_CHUNK_SIZE = 100
+FETCH_WORKERS = 4
+
+
+def main(argv: Optional[List[str]] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        config = Config.from_env()
+    except ValueError as e:
+        _exit_error(str(e))
+
+    # Allow the offline flag before any sub command
+    if argv and argv[0] == "--offline":
+        config.offline = True
+        argv = argv[1:]
+
+    if not argv or argv[0] in ("help", "-h", "--help"):
+        print(__doc__.strip())
+        sys.exit(0 if argv else 1)
+
+    # `devscript <command-name>` is a shortcut for `devscript run <command-name>`
+    if argv[0] not in SUBCOMMANDS:
+        argv = ["run", *argv]
+
+    cache = Cache(config.cache_dir)
+    subcommand, args = argv[0], argv[1:]
+
+    if subcommand == "run":
+        if not args:
+            _exit_error("Usage: devscript run <command-name> [args...]")
+        sys.exit(run(config, cache, args[0], args[1:]))
+    elif subcommand == "sync":
+        sys.exit(sync(config, cache))
+    elif subcommand == "list":
+        for name, entry in sorted(cache.commands.items()):
+            print(f"{name}\t{entry['language']}\t{entry.get('updated_at') or ''}")
+    elif subcommand == "clear-cache":
+        cache.clear()
+
+
+def run(config: Config, cache: Cache, command_name: str, args: List[str]) -> int:
+    """
+    Run a command snippet, using the cached copy when it is still current.
+
+    The cached copy is revalidated with its ETag, so unchanged snippets are never downloaded again.
+    If the server can not be reached, the cached copy is used.
+    """
+    entry = cache.get(command_name)
+
+    if not entry or not (config.offline or cache.is_fresh(entry, config.max_age)):
+        entry = _revalidate(config, cache, command_name, entry)
+
+    command, _ = get_interpreter(entry["language"])
+    if not command:
+        _exit_error(
+            f"Unsupported language '{entry['language']}', set "
+            f"DEVSCRIPT_INTERPRETER_{entry['language'].upper()} to the command to run it with"
+        )
+
+    script_path = str(cache.object_path(entry))
+    command = [*command, script_path, *args]
+
+    if os.name == "posix":
+        # Replace this process so signals and the exit code go directly to the script
+        try:
+            os.execvp(command[0], command)
+        except FileNotFoundError:
+            _exit_error(f"Interpreter not found: {command[0]}")
+
+    try:
+        return subprocess.run(command).returncode
+    except FileNotFoundError:
+        _exit_error(f"Interpreter not found: {command[0]}")
+
+
+def sync(config: Config, cache: Cache) -> int:
+    """
+    Download every command snippet that changed since the last sync.
+
+    Uses the manifest to find what changed, then fetches the changed content in parallel chunks.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from .client import APIError, Client
+
+    client = Client(config.api_url, config.api_key, timeout=config.timeout)
+    try:
+        manifest = client.get_manifest(since=cache.cursor if cache.commands else None)
+
+        changed = [
+            name
+            for name, info in manifest["commands"].items()
+            if (cache.get(name) or {}).get("etag") != info["etag"]
+        ]
+        chunks = [
+            changed[i : i + FETCH_CHUNK_SIZE]
+            for i in range(0, len(changed), FETCH_CHUNK_SIZE)
+        ]
+
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            for result in executor.map(client.fetch_commands, chunks):
+                for name, command in result["commands"].items():
+                    _, extension = get_interpreter(command["language"])
+                    cache.put(
+                        name,
+                        command["content"].encode(),
+                        etag=command["etag"],
+                        language=command["language"],
+                        extension=extension,
+                        updated_at=command["updated_at"],
+                    )
+    except APIError as e:
+        # The index is only saved once every command was fetched, the cursor stays put
+        _exit_error(f"Sync failed ({e})")
+    except OSError as e:
+        _exit_error(f"Sync failed, server unreachable ({e})")
+    finally:
+        client.close()
+
+    cache.prune(manifest["command_names"])
+    cache.cursor = manifest["cursor"]
+    cache.save()
+
+    print(
+        f"Synced {len(manifest['command_names'])} commands ({len(changed)} updated)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def _revalidate(config: Config, cache: Cache, command_name: str, entry):
+    from .client import APIError, Client
+
+    if config.offline:
+        _exit_error(f"Command '{command_name}' is not cached")
+
+    client = Client(config.api_url, config.api_key, timeout=config.timeout)
+    try:
+        response = client.get_command(
+            command_name, etag=entry["etag"] if entry else None
+        )
+    except APIError as e:
+        if e.status == 404:
+            cache.remove(command_name)
+            cache.save()
+            _exit_error(f"Command '{command_name}' not found")
+        if entry and e.status >= 500:
+            _warn(f"Server error ({e}), using the cached copy")
+            return entry
+        _exit_error(f"Failed to fetch '{command_name}' ({e})")
+    except OSError as e:
+        if entry:
+            _warn(f"Server unreachable ({e}), using the cached copy")
+            return entry
+        _exit_error(f"Server unreachable ({e}) and '{command_name}' is not cached")
+    finally:
+        client.close()
+
+    if response.status == 304:
+        cache.touch(command_name)
+    else:
+        language = response.headers.get("x-snippet-lang", "")
+        _, extension = get_interpreter(language)
+        cache.put(
+            command_name,
+            response.body,
+            etag=response.headers.get("etag"),
+            language=language,
+            extension=extension,
+        )
+
+    cache.save()
+    return cache.get(command_name)
+
+
+def _warn(message: str):
+    print(f"devscript: {message}", file=sys.stderr)
+
+
+def _exit_error(message: str):
+    print(f"Error: {message}", file=sys.stderr)
+    sys.exit(1)
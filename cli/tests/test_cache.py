@@ -0,0 +1,47 @@
+from devscript_cli.cache import Cache
+
+
+def test_put_and_get(tmp_path):
+    cache = Cache(tmp_path)
+    entry = cache.put(
+        "hello", b"echo hello\n", etag='"a"', language="bash", extension=".sh"
+    )
+
+    assert cache.get("hello") == entry
+    assert cache.object_path(entry).read_bytes() == b"echo hello\n"
+    assert cache.object_path(entry).suffix == ".sh"
+
+    cache.save()
+    assert Cache(tmp_path).get("hello")["etag"] == '"a"'
+
+
+def test_same_content_is_stored_once(tmp_path):
+    cache = Cache(tmp_path)
+    first = cache.put("one", b"ls -la\n", etag='"a"', language="bash", extension=".sh")
+    second = cache.put("two", b"ls -la\n", etag='"b"', language="bash", extension=".sh")
+
+    assert cache.object_path(first) == cache.object_path(second)
+    assert len(list((tmp_path / "objects").glob("*/*"))) == 1
+
+
+def test_prune_removes_unreferenced_content(tmp_path):
+    cache = Cache(tmp_path)
+    kept = cache.put("kept", b"echo kept\n", etag='"a"', language="bash")
+    removed = cache.put("removed", b"echo removed\n", etag='"b"', language="bash")
+
+    cache.prune(["kept"])
+
+    assert cache.get("removed") is None
+    assert cache.object_path(kept).exists()
+    assert not cache.object_path(removed).exists()
+
+
+def test_clear(tmp_path):
+    cache = Cache(tmp_path)
+    cache.put("hello", b"echo hello\n", etag='"a"', language="bash")
+    cache.cursor = "2025-02-06T12:30:15+00:00"
+
+    cache.clear()
+
+    assert cache.commands == {} and cache.cursor is None
+    assert not list((tmp_path / "objects").glob("*/*"))
@@ -0,0 +1,75 @@
+import socket
+import threading
+
+import pytest
+from devscript_cli.cache import Cache
+from devscript_cli.client import Client
+from devscript_cli.config import Config
+from devscript_cli.main import main, sync
+
+
+def _unused_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_sync_reports_an_unreachable_server(tmp_path, capsys):
+    config = Config(
+        api_url=f"http://127.0.0.1:{_unused_port()}",
+        api_key="key",
+        cache_dir=tmp_path,
+    )
+
+    with pytest.raises(SystemExit) as exc_info:
+        sync(config, Cache(tmp_path))
+
+    assert exc_info.value.code == 1
+    assert "Sync failed, server unreachable" in capsys.readouterr().err
+
+
+def test_sync_reports_api_errors(tmp_path, capsys):
+    config = Config(api_url="http://127.0.0.1:1", api_key=None, cache_dir=tmp_path)
+
+    with pytest.raises(SystemExit) as exc_info:
+        sync(config, Cache(tmp_path))
+
+    assert exc_info.value.code == 1
+    assert "Sync failed (HTTP 401: No API key set" in capsys.readouterr().err
+
+
+def test_close_closes_the_connections_of_every_thread():
+    client = Client("http://127.0.0.1:1", "key")
+    connections = []
+
+    def connect():
+        connections.append(client._get_connection())
+
+    threads = [threading.Thread(target=connect) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    connections[0].sock = socket.socket()
+
+    client.close()
+
+    assert len(set(connections)) == 3
+    assert connections[0].sock is None
+    assert client._connections == set()
+
+
+@pytest.mark.parametrize(
+    "env_var, value",
+    [("DEVSCRIPT_MAX_AGE", "1h"), ("DSC_TIMEOUT", "five"), ("DSC_TIMEOUT", "-1")],
+)
+def test_invalid_env_vars_are_reported(monkeypatch, capsys, env_var, value):
+    monkeypatch.setenv(env_var, value)
+
+    with pytest.raises(SystemExit) as exc_info:
+        main(["list"])
+
+    assert exc_info.value.code == 1
+    assert capsys.readouterr().err == (
+        f"Error: Invalid {env_var} '{value}', expected a number of seconds\n"
+    )